@@ -0,0 +1,187 @@
+"""
+atomic replacement of files through a sibling temporary file that is
+renamed over the target, so that readers never see partial writes
+
+"""
+import io
+import os
+import stat
+import tempfile
+import threading
+
+from fstree.workers import parallel_map
+from fstree.workers import DEFAULT_MAX_WORKERS
+from fstree.backends.durability import DURABILITY_NONE
+
+
+__all__ = [
+    'AtomicWriter',
+    'AtomicBatch',
+]
+
+
+def get_umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def fsync_path(path):
+    fileno = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fileno)
+    finally:
+        os.close(fileno)
+
+
+def discard(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class AtomicWriter(object):
+    """a context manager that writes to a temporary file in the same
+    folder of ``path`` and, when the block succeeds, syncs and renames
+    it over ``path``. When the block fails the temporary file is
+    deleted and ``path`` is left untouched.
+
+    ::
+
+        >>> with backend.atomic_writer('/srv/state.json') as fd:
+        ...     fd.write(data)
+
+    :param backend: the :py:class:`~fstree.backends.posix.Posix` backend, whose durability policy decides the syncs
+    :param path: the path to the file
+    :param mode: the mode of the temporary file, must be one of the writing modes (default: ``"wb"``)
+    :param batch: an optional :py:class:`AtomicBatch` that defers the sync and rename until it is committed
+    """
+
+    def __init__(self, backend, path, mode='wb', batch=None):
+        if 'w' not in mode:
+            raise ValueError('atomic writes require a "w" mode, got {0!r}'.format(mode))
+
+        self.backend = backend
+        self.path = path
+        self.mode = mode
+        self.batch = batch
+        self.fd = None
+        self.temp_path = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def open(self):
+        """:returns: the `~FileDescriptor` of the temporary file"""
+        folder, name = os.path.split(self.path)
+        fileno, self.temp_path = tempfile.mkstemp(
+            prefix='.{0}.'.format(name), suffix='.tmp', dir=folder or os.curdir)
+
+        # mkstemp creates files that only the owner can read
+        os.fchmod(fileno, self.get_permissions())
+        self.fd = io.open(fileno, self.mode)
+        return self.fd
+
+    def get_permissions(self):
+        try:
+            return stat.S_IMODE(os.stat(self.path).st_mode)
+        except OSError:
+            return 0o666 & ~get_umask()
+
+    def commit(self):
+        """syncs and renames the temporary file over the target, or
+        hands it to the batch"""
+        if self.batch is not None:
+            self.fd.close()
+            self.batch.add(self.temp_path, self.path)
+            return
+
+        self.backend.close_fd(self.fd)
+        os.rename(self.temp_path, self.path)
+        self.backend.invalidate_cache(self.path)
+        self.backend.sync_parent(self.path)
+
+    def abort(self):
+        """deletes the temporary file"""
+        self.fd.close()
+        discard(self.temp_path)
+
+
+class AtomicBatch(object):
+    """commits many :py:class:`AtomicWriter` together: the temporary
+    files are synced in parallel, then renamed, then each of their
+    folders is synced once.
+
+    ::
+
+        >>> with backend.atomic_batch() as batch:
+        ...     for path, data in outputs:
+        ...         with batch.writer(path) as fd:
+        ...             fd.write(data)
+
+    :param backend: the :py:class:`~fstree.backends.posix.Posix` backend, whose durability policy decides the syncs
+    :param max_workers: how many files are synced at once (default: **16**)
+    """
+
+    def __init__(self, backend, max_workers=DEFAULT_MAX_WORKERS):
+        self.backend = backend
+        self.max_workers = max_workers
+        self.pending = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def writer(self, path, mode='wb'):
+        """:returns: an :py:class:`AtomicWriter` that belongs to this batch"""
+        return AtomicWriter(self.backend, path, mode, batch=self)
+
+    def add(self, temp_path, path):
+        with self._lock:
+            self.pending.append((temp_path, path))
+
+    def commit(self):
+        """
+        :returns: `list` of the paths that were replaced
+        """
+        with self._lock:
+            pending, self.pending = self.pending, []
+
+        policy = self.backend.durability
+        if policy.mode != DURABILITY_NONE:
+            temp_paths = [temp_path for temp_path, path in pending]
+            for _ in parallel_map(fsync_path, temp_paths, self.max_workers, ordered=False):
+                pass
+
+        folders = set()
+        for temp_path, path in pending:
+            os.rename(temp_path, path)
+            self.backend.invalidate_cache(path)
+            folders.add(os.path.dirname(os.path.abspath(path)))
+
+        if policy.sync_folders:
+            for folder in sorted(folders):
+                self.backend.sync_folder(folder)
+
+        return [path for temp_path, path in pending]
+
+    def abort(self):
+        """deletes the temporary files that were not committed yet"""
+        with self._lock:
+            pending, self.pending = self.pending, []
+
+        for temp_path, path in pending:
+            discard(temp_path)
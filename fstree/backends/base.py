@@ -44,9 +44,30 @@ def normalize_path_for_schema(path, schema, exception_class=UnsupportedPath):
 class Backend(object):
     __metaclass__ = BackendMeta
 
+    # an optional :py:class:`~fstree.backends.cache.MetadataCache`
+    # consulted before stat'ing paths.
+    cache = None
+
     def __eq__(self, other):
         return isinstance(other, self.__class__)
 
+    def invalidate_cache(self, path, recursive=False):
+        """discards the cached metadata of the given path, if any.
+
+        :param path: the path to the file or folder
+        :param recursive: when `True` also discards every path under it.
+        """
+        if self.cache is not None:
+            self.cache.invalidate(path, recursive)
+
+    def sync_parent(self, path, durability=None):
+        """makes the creation of the given path durable, backends
+        without such a concept do nothing.
+
+        :returns: `True` if the parent folder was synced
+        """
+        return False
+
     def get_default_encoding(self):
         return b'utf-8'
 
@@ -62,12 +83,21 @@ class Backend(object):
         """
 
     @abstractmethod
-    def stat(self, path):
+    def stat(self, path, key=None, st=None):
         """
         :param path:
+        :param key:
+        :param st: an existing stat result
         :returns: `dict`
         """
 
+    @abstractmethod
+    def stat_fd(self, fd):
+        """
+        :param fd: an open file-descriptor
+        :returns: a stat result
+        """
+
     @abstractmethod
     def expand_path(self, path):
         """
@@ -128,8 +158,37 @@ class Backend(object):
         """:returns: `AccessPolicy`"""
 
     @abstractmethod
-    def load_info(self, path):
-        """:returns: `NodeInfo`"""
+    def load_info(self, path, st=None):
+        """
+        :param path:
+        :param st: an existing stat result
+        :returns: `NodeInfo`
+        """
+
+    def stat_many(self, paths, **kw):
+        """calls :py:meth:`stat` for each of the given paths.
+
+        :param paths: an iterable of paths
+        :returns: an iterator of ``(path, stat)``
+        """
+        for path in paths:
+            yield path, self.stat(path)
+
+    def load_info_many(self, paths, **kw):
+        """calls :py:meth:`load_info` for each of the given paths.
+
+        :param paths: an iterable of paths
+        :returns: an iterator of ``(path, NodeInfo)``
+        """
+        for path in paths:
+            yield path, self.load_info(path)
+
+    @abstractmethod
+    def iter_entries(self, path, **kw):
+        """
+        :param path:
+        :returns: an iterator of entries with ``path``, ``name`` and a cached ``stat()``
+        """
 
     @abstractmethod
     def get_root_path(self):
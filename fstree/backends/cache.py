@@ -0,0 +1,119 @@
+"""
+metadata cache shared among backend instances
+
+"""
+import os
+import stat
+import time
+import threading
+
+from collections import OrderedDict
+
+
+__all__ = [
+    'MetadataCache',
+    'NOT_FOUND',
+]
+
+# stored for paths that were stat'ed and found not to exist
+NOT_FOUND = object()
+
+
+class MetadataCache(object):
+    """a size-bounded :abbr:`LRU (least recently used)` cache of stat
+    results keyed by path.
+
+    Entries are discarded when:
+
+    - they are older than ``ttl`` seconds
+    - the backend writes, creates or deletes their path (see :py:meth:`invalidate`)
+    - a fresh stat result of their parent folder shows a different ``st_mtime``
+
+    It is safe to share the same instance among many backends and threads.
+    """
+
+    def __init__(self, maxsize=4096, ttl=None, clock=time.time):
+        """
+        :param maxsize: how many paths to keep (default: **4096**)
+        :param ttl: how many seconds an entry is valid for (default: `None`, never expires)
+        :param clock: a callable that returns the current time in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, path, default=None):
+        """
+        :param path: the path to the file or folder
+        :returns: the cached stat result, :py:data:`NOT_FOUND` or ``default`` if it is not cached.
+        """
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is None or self.has_expired(entry):
+                self.misses += 1
+                return default
+
+            # most recently used goes last
+            self._entries[path] = entry
+            self.hits += 1
+            return entry[1]
+
+    def put(self, path, st):
+        """
+        :param path: the path to the file or folder
+        :param st: a stat result or :py:data:`NOT_FOUND`
+        """
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if is_stale_folder(previous, st):
+                self.discard_children(path)
+
+            self._entries[path] = (self.clock(), st)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def has_expired(self, entry):
+        return self.ttl is not None and self.clock() - entry[0] > self.ttl
+
+    def invalidate(self, path, recursive=False):
+        """forgets the given path and its parent folder, whose ``st_mtime``
+        changes whenever a child is created or deleted.
+
+        :param path: the path to the file or folder
+        :param recursive: when `True` also forgets every path under it.
+        """
+        with self._lock:
+            self._entries.pop(path, None)
+            self._entries.pop(os.path.dirname(path), None)
+            if recursive:
+                self.discard_descendants(path)
+
+    def discard_children(self, path):
+        for key in self._entries.keys():
+            if os.path.dirname(key) == path:
+                del self._entries[key]
+
+    def discard_descendants(self, path):
+        prefix = path.rstrip(os.sep) + os.sep
+        for key in self._entries.keys():
+            if key.startswith(prefix):
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def is_stale_folder(entry, st):
+    if entry is None or entry[1] is NOT_FOUND or st is NOT_FOUND:
+        return False
+
+    previous = entry[1]
+    return stat.S_ISDIR(previous.st_mode) and previous.st_mtime != st.st_mtime
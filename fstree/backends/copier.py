@@ -0,0 +1,230 @@
+"""
+copy engine that keeps the file contents inside the kernel whenever
+the platform and filesystem allow it
+
+"""
+import io
+import os
+import time
+import errno
+import fcntl
+
+from fstree.backends import libc
+from fstree.backends.erase import DEFAULT_CHUNK_SIZE
+from fstree.backends.sparse import data_extents
+
+
+__all__ = [
+    'COPY_METHODS',
+    'CopyReport',
+    'copy_fd',
+]
+
+# _IOW(0x94, 9, int) from linux/fs.h
+FICLONE = 0x40049409
+
+# each method is tried in order until one is supported
+COPY_METHODS = (
+    'reflink',
+    'copy_file_range',
+    'sendfile',
+    'chunks',
+)
+
+# besides the unsupported errors, the kernel refuses the zero-copy
+# methods with these when the files are in different filesystems or
+# the filesystem does not implement them.
+FALLBACK_ERRNOS = (
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EBADF,
+)
+
+
+def can_fall_back(error):
+    return libc.is_unsupported(error) or error.errno in FALLBACK_ERRNOS
+
+
+class CopyReport(object):
+    """the result of :py:func:`copy_fd`"""
+
+    def __init__(self, size, method, copied, elapsed):
+        self.size = size
+        self.method = method
+        self.copied = copied
+        self.elapsed = elapsed
+
+    @property
+    def throughput(self):
+        """`float` bytes copied per second"""
+        if not self.elapsed:
+            return float(self.copied)
+
+        return self.copied / self.elapsed
+
+    def __repr__(self):
+        return 'CopyReport(size={0}, method={1}, throughput={2:.0f}B/s)'.format(
+            self.size, self.method, self.throughput)
+
+
+def copy_reflink(src, dst, size):
+    if os.fstat(src).st_size != size:
+        # the clone always covers the whole file
+        return None
+
+    try:
+        fcntl.ioctl(dst, FICLONE, src)
+    except (IOError, OSError) as e:
+        if can_fall_back(e):
+            return None
+        raise
+
+    return size
+
+
+def copy_in_kernel(call, src, dst, extents):
+    copied = 0
+    for start, end in extents:
+        count = copy_range(call, src, dst, start, end, fall_back=not copied)
+        if count is None:
+            return None
+
+        copied += count
+        if count < end - start:
+            # the source is shorter than it was
+            break
+
+    return copied
+
+
+def copy_range(call, src, dst, start, end, fall_back):
+    """
+    :param fall_back: when `True` returns `None` rather than raising if the call is not supported before anything is copied
+    :returns: `int` how many bytes were copied
+    """
+    offset = start
+    while offset < end:
+        try:
+            count = call(src, dst, offset, min(end - offset, 1 << 30))
+        except OSError as e:
+            if fall_back and offset == start and can_fall_back(e):
+                return None
+            raise
+
+        if not count:
+            break
+
+        offset += count
+
+    return offset - start
+
+
+def copy_file_range(src, dst, extents, chunk_size):
+    def call(src, dst, offset, count):
+        return libc.copy_file_range(src, dst, count, offset, offset)
+
+    return copy_in_kernel(call, src, dst, extents)
+
+
+def sendfile(src, dst, extents, chunk_size):
+    def call(src, dst, offset, count):
+        # sendfile writes at the current position of dst
+        os.lseek(dst, offset, os.SEEK_SET)
+        return libc.sendfile(dst, src, offset, count)
+
+    return copy_in_kernel(call, src, dst, extents)
+
+
+def copy_chunks(src, dst, extents, chunk_size):
+    largest = max([end - start for start, end in extents] or [0])
+    buf = bytearray(max(min(chunk_size, largest), 1))
+    view = memoryview(buf)
+    reader = io.FileIO(src, 'rb', closefd=False)
+    writer = io.FileIO(dst, 'wb', closefd=False)
+
+    copied = 0
+    for start, end in extents:
+        reader.seek(start)
+        writer.seek(start)
+        offset = start
+        while offset < end:
+            count = reader.readinto(view[:min(len(buf), end - offset)])
+            if not count:
+                return copied
+
+            writer.write(view[:count])
+            offset += count
+            copied += count
+
+    return copied
+
+
+COPY_FUNCTIONS = {
+    'copy_file_range': copy_file_range,
+    'sendfile': sendfile,
+    'chunks': copy_chunks,
+}
+
+
+def copy_extents(method, src, dst, size, extents, chunk_size):
+    copied = COPY_FUNCTIONS[method](src, dst, extents, chunk_size)
+    if copied is not None:
+        # also creates the trailing hole, if any
+        os.ftruncate(dst, size)
+
+    return copied
+
+
+def copy_with_methods(src, dst, size, chunk_size, methods, sparse):
+    """
+    :returns: a ``(method, copied)`` tuple with the first method that is supported
+    """
+    extents = None
+    for method in methods:
+        if method == 'reflink':
+            copied = copy_reflink(src, dst, size)
+        else:
+            if extents is None:
+                # an empty list means that the file is all holes
+                extents = data_extents(src, length=size) if sparse else [(0, size)]
+
+            copied = copy_extents(method, src, dst, size, extents, chunk_size)
+
+        if copied is not None:
+            return method, copied
+
+    raise libc.unsupported('copy with any of: {0}'.format(', '.join(methods)))
+
+
+def copy_fd(src, dst, size=None, chunk_size=DEFAULT_CHUNK_SIZE, methods=COPY_METHODS, sparse=True):
+    """copies the whole content of ``src`` into the empty ``dst``,
+    using the first of the given methods that is supported.
+
+    Except for reflinks, only the data extents of ``src`` are copied
+    and ``dst`` is then truncated to ``size``, so that the holes of
+    sparse files remain holes in the copy.
+
+    :param src: a `~FileDescriptor` open for reading
+    :param dst: a `~FileDescriptor` of an empty file open for writing
+    :param size: how many bytes to copy (defaults to the current size of ``src``)
+    :param chunk_size: how many bytes per read and write of the ``"chunks"`` method (default: **1MB**)
+    :param methods: a sequence with any of ``"reflink"``, ``"copy_file_range"``, ``"sendfile"`` and ``"chunks"``
+    :param sparse: when `False` the holes are copied as null-bytes
+    :returns: a :py:class:`CopyReport`
+    """
+    unknown = set(methods).difference(COPY_METHODS)
+    if unknown:
+        raise ValueError('unknown copy methods: {0}'.format(', '.join(sorted(unknown))))
+
+    dst.flush()
+    src_fileno, dst_fileno = src.fileno(), dst.fileno()
+    if size is None:
+        size = os.fstat(src_fileno).st_size
+
+    started = time.time()
+    method, copied = copy_with_methods(src_fileno, dst_fileno, size, chunk_size, methods, sparse)
+
+    # the copy bypassed the python buffers of both file objects
+    dst.seek(size)
+    return CopyReport(size, method, copied, time.time() - started)
@@ -116,7 +116,7 @@ class Dummy(Backend):
     def get_current_time(self):
         return time.time()
 
-    def load_info(self, path):
+    def load_info(self, path, st=None):
         """read the info access_policy of an exising file or folder.
 
         :param path: the path to the file
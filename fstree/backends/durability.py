@@ -0,0 +1,154 @@
+"""
+durability policies that decide when written data is flushed to disk
+
+"""
+import os
+import time
+import threading
+
+from weakref import WeakKeyDictionary
+
+
+__all__ = [
+    'DURABILITY_NONE',
+    'DURABILITY_FDATASYNC',
+    'DURABILITY_FSYNC',
+    'DURABILITY_ON_CLOSE',
+    'DURABILITY_GROUP',
+    'DurabilityPolicy',
+]
+
+# leave it to the operating system
+DURABILITY_NONE = 'none'
+# fdatasync after every write
+DURABILITY_FDATASYNC = 'fdatasync'
+# fsync after every write
+DURABILITY_FSYNC = 'fsync'
+# fsync once, when the file is closed
+DURABILITY_ON_CLOSE = 'close'
+# fsync once enough time has passed or bytes were written since the
+# last one, and when the file is closed
+DURABILITY_GROUP = 'group'
+
+DURABILITY_MODES = (
+    DURABILITY_NONE,
+    DURABILITY_FDATASYNC,
+    DURABILITY_FSYNC,
+    DURABILITY_ON_CLOSE,
+    DURABILITY_GROUP,
+)
+
+
+def validate_mode(mode):
+    if mode not in DURABILITY_MODES:
+        raise ValueError('invalid durability mode {0!r}, must be one of: {1}'.format(
+            mode, ', '.join(DURABILITY_MODES)))
+
+    return mode
+
+
+class WriteState(object):
+    __slots__ = ('pending', 'synced_at')
+
+    def __init__(self, synced_at):
+        self.pending = 0
+        self.synced_at = synced_at
+
+
+class DurabilityPolicy(object):
+    """decides when the data written through a backend is synced to disk.
+
+    The policy keeps track of how many bytes were written to each open
+    file-descriptor since its last sync, so that closing a file that
+    was already synced does not sync it again.
+
+    :param mode: one of ``"none"``, ``"fdatasync"``, ``"fsync"`` (default), ``"close"`` or ``"group"``
+    :param interval: for the ``"group"`` mode, the maximum amount of seconds between syncs (default: **1.0**)
+    :param max_bytes: for the ``"group"`` mode, the maximum amount of bytes between syncs (default: **1MB**)
+    :param sync_folders: when `True` (default) also fsync the parent folder of created files and folders, unless the mode is ``"none"``
+    """
+
+    def __init__(self, mode=DURABILITY_FSYNC, interval=1.0, max_bytes=1024 * 1024, sync_folders=True, clock=time.time):
+        self.mode = validate_mode(mode)
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.sync_folders = sync_folders and mode != DURABILITY_NONE
+        self.clock = clock
+        self._states = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return 'DurabilityPolicy(mode={0!r})'.format(self.mode)
+
+    @classmethod
+    def coerce(cls, policy):
+        """
+        :param policy: a :py:class:`DurabilityPolicy`, the name of a mode or `None` for the default policy
+        :returns: a :py:class:`DurabilityPolicy`
+        """
+        if isinstance(policy, cls):
+            return policy
+
+        return cls(policy or DURABILITY_FSYNC)
+
+    def get_state(self, fd):
+        with self._lock:
+            state = self._states.get(fd)
+            if state is None:
+                state = self._states[fd] = WriteState(self.clock())
+
+            return state
+
+    def after_write(self, fd, count, mode=None):
+        """called after ``count`` bytes were written to the file-descriptor
+
+        :param mode: overrides the mode of the policy for this write only
+        :returns: `True` if the file-descriptor was synced
+        """
+        mode = validate_mode(mode or self.mode)
+        state = self.get_state(fd)
+        state.pending += count or 0
+
+        if mode in (DURABILITY_FSYNC, DURABILITY_FDATASYNC):
+            return self.sync(fd, state, mode)
+
+        if mode == DURABILITY_GROUP and self.is_group_due(state):
+            return self.sync(fd, state, mode)
+
+        return False
+
+    def before_close(self, fd):
+        """called before closing the file-descriptor. Files that were
+        not written through this policy are conservatively synced.
+
+        :returns: `True` if the file-descriptor was synced
+        """
+        if self.mode == DURABILITY_NONE or fd.closed or not fd.writable():
+            return False
+
+        with self._lock:
+            state = self._states.pop(fd, None)
+
+        if state is not None and not state.pending:
+            return False
+
+        return self.sync(fd, state)
+
+    def is_group_due(self, state):
+        return (
+            state.pending >= self.max_bytes or
+            self.clock() - state.synced_at >= self.interval
+        )
+
+    def sync(self, fd, state=None, mode=None):
+        fd.flush()
+        if (mode or self.mode) == DURABILITY_FDATASYNC:
+            getattr(os, 'fdatasync', os.fsync)(fd.fileno())
+        else:
+            os.fsync(fd.fileno())
+
+        if state is not None:
+            state.pending = 0
+            state.synced_at = self.clock()
+
+        return True
@@ -0,0 +1,221 @@
+"""
+secure erase engine that overwrites files in large reusable buffers
+
+"""
+import io
+import os
+import time
+
+from fstree.backends import libc
+from fstree.backends.sparse import data_extents
+
+
+__all__ = [
+    'DEFAULT_CHUNK_SIZE',
+    'ERASE_PRESETS',
+    'Eraser',
+    'EraseReport',
+    'zero_fill_fd',
+]
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# each preset is a sequence of passes, named after the byte pattern
+# they write over the whole file.
+ERASE_PRESETS = {
+    'default': ('random', 'zeros'),
+    'random': ('random', ),
+    'zeros': ('zeros', ),
+    # DoD 5220.22-M (E)
+    'dod': ('zeros', 'ones', 'random'),
+}
+
+
+# the byte repeated by the constant patterns, ``None`` means random bytes
+PATTERNS = {
+    'zeros': b'\x00',
+    'ones': b'\xff',
+    'random': None,
+}
+
+
+def open_random_source():
+    """:returns: an unbuffered ``/dev/urandom`` or `None` if not available"""
+    if os.path.exists('/dev/urandom'):
+        return io.open('/dev/urandom', 'rb', buffering=0)
+
+    return None
+
+
+def fill_random(buf, source):
+    if source is None:
+        buf[:] = os.urandom(len(buf))
+    else:
+        source.readinto(buf)
+
+
+def sync_data(fileno):
+    sync = getattr(os, 'fdatasync', os.fsync)
+    sync(fileno)
+
+
+class EraseReport(object):
+    """the result of :py:meth:`Eraser.erase_fd`"""
+
+    def __init__(self, size):
+        self.size = size
+        self.passes = []
+
+    def add_pass(self, pattern, written, elapsed):
+        self.passes.append((pattern, written, elapsed))
+
+    @property
+    def written(self):
+        """`int` how many bytes were written across all passes"""
+        return sum(written for pattern, written, elapsed in self.passes)
+
+    @property
+    def elapsed(self):
+        """`float` how many seconds all the passes took"""
+        return sum(elapsed for pattern, written, elapsed in self.passes)
+
+    @property
+    def throughput(self):
+        """`float` bytes written per second"""
+        if not self.elapsed:
+            return float(self.written)
+
+        return self.written / self.elapsed
+
+    def __repr__(self):
+        return 'EraseReport(size={0}, passes={1}, throughput={2:.0f}B/s)'.format(
+            self.size, len(self.passes), self.throughput)
+
+
+class Eraser(object):
+    """overwrites the whole content of a file once per pass, reusing
+    the same buffer of ``chunk_size`` bytes in every write.
+
+    :param patterns: the name of a preset in :py:data:`ERASE_PRESETS` or a sequence with any of ``"random"``, ``"zeros"`` and ``"ones"``
+    :param chunk_size: how many bytes per write (default: **1MB**)
+    :param sync: when `True` calls ``fdatasync`` at the end of each pass
+    :param rounds: how many times to repeat all the passes (default: **1**)
+    :param kernel: when `True` the ``"zeros"`` passes try ``fallocate(FALLOC_FL_ZERO_RANGE)`` before writing the zeros. Notice that some filesystems implement it by deallocating the range rather than overwriting it.
+    :param skip_holes: when `True` (default) only the data extents of sparse files are overwritten, since their holes have no blocks on disk
+    """
+
+    def __init__(self, patterns='default', chunk_size=DEFAULT_CHUNK_SIZE, sync=True, rounds=1, kernel=True, skip_holes=True):
+        if isinstance(patterns, basestring):
+            patterns = ERASE_PRESETS[patterns]
+
+        unknown = set(patterns).difference(PATTERNS)
+        if unknown:
+            raise ValueError('unknown erase patterns: {0}'.format(', '.join(sorted(unknown))))
+
+        self.patterns = tuple(patterns) * max(rounds or 1, 1)
+        self.chunk_size = chunk_size
+        self.sync = sync
+        self.kernel = kernel
+        self.skip_holes = skip_holes
+
+    def erase_fd(self, fd, size=None):
+        """
+        :param fd: a `~FileDescriptor` open for writing without truncating (e.g.: ``"rb+"``)
+        :param size: how many bytes to overwrite (defaults to the current size of the file)
+        :returns: an :py:class:`EraseReport`
+        """
+        fd.flush()
+        fileno = fd.fileno()
+        if size is None:
+            size = os.fstat(fileno).st_size
+
+        if self.skip_holes:
+            extents = data_extents(fileno, length=size)
+        else:
+            extents = [(0, size)]
+
+        report = EraseReport(size)
+        largest = max([end - start for start, end in extents] or [0])
+        buf = bytearray(min(self.chunk_size, largest))
+
+        for pattern in self.patterns:
+            started = time.time()
+            written = self.run_pass(fd, buf, PATTERNS[pattern], extents)
+            report.add_pass(pattern, written, time.time() - started)
+
+        return report
+
+    def run_pass(self, fd, buf, byte, extents):
+        if byte == PATTERNS['zeros'] and self.kernel and zero_ranges(fd, extents):
+            self.finish_pass(fd)
+            return sum(end - start for start, end in extents)
+
+        source = None
+        if byte is None:
+            source = open_random_source()
+        else:
+            buf[:] = byte * len(buf)
+
+        try:
+            written = self.overwrite(fd, buf, byte, source, extents)
+        finally:
+            if source is not None:
+                source.close()
+
+        return written
+
+    def overwrite(self, fd, buf, byte, source, extents):
+        view = memoryview(buf)
+        written = 0
+        for start, end in extents:
+            fd.seek(start)
+            offset = start
+            while offset < end:
+                if byte is None:
+                    fill_random(buf, source)
+
+                count = min(len(buf), end - offset)
+                fd.write(view[:count])
+                offset += count
+
+            written += end - start
+
+        self.finish_pass(fd)
+        return written
+
+    def finish_pass(self, fd):
+        fd.flush()
+        if self.sync:
+            sync_data(fd.fileno())
+
+
+def zero_ranges(fd, extents):
+    """asks the kernel to zero the given ``(start, end)`` ranges of the
+    file without changing its size.
+
+    :returns: `False` if not supported by the platform or filesystem
+    """
+    fd.flush()
+    mode = libc.FALLOC_FL_ZERO_RANGE | libc.FALLOC_FL_KEEP_SIZE
+    try:
+        for start, end in extents:
+            libc.fallocate(fd.fileno(), mode, start, end - start)
+    except OSError as e:
+        if libc.is_unsupported(e):
+            return False
+        raise
+
+    return True
+
+
+def zero_fill_fd(fd, size, chunk_size=DEFAULT_CHUNK_SIZE):
+    """writes ``size`` null-bytes from the beginning of the file,
+    streaming a single reusable chunk.
+
+    :param fd: a `~FileDescriptor`
+    :param size: how many bytes
+    :param chunk_size: how many bytes per write (default: **1MB**)
+    :returns: `int` how many bytes were written
+    """
+    eraser = Eraser('zeros', chunk_size=chunk_size, sync=False, kernel=False, skip_holes=False)
+    return eraser.erase_fd(fd, size=size).written
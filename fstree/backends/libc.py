@@ -0,0 +1,395 @@
+"""
+thin wrappers around the system calls that python does not expose in
+the ``os`` module of every supported version.
+
+Each wrapper prefers the ``os`` implementation when available and falls
+back to calling the C library through :py:mod:`ctypes`. When neither is
+available an ``OSError`` with ``errno.ENOSYS`` is raised, so that
+callers can detect it with :py:func:`is_unsupported` and fall back to a
+portable implementation.
+"""
+import os
+import errno
+import ctypes
+import ctypes.util
+
+
+__all__ = [
+    'FALLOC_FL_KEEP_SIZE',
+    'FALLOC_FL_PUNCH_HOLE',
+    'FALLOC_FL_ZERO_RANGE',
+    'is_unsupported',
+    'posix_fallocate',
+    'fallocate',
+    'copy_file_range',
+    'sendfile',
+    'pread',
+    'pread_into',
+    'pwrite',
+    'preadv',
+    'pwritev',
+    'posix_fadvise',
+    'readahead',
+]
+
+FALLOC_FL_KEEP_SIZE = 0x01
+FALLOC_FL_PUNCH_HOLE = 0x02
+FALLOC_FL_ZERO_RANGE = 0x10
+
+POSIX_FADV_NORMAL = 0
+POSIX_FADV_RANDOM = 1
+POSIX_FADV_SEQUENTIAL = 2
+POSIX_FADV_WILLNEED = 3
+POSIX_FADV_DONTNEED = 4
+POSIX_FADV_NOREUSE = 5
+
+UNSUPPORTED_ERRNOS = (
+    errno.ENOSYS,
+    errno.EOPNOTSUPP,
+    getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP),
+)
+
+
+def load_libc():
+    try:
+        return ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    except OSError:  # pragma: no cover
+        return None
+
+
+libc = load_libc()
+
+
+def libc_function(names, restype, *argtypes):
+    """
+    :param names: a sequence of symbol names, the first one found is used
+    :returns: a :py:mod:`ctypes` function or `None` if not available
+    """
+    for name in names:
+        func = getattr(libc, name, None)
+        if func is not None:
+            func.restype = restype
+            func.argtypes = argtypes
+            return func
+
+
+def unsupported(name):
+    return OSError(errno.ENOSYS, '{0}() is not supported in this platform'.format(name))
+
+
+def is_unsupported(error):
+    """
+    :param error: an ``OSError`` or ``IOError``
+    :returns: `True` if the error means that the filesystem or platform does not support the call
+    """
+    return getattr(error, 'errno', None) in UNSUPPORTED_ERRNOS
+
+
+def raise_for_errno(result, name):
+    if result < 0:
+        code = ctypes.get_errno()
+        raise OSError(code, '{0}(): {1}'.format(name, os.strerror(code)))
+
+    return result
+
+
+c_posix_fallocate = libc_function(
+    ('posix_fallocate64', 'posix_fallocate'),
+    ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64)
+
+c_fallocate = libc_function(
+    ('fallocate64', 'fallocate'),
+    ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64)
+
+c_copy_file_range = libc_function(
+    ('copy_file_range', ),
+    ctypes.c_ssize_t, ctypes.c_int, ctypes.POINTER(ctypes.c_int64),
+    ctypes.c_int, ctypes.POINTER(ctypes.c_int64), ctypes.c_size_t, ctypes.c_uint)
+
+c_sendfile = libc_function(
+    ('sendfile64', 'sendfile'),
+    ctypes.c_ssize_t, ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.c_int64), ctypes.c_size_t)
+
+c_pread = libc_function(
+    ('pread64', 'pread'),
+    ctypes.c_ssize_t, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int64)
+
+c_pwrite = libc_function(
+    ('pwrite64', 'pwrite'),
+    ctypes.c_ssize_t, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int64)
+
+
+class iovec(ctypes.Structure):
+    _fields_ = [
+        ('iov_base', ctypes.c_void_p),
+        ('iov_len', ctypes.c_size_t),
+    ]
+
+
+c_preadv = libc_function(
+    ('preadv64', 'preadv'),
+    ctypes.c_ssize_t, ctypes.c_int, ctypes.POINTER(iovec), ctypes.c_int, ctypes.c_int64)
+
+c_pwritev = libc_function(
+    ('pwritev64', 'pwritev'),
+    ctypes.c_ssize_t, ctypes.c_int, ctypes.POINTER(iovec), ctypes.c_int, ctypes.c_int64)
+
+c_posix_fadvise = libc_function(
+    ('posix_fadvise64', 'posix_fadvise'),
+    ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64, ctypes.c_int)
+
+c_readahead = libc_function(
+    ('readahead', ),
+    ctypes.c_ssize_t, ctypes.c_int, ctypes.c_int64, ctypes.c_size_t)
+
+
+def offset_pointer(offset):
+    if offset is None:
+        return None
+
+    return ctypes.byref(ctypes.c_int64(offset))
+
+
+def posix_fallocate(fileno, offset, length):
+    """ensures that the disk space for the given range is allocated,
+    growing the file with zeros if needed.
+
+    :param fileno: `int`
+    :param offset: `int`
+    :param length: `int`
+    :raises OSError:
+    """
+    if hasattr(os, 'posix_fallocate'):
+        return os.posix_fallocate(fileno, offset, length)
+
+    if c_posix_fallocate is None:
+        raise unsupported('posix_fallocate')
+
+    # returns the error number rather than setting errno
+    code = c_posix_fallocate(fileno, offset, length)
+    if code != 0:
+        raise OSError(code, 'posix_fallocate(): {0}'.format(os.strerror(code)))
+
+
+def fallocate(fileno, mode, offset, length):
+    """the linux-specific ``fallocate(2)``, which supports the
+    ``FALLOC_FL_*`` flags for zeroing or punching holes in a range.
+
+    :param fileno: `int`
+    :param mode: `int` a combination of ``FALLOC_FL_*`` flags
+    :param offset: `int`
+    :param length: `int`
+    :raises OSError:
+    """
+    if c_fallocate is None:
+        raise unsupported('fallocate')
+
+    raise_for_errno(c_fallocate(fileno, mode, offset, length), 'fallocate')
+
+
+def copy_file_range(src, dst, count, offset_src=None, offset_dst=None):
+    """copies up to ``count`` bytes between two file-descriptors
+    without passing them through user space.
+
+    :param src: `int` the source fileno
+    :param dst: `int` the destination fileno
+    :param count: `int` how many bytes
+    :param offset_src: `int` where to read from, `None` uses and updates the position of ``src``
+    :param offset_dst: `int` where to write to, `None` uses and updates the position of ``dst``
+    :raises OSError:
+    :returns: `int` how many bytes were copied, **0** at the end of ``src``
+    """
+    if hasattr(os, 'copy_file_range'):
+        return os.copy_file_range(src, dst, count, offset_src, offset_dst)
+
+    if c_copy_file_range is None:
+        raise unsupported('copy_file_range')
+
+    result = c_copy_file_range(
+        src, offset_pointer(offset_src), dst, offset_pointer(offset_dst), count, 0)
+    return raise_for_errno(result, 'copy_file_range')
+
+
+def sendfile(dst, src, offset, count):
+    """copies up to ``count`` bytes from ``src`` into the current
+    position of ``dst`` without passing them through user space.
+
+    :param dst: `int` the destination fileno
+    :param src: `int` the source fileno
+    :param offset: `int` where to read from in ``src``
+    :param count: `int` how many bytes
+    :raises OSError:
+    :returns: `int` how many bytes were copied, **0** at the end of ``src``
+    """
+    if hasattr(os, 'sendfile'):
+        return os.sendfile(dst, src, offset, count)
+
+    if c_sendfile is None:
+        raise unsupported('sendfile')
+
+    return raise_for_errno(c_sendfile(dst, src, offset_pointer(offset), count), 'sendfile')
+
+
+def buffer_pointer(data, writable=False):
+    """
+    :param data: a ``bytearray``, or any bytes-like object when not ``writable``
+    :returns: a tuple with an object that must be kept alive while the pointer is used and the address of the first byte
+    """
+    if isinstance(data, bytearray):
+        array = (ctypes.c_char * len(data)).from_buffer(data)
+        return array, ctypes.addressof(array)
+
+    if writable:
+        raise TypeError('expected a bytearray, got {0}'.format(type(data).__name__))
+
+    if isinstance(data, memoryview):
+        # bytes() would return its repr, and memoryviews cannot be
+        # pointed at without a copy in python 2
+        data = data.tobytes()
+    else:
+        data = bytes(data)
+
+    pointer = ctypes.c_char_p(data)
+    return (data, pointer), ctypes.cast(pointer, ctypes.c_void_p).value
+
+
+def iovec_array(buffers, writable=False):
+    keepalive = []
+    vectors = (iovec * len(buffers))()
+    for index, data in enumerate(buffers):
+        alive, address = buffer_pointer(data, writable)
+        keepalive.append(alive)
+        vectors[index].iov_base = address
+        vectors[index].iov_len = len(data)
+
+    return keepalive, vectors
+
+
+def pread_into(fileno, buf, offset, count=None):
+    """reads from the given offset into the beginning of ``buf``
+    without changing the position of the file-descriptor.
+
+    :param fileno: `int`
+    :param buf: a ``bytearray``
+    :param offset: `int` where to read from
+    :param count: `int` how many bytes (defaults to the length of ``buf``)
+    :raises OSError:
+    :returns: `int` how many bytes were read, **0** at the end of the file
+    """
+    if count is None:
+        count = len(buf)
+
+    if c_pread is None:
+        raise unsupported('pread')
+
+    keepalive, address = buffer_pointer(buf, writable=True)
+    return raise_for_errno(c_pread(fileno, address, min(count, len(buf)), offset), 'pread')
+
+
+def pread(fileno, count, offset):
+    """the ``os.pread`` of python 3
+
+    :param fileno: `int`
+    :param count: `int` how many bytes
+    :param offset: `int` where to read from
+    :raises OSError:
+    :returns: `bytes`, shorter than ``count`` at the end of the file
+    """
+    if hasattr(os, 'pread'):
+        return os.pread(fileno, count, offset)
+
+    buf = bytearray(count)
+    return bytes(buf[:pread_into(fileno, buf, offset)])
+
+
+def pwrite(fileno, data, offset):
+    """the ``os.pwrite`` of python 3
+
+    :param fileno: `int`
+    :param data: a bytes-like object
+    :param offset: `int` where to write to
+    :raises OSError:
+    :returns: `int` how many bytes were written
+    """
+    if hasattr(os, 'pwrite'):
+        return os.pwrite(fileno, data, offset)
+
+    if c_pwrite is None:
+        raise unsupported('pwrite')
+
+    keepalive, address = buffer_pointer(data)
+    return raise_for_errno(c_pwrite(fileno, address, len(data), offset), 'pwrite')
+
+
+def preadv(fileno, buffers, offset):
+    """reads from the given offset into many buffers with a single call
+
+    :param fileno: `int`
+    :param buffers: a sequence of ``bytearray``, filled in order
+    :param offset: `int` where to read from
+    :raises OSError:
+    :returns: `int` how many bytes were read in total
+    """
+    if hasattr(os, 'preadv'):
+        return os.preadv(fileno, buffers, offset)
+
+    if c_preadv is None:
+        raise unsupported('preadv')
+
+    keepalive, vectors = iovec_array(buffers, writable=True)
+    return raise_for_errno(c_preadv(fileno, vectors, len(buffers), offset), 'preadv')
+
+
+def pwritev(fileno, buffers, offset):
+    """writes many buffers at the given offset with a single call
+
+    :param fileno: `int`
+    :param buffers: a sequence of bytes-like objects, written in order
+    :param offset: `int` where to write to
+    :raises OSError:
+    :returns: `int` how many bytes were written in total
+    """
+    if hasattr(os, 'pwritev'):
+        return os.pwritev(fileno, buffers, offset)
+
+    if c_pwritev is None:
+        raise unsupported('pwritev')
+
+    keepalive, vectors = iovec_array(buffers)
+    return raise_for_errno(c_pwritev(fileno, vectors, len(buffers), offset), 'pwritev')
+
+
+def posix_fadvise(fileno, offset, length, advice):
+    """tells the kernel how the given range is going to be accessed
+
+    :param fileno: `int`
+    :param offset: `int`
+    :param length: `int`, **0** means until the end of the file
+    :param advice: `int` one of the ``POSIX_FADV_*`` constants
+    :raises OSError:
+    """
+    if hasattr(os, 'posix_fadvise'):
+        return os.posix_fadvise(fileno, offset, length, advice)
+
+    if c_posix_fadvise is None:
+        raise unsupported('posix_fadvise')
+
+    # returns the error number rather than setting errno
+    code = c_posix_fadvise(fileno, offset, length, advice)
+    if code != 0:
+        raise OSError(code, 'posix_fadvise(): {0}'.format(os.strerror(code)))
+
+
+def readahead(fileno, offset, count):
+    """the linux-specific ``readahead(2)``, which loads the given range
+    into the page cache and blocks until it is read.
+
+    :param fileno: `int`
+    :param offset: `int`
+    :param count: `int`
+    :raises OSError:
+    """
+    if c_readahead is None:
+        raise unsupported('readahead')
+
+    raise_for_errno(c_readahead(fileno, offset, count), 'readahead')
@@ -0,0 +1,136 @@
+"""
+pool of open file-descriptors reused across reads of the same files
+
+"""
+import os
+import threading
+
+from collections import OrderedDict
+from weakref import WeakKeyDictionary
+
+
+__all__ = [
+    'FdPool',
+]
+
+
+class FdPool(object):
+    """keeps up to ``max_open`` idle file-descriptors keyed by
+    ``(path, mode)``, closing the least recently used ones beyond that.
+
+    A file-descriptor is leased to a single caller at a time, and goes
+    back to the pool when the backend closes it. Before reusing an idle
+    file-descriptor its ``(st_dev, st_ino)`` is compared with the
+    current ones of the path, so that files replaced in the meantime
+    are opened again.
+
+    It is safe to share the same instance among many backends and threads.
+
+    :param max_open: how many idle file-descriptors to keep (default: **128**)
+    """
+
+    def __init__(self, max_open=128):
+        self.max_open = max_open
+        self.hits = 0
+        self.misses = 0
+        self._idle = OrderedDict()
+        self._leases = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(fds) for fds in self._idle.values())
+
+    def checkout(self, key, identity):
+        """
+        :param key: a ``(path, mode)`` tuple
+        :param identity: the current ``(st_dev, st_ino)`` of the path
+        :returns: an idle `~FileDescriptor` leased to the caller, or `None`
+        """
+        stale = []
+        found = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle and found is None:
+                fd, fd_identity = idle.pop()
+                if fd_identity == identity and not fd.closed:
+                    found = fd
+                else:
+                    stale.append(fd)
+
+            if not idle:
+                self._idle.pop(key, None)
+
+            if found is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._leases[found] = (key, identity)
+
+        close_all(stale)
+        return found
+
+    def lease(self, fd, key, identity):
+        """marks a freshly opened file-descriptor as belonging to the pool"""
+        with self._lock:
+            self._leases[fd] = (key, identity)
+
+    def release(self, fd):
+        """returns a leased file-descriptor to the pool
+
+        :returns: `False` if the file-descriptor does not belong to the pool
+        """
+        evicted = []
+        with self._lock:
+            lease = self._leases.pop(fd, None)
+            if lease is None or fd.closed:
+                return False
+
+            key, identity = lease
+            self._idle.setdefault(key, []).append((fd, identity))
+            # most recently used goes last
+            self._idle[key] = self._idle.pop(key)
+            evicted = self.evict(self.max_open)
+
+        close_all(evicted)
+        return True
+
+    def evict(self, max_open):
+        evicted = []
+        count = sum(len(fds) for fds in self._idle.values())
+        while count > max_open:
+            key, fds = next(self._idle.iteritems())
+            fd, identity = fds.pop(0)
+            evicted.append(fd)
+            count -= 1
+            if not fds:
+                del self._idle[key]
+
+        return evicted
+
+    def discard(self, path, recursive=False):
+        """closes the idle file-descriptors of the given path
+
+        :param path: the path to the file or folder
+        :param recursive: when `True` also closes the ones of every path under it.
+        """
+        prefix = path.rstrip(os.sep) + os.sep
+        discarded = []
+        with self._lock:
+            for key in self._idle.keys():
+                if key[0] == path or (recursive and key[0].startswith(prefix)):
+                    discarded.extend(fd for fd, identity in self._idle.pop(key))
+
+        close_all(discarded)
+
+    def clear(self):
+        """closes every idle file-descriptor"""
+        with self._lock:
+            evicted = self.evict(0)
+
+        close_all(evicted)
+
+
+def close_all(fds):
+    for fd in fds:
+        fd.close()
@@ -2,15 +2,37 @@ from __future__ import unicode_literals
 
 import io
 import os
+import mmap
 import stat
+import errno
 import time
+import operator
 import shutil
 import tempfile
 
 from os.path import join, exists, expanduser, abspath, isdir, isfile, dirname
 
+from fstree.utils import frozendict
+from fstree.workers import parallel_map
+from fstree.workers import DEFAULT_MAX_WORKERS
 from fstree.backends.base import Backend
+from fstree.backends.walker import walk
+from fstree.backends.walker import parallel_walk
+from fstree.backends.cache import NOT_FOUND
+from fstree.backends.durability import DurabilityPolicy
+from fstree.backends.durability import DURABILITY_FSYNC
+from fstree.backends.durability import DURABILITY_NONE
+from fstree.backends import libc
+from fstree.backends.atomic import AtomicBatch
+from fstree.backends.atomic import AtomicWriter
+from fstree.backends.copier import copy_fd
+from fstree.backends.copier import COPY_METHODS
+from fstree.backends.erase import Eraser
+from fstree.backends.sparse import data_extents
+from fstree.backends.erase import zero_fill_fd
+from fstree.backends.erase import DEFAULT_CHUNK_SIZE
 from fstree.models import NodeInfo, AccessPolicy
+from fstree.models import get_creation_time
 
 
 # TODO: https://docs.python.org/2/library/pwd.html
@@ -32,45 +54,165 @@ __all__ = [
 ]
 
 
-def mode_to_bits(mode):
-    bits = map(bool, map(int, bin(mode)[2:]))
-    return bits
+def rwx_bits_to_dict(bits):
+    """
+    :param bits: `int` between ``0`` and ``7`` with the read, write and execute bits
+    :returns: an immutable `dict` with the ``read``, ``write`` and ``execute`` flags
+    """
+    return frozendict({
+        'read': bool(bits & 0o4),
+        'write': bool(bits & 0o2),
+        'execute': bool(bits & 0o1),
+    })
 
 
-def rwx_bits_to_dict(bits):
-    read, write, execute = bits[:3]
-    return {
-        'read': read,
-        'write': write,
-        'execute': execute,
-    }
+def mode_to_dict(mode, triads):
+    return frozendict({
+        'owner': triads[(mode >> 6) & 0o7],
+        'group': triads[(mode >> 3) & 0o7],
+        'everyone': triads[mode & 0o7],
+    })
+
+
+PERMISSION_TRIADS = tuple(rwx_bits_to_dict(bits) for bits in range(0o10))
+
+# every combination of owner, group and everyone permissions, indexed
+# by the permission bits of the mode, so that decoding it is a single
+# lookup that shares the same immutable objects among all nodes.
+PERMISSION_TABLE = tuple(mode_to_dict(mode, PERMISSION_TRIADS) for mode in range(0o1000))
 
 
 class PosixAccessPolicy(AccessPolicy):
 
     @classmethod
     def from_mode(cls, mode):
-        bits = mode_to_bits(mode)
-        owner = bits[:3]
-        group = bits[3:-3]
-        everyone = bits[-3:]
-
-        return {
-            'owner': rwx_bits_to_dict(owner),
-            'group': rwx_bits_to_dict(group),
-            'everyone': rwx_bits_to_dict(everyone),
-        }
+        """
+        :param mode: `int` with the permission bits (e.g.: ``0o644``)
+        :returns: an immutable `dict` with the keys ``owner``, ``group`` and ``everyone``
+        """
+        return PERMISSION_TABLE[mode & 0o777]
 
     @classmethod
     def from_st_mode(cls, st_mode):
-        mode = stat.S_IMODE(st_mode)
-        return cls.from_mode(mode)
+        return PERMISSION_TABLE[st_mode & 0o777]
+
+
+class PosixNodeInfo(NodeInfo):
+    """a :py:class:`~fstree.models.NodeInfo` that decodes its access
+    policy from the ``st_mode`` of the raw stat result"""
+    __slots__ = ()
+
+    def load_access_policy(self):
+        if self._stat is None:
+            return None
+
+        params = PosixAccessPolicy.from_st_mode(self._stat.st_mode)
+        return AccessPolicy(path=self.path, **params)
+
+
+def is_positional(fd, offset):
+    """
+    :returns: `True` if the offset can be read or written with ``pread`` or ``pwrite``
+    """
+    return (
+        isinstance(offset, (int, long)) and offset >= 0 and
+        not isinstance(fd, io.TextIOBase) and
+        'a' not in getattr(fd, 'mode', '')
+    )
+
+
+def iter_pread(fileno, chunk_size, offset, length):
+    """:returns: an iterator of ``bytes`` read with ``pread``, until the end of the file or ``length``"""
+    while length is None or length > 0:
+        chunk = libc.pread(fileno, chunk_size if length is None else min(chunk_size, length), offset)
+        if not chunk:
+            break
+
+        offset += len(chunk)
+        if length is not None:
+            length -= len(chunk)
+
+        yield chunk
+
+
+def iter_pread_into(fileno, buf, offset, length):
+    """same as :py:func:`iter_pread`, but yields ``memoryview`` slices of ``buf``, only valid until the next one"""
+    view = memoryview(buf)
+    while length is None or length > 0:
+        count = libc.pread_into(fileno, buf, offset, len(buf) if length is None else min(len(buf), length))
+        if not count:
+            break
+
+        offset += count
+        if length is not None:
+            length -= count
+
+        yield view[:count]
+
+
+def is_same_file(st, path):
+    """
+    :param st: the stat result of a file
+    :returns: `True` if the path points to that same file
+    """
+    try:
+        other = os.stat(path)
+    except OSError:
+        return False
+
+    return (st.st_dev, st.st_ino) == (other.st_dev, other.st_ino)
+
+
+def check_access_hint(access):
+    """:raises ValueError: if the access hint is not one of :py:data:`ACCESS_HINTS`"""
+    if access not in ACCESS_HINTS:
+        raise ValueError('invalid access hint {0!r}, must be one of: {1}'.format(
+            access, ', '.join(sorted(ACCESS_HINTS))))
+
+
+# the modes of the files that can be kept in the fd pool
+POOLED_MODES = ('rb', )
+
+ACCESS_HINTS = {
+    'normal': libc.POSIX_FADV_NORMAL,
+    'sequential': libc.POSIX_FADV_SEQUENTIAL,
+    'random': libc.POSIX_FADV_RANDOM,
+    'willneed': libc.POSIX_FADV_WILLNEED,
+    'dontneed': libc.POSIX_FADV_DONTNEED,
+    'noreuse': libc.POSIX_FADV_NOREUSE,
+}
+
+MMAP_ACCESS_MODES = {
+    'read': mmap.ACCESS_READ,
+    'write': mmap.ACCESS_WRITE,
+    'copy': mmap.ACCESS_COPY,
+}
+
+stat_getters = {
+    'permissions': lambda st: PosixAccessPolicy.from_st_mode(st.st_mode),
+    'uid': operator.attrgetter('st_uid'),
+    'gid': operator.attrgetter('st_gid'),
+    'size': operator.attrgetter('st_size'),
+    'created_at': get_creation_time,
+    'last_accessed': operator.attrgetter('st_atime'),
+    'last_changed': operator.attrgetter('st_ctime'),
+    'last_modified': operator.attrgetter('st_mtime'),
+}
 
 
 class Posix(Backend):
 
-    def __init__(self, root_path='/'):
+    def __init__(self, root_path='/', cache=None, durability=None, fd_pool=None):
+        """
+        :param root_path: (default: ``'/'``)
+        :param cache: an optional :py:class:`~fstree.backends.cache.MetadataCache`, which can be shared among many backend instances.
+        :param durability: a :py:class:`~fstree.backends.durability.DurabilityPolicy` or the name of its mode (default: ``"fsync"``)
+        :param fd_pool: an optional :py:class:`~fstree.backends.pool.FdPool` that keeps the files opened with ``mode="rb"`` open after :py:meth:`close_fd`, so that the next reads reuse them.
+        """
         self.__root_path = root_path
+        self.cache = cache
+        self.durability = DurabilityPolicy.coerce(durability)
+        self.fd_pool = fd_pool
 
     @classmethod
     def supports_path(cls, path):
@@ -79,28 +221,70 @@ class Posix(Backend):
     def get_root_path(self):
         return self.__root_path
 
-    def stat(self, path, key=None):
-        st = os.stat(path)
-        raw = dict([(attr, getattr(st, attr))
-                    for attr in dir(st) if attr.startswith('st_')])
-        data = {
-            'permissions': PosixAccessPolicy.from_st_mode(st.st_mode),
-            'uid': raw['st_uid'],
-            'gid': raw['st_gid'],
-            'size': raw['st_size'],
-            'created_at': raw['st_birthtime'],
-            'last_accessed': raw['st_atime'],
-            'last_changed': raw['st_ctime'],
-            'last_modified': raw['st_mtime'],
-        }
+    def stat_path(self, path, follow_symlinks=True):
+        """performs a single ``os.stat`` call, or ``os.lstat`` when
+        ``follow_symlinks=False``
+
+        :param path: the path to the file or folder
+        :param follow_symlinks: `bool` (default: `True`)
+        :raises OSError: if the path does not exist
+        :returns: a :py:class:`posix.stat_result`
+        """
+        if not follow_symlinks:
+            return os.lstat(path)
+
+        if self.cache is None:
+            return os.stat(path)
+
+        return self.stat_path_through_cache(path)
+
+    def stat_path_through_cache(self, path):
+        # the same file or folder is cached once, however it was named
+        path = expand_path(path)
+        st = self.cache.get(path)
+        if st is NOT_FOUND:
+            raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+
+        if st is not None:
+            return st
+
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            if e.errno in (errno.ENOENT, errno.ENOTDIR):
+                self.cache.put(path, NOT_FOUND)
+            raise
+
+        self.cache.put(path, st)
+        return st
+
+    def lookup_stat(self, path):
+        """
+        :param path: the path to the file or folder
+        :returns: a :py:class:`posix.stat_result` or `None` if the path does not exist
+        """
+        try:
+            return self.stat_path(path)
+        except OSError:
+            return None
+
+    def stat(self, path, key=None, st=None):
+        """
+        :param path: the path to the file or folder
+        :param key: return only the value of this key
+        :param st: an existing :py:class:`posix.stat_result` that spares a new ``os.stat`` call
+        :returns: `dict` or the value of the given ``key``
+        """
+        if st is None:
+            st = self.stat_path(path)
 
         if key:
-            return data[key]
+            return stat_getters[key](st)
 
-        return data
+        return dict([(name, get(st)) for name, get in stat_getters.iteritems()])
 
     def get_file_size(self, path):
-        return self.stat(path, 'size')
+        return self.stat_path(path).st_size
 
     # def get_base_path(self, path):
     #     return os.path.split(path)[0]
@@ -141,7 +325,20 @@ class Posix(Backend):
         :param path: the path to be created
         :return: `True` if succeeded
         """
+        # every missing folder up to the first one that exists
+        created = []
+        folder = expand_path(path)
+        while not exists(folder) and folder not in created:
+            created.append(folder)
+            folder = dirname(folder)
+
         os.makedirs(path)
+        for folder in created:
+            # each one is a new entry of its parent, the last one of
+            # the folder that existed before
+            self.invalidate_cache(folder)
+            self.sync_parent(folder)
+
         return True
 
     def get_temp_folder(self, name):
@@ -156,11 +353,117 @@ class Posix(Backend):
             return False
 
         os.unlink(path)
+        self.invalidate_cache(path)
         return True
 
     def open_fd(self, path, mode='wb+', *args, **kw):
-        """:returns: a `~FileDescriptor`"""
-        return io.open(path, mode, *args, **kw)
+        """
+        :param path: the path to the file
+        :param mode: (default: ``"wb+"``)
+        :param access: an optional hint of how the file is going to be read, see :py:meth:`advise_fd`
+        :raises ValueError: if the access hint is not valid
+        :returns: a `~FileDescriptor`
+        """
+        access = kw.pop('access', None)
+        if access is not None:
+            # before opening, so that the file-descriptor is not leaked
+            check_access_hint(access)
+
+        fd = None
+        if self.fd_pool is not None and mode in POOLED_MODES and not args and not kw:
+            fd = self.open_pooled_fd(path, mode)
+
+        if fd is None:
+            fd = io.open(path, mode, *args, **kw)
+
+        if fd.writable():
+            self.invalidate_cache(path)
+
+        if access is not None:
+            self.advise_fd(fd, access)
+
+        return fd
+
+    def open_pooled_fd(self, path, mode):
+        """
+        :returns: an unbuffered `~FileDescriptor` leased from the pool, or `None` if the path cannot be stat'ed
+        """
+        try:
+            st = self.stat_path(path)
+        except OSError:
+            # let io.open raise the usual IOError
+            return None
+
+        key = (expand_path(path), mode)
+        identity = (st.st_dev, st.st_ino)
+        fd = self.fd_pool.checkout(key, identity)
+        if fd is not None:
+            fd.seek(0)
+            return fd
+
+        # unbuffered, so that no stale bytes are kept between leases
+        fd = io.open(path, mode, buffering=0)
+        self.fd_pool.lease(fd, key, identity)
+        return fd
+
+    def invalidate_cache(self, path, recursive=False):
+        path = expand_path(path)
+        super(Posix, self).invalidate_cache(path, recursive)
+        if self.fd_pool is not None:
+            self.fd_pool.discard(path, recursive)
+
+    def advise_fd(self, fd, access, offset=0, length=0):
+        """tells the kernel how the given range of the file is going to
+        be accessed, through ``posix_fadvise``. It is only a hint, so
+        it is silently ignored where not supported.
+
+        - ``"sequential"``: read from start to end, with an aggressive readahead
+        - ``"random"``: read at random offsets, without readahead
+        - ``"willneed"``: start loading the range into the page cache
+        - ``"dontneed"``: drop the range from the page cache
+        - ``"noreuse"``: read only once
+        - ``"normal"``: the default behavior
+
+        :param fd: a `~FileDescriptor`
+        :param access: one of the hints above
+        :param offset: where the range starts (default: **0**)
+        :param length: the size of the range (default: **0**, until the end of the file)
+        :returns: `True` if the hint was given to the kernel
+        """
+        check_access_hint(access)
+        try:
+            libc.posix_fadvise(fd.fileno(), offset, length, ACCESS_HINTS[access])
+        except OSError as e:
+            if libc.is_unsupported(e):
+                return False
+            raise
+
+        return True
+
+    def readahead_fd(self, fd, offset=0, length=None):
+        """loads the given range into the page cache through
+        ``readahead``, blocking until it is read, or hints it with
+        :py:meth:`advise_fd` where not supported.
+
+        :param fd: a `~FileDescriptor`
+        :param offset: where the range starts (default: **0**)
+        :param length: the size of the range (defaults to ``None``: until the end of the file)
+        """
+        if length is None:
+            length = max(os.fstat(fd.fileno()).st_size - offset, 0)
+
+        try:
+            libc.readahead(fd.fileno(), offset, length)
+        except OSError as e:
+            if not libc.is_unsupported(e):
+                raise
+
+            self.advise_fd(fd, 'willneed', offset, length)
+
+    def invalidate_fd(self, fd):
+        name = getattr(fd, 'name', None)
+        if isinstance(name, basestring):
+            self.invalidate_cache(name)
 
     def sync_fd(self, fd):
         """flushes the file-destriptor then forces an ``os.fsync`` on its _``_fileno``_
@@ -172,6 +475,15 @@ class Posix(Backend):
         os.fsync(fd.fileno())
         return True
 
+    def stat_fd(self, fd):
+        """flushes the file-descriptor then calls ``os.fstat`` on it
+
+        :param fd: a `~FileDescriptor`
+        :returns: a :py:class:`posix.stat_result`
+        """
+        fd.flush()
+        return os.fstat(fd.fileno())
+
     def seek_fd(self, fd, position):
         """
         :param fd: a `
@@ -189,80 +501,390 @@ class Posix(Backend):
         fd.seek(position, *args)
         return fd.tell()
 
-    def write_fd(self, fd, data, offset=None, sync=True):
+    def sync_folder(self, path):
+        """forces an ``os.fsync`` on a folder, so that the creation,
+        renaming or deletion of its children is durable.
+
+        :param path: the path to the folder
+        :returns: `True`
+        """
+        fileno = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fileno)
+        finally:
+            os.close(fileno)
+
+        return True
+
+    def sync_parent(self, path, durability=None):
+        """calls :py:meth:`sync_folder` on the parent folder of the
+        given path if the durability policy asks for it.
+
+        :param path: the path to a file or folder that was just created
+        :param durability: overrides the durability mode for this call only
+        :returns: `True` if the parent folder was synced
+        """
+        if durability == DURABILITY_NONE or not self.durability.sync_folders:
+            return False
+
+        return self.sync_folder(dirname(abspath(path)))
+
+    def atomic_writer(self, path, mode='wb', batch=None):
+        """
+        :param path: the path to the file that is replaced
+        :param mode: the mode of the temporary file (default: ``"wb"``)
+        :param batch: an optional :py:class:`~fstree.backends.atomic.AtomicBatch`
+        :returns: an :py:class:`~fstree.backends.atomic.AtomicWriter`
+        """
+        return AtomicWriter(self, path, mode, batch)
+
+    def atomic_batch(self, max_workers=DEFAULT_MAX_WORKERS):
+        """:returns: an :py:class:`~fstree.backends.atomic.AtomicBatch`"""
+        return AtomicBatch(self, max_workers)
+
+    def write_fd(self, fd, data, offset=None, sync=None, durability=None):
         """writes bytes in the given file-destriptor
 
+        When ``offset`` is a positive `int` the bytes are written with
+        ``pwrite``, which does not change the position of the
+        file-descriptor and can be called from many threads at once.
+
         :param fd: a `~FileDescriptor`
+        :param offset: where to write to, `None` and negative offsets seek before writing
+        :param sync: `True` forces an fsync and `False` skips it, regardless of the durability policy
+        :param durability: overrides the durability mode for this call only
         :returns: `int` - how many bytes were written
         """
-        self.seek_fd(fd, offset)
+        if is_positional(fd, offset):
+            fd.flush()
+            count = libc.pwrite(fd.fileno(), data, offset)
+        else:
+            self.seek_fd(fd, offset)
+            count = fd.write(data)
+
+        return self.finish_write_fd(fd, count, sync, durability)
+
+    def writev_fd(self, fd, buffers, offset=0, sync=None, durability=None):
+        """writes many buffers at the given offset with a single ``pwritev``
 
-        count = fd.write(data)
-        if sync:
-            self.sync_fd(fd)
+        :param fd: a binary `~FileDescriptor`
+        :param buffers: a sequence of bytes-like objects, written in order
+        :param offset: where to write to (default: **0**)
+        :returns: `int` - how many bytes were written
+        """
+        fd.flush()
+        count = libc.pwritev(fd.fileno(), buffers, offset)
+        return self.finish_write_fd(fd, count, sync, durability)
 
+    def finish_write_fd(self, fd, count, sync, durability):
+        if sync is not None:
+            durability = sync and DURABILITY_FSYNC or DURABILITY_NONE
+
+        self.durability.after_write(fd, count, durability)
+        self.invalidate_fd(fd)
         return count
 
     def read_fd(self, fd, count=None, offset=None):
         """read bytes from the file-destriptor
+
+        When both ``count`` and a positive ``offset`` are given the
+        bytes are read with ``pread``, which does not change the
+        position of the file-descriptor and can be called from many
+        threads at once.
+
         :param fd: the file-descriptor instance
         :param count: how many bytes to read (defaults to ``None``: read all bytes)
         :param offset: skip this many bytes
         :returns: ``bytes`` if mode contains **b**, ``unicode`` otherwise
         """
+        if count is not None and is_positional(fd, offset):
+            if fd.writable():
+                # buffered writes would not be seen by pread
+                fd.flush()
+
+            return libc.pread(fd.fileno(), count, offset)
+
         self.seek_fd(fd, offset)
 
         return fd.read(count)
 
-    def erase_fd(self, fd, rounds=1):
-        """erases a file by performing the 2 steps below repeatedly by
-        indicated number of _rounds_:
+    def readinto_fd(self, fd, buf, offset=None):
+        """fills the given buffer, reusing it rather than allocating
+        new bytes.
+
+        :param fd: a binary `~FileDescriptor`
+        :param buf: a ``bytearray``
+        :param offset: where to read from with ``pread``, `None` reads from the current position
+        :returns: `int` - how many bytes were read, **0** at the end of the file
+        """
+        if is_positional(fd, offset):
+            if fd.writable():
+                fd.flush()
+
+            return libc.pread_into(fd.fileno(), buf, offset)
+
+        return fd.readinto(buf)
+
+    def iter_fd(self, fd, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None, buf=None, drop_cache=False):
+        """streams the content of the file-descriptor in chunks read
+        with ``pread``, so that memory usage does not depend on the
+        size of the file and the position of the file-descriptor does
+        not change.
+
+        :param fd: a binary `~FileDescriptor`
+        :param chunk_size: how many bytes per chunk (default: **1MB**)
+        :param offset: where to start reading (default: **0**)
+        :param length: how many bytes to read (defaults to ``None``: until the end of the file)
+        :param buf: an optional ``bytearray`` reused by every read, whose length overrides ``chunk_size``. The chunks are then ``memoryview`` slices of it, only valid until the next one is yielded.
+        :param drop_cache: when `True` drops each chunk from the page cache once read, so that reading the file once does not evict other files from it
+        :returns: an iterator of ``bytes``, or ``memoryview`` when ``buf`` is given
+        """
+        if fd.writable():
+            fd.flush()
+
+        if buf is None:
+            chunks = iter_pread(fd.fileno(), chunk_size, offset, length)
+        else:
+            chunks = iter_pread_into(fd.fileno(), buf, offset, length)
+
+        for chunk in chunks:
+            if drop_cache:
+                self.advise_fd(fd, 'dontneed', offset, len(chunk))
+
+            offset += len(chunk)
+            yield chunk
+
+    def readv_fd(self, fd, buffers, offset=0):
+        """fills many buffers from the given offset with a single
+        ``preadv``, without changing the position of the file-descriptor.
+
+        :param fd: a binary `~FileDescriptor`
+        :param buffers: a sequence of ``bytearray``, filled in order
+        :param offset: where to read from (default: **0**)
+        :returns: `int` - how many bytes were read
+        """
+        if fd.writable():
+            fd.flush()
+
+        return libc.preadv(fd.fileno(), buffers, offset)
+
+    def mmap_fd(self, fd, access='read', length=0, offset=0):
+        """maps the file-destriptor into memory, so that its bytes are
+        read straight from the page cache. The mapping remains valid
+        after the file-descriptor is closed.
+
+        :param fd: a `~FileDescriptor`, which must be writable for ``access="write"``
+        :param access: one of ``"read"`` (default), ``"write"`` or ``"copy"`` (copy-on-write, changes are not written to the file)
+        :param length: how many bytes to map (default: **0**, the whole file)
+        :param offset: where the mapping starts, must be a multiple of ``mmap.ALLOCATIONGRANULARITY``
+        :raises ValueError: if the file is empty
+        :returns: an ``mmap.mmap``
+        """
+        if access not in MMAP_ACCESS_MODES:
+            raise ValueError('invalid mmap access {0!r}, must be one of: {1}'.format(
+                access, ', '.join(sorted(MMAP_ACCESS_MODES))))
+
+        if fd.writable():
+            fd.flush()
+
+        return mmap.mmap(fd.fileno(), length, access=MMAP_ACCESS_MODES[access], offset=offset)
+
+    def erase_fd(self, fd, rounds=1, patterns='default', chunk_size=DEFAULT_CHUNK_SIZE):
+        """erases a file by overwriting all of its bytes once per pass,
+        repeatedly by the indicated number of _rounds_.
+
+        The default passes are:
 
         - replace each of its bytes with random bytes
-        - replace each of its bytes with
+        - replace each of its bytes with a null-byte ``\\0``
 
-        :param fd: a `~FileDescriptor`
-        :param rounds: repeat the steps mentioned above. Must be a positive `int` (default: **1**)
-        :returns: `True`
+        :param fd: a `~FileDescriptor` open for writing without truncating (e.g.: ``"rb+"``)
+        :param rounds: repeat the passes mentioned above. Must be a positive `int` (default: **1**)
+        :param patterns: the name of a preset in :py:data:`~fstree.backends.erase.ERASE_PRESETS` or a sequence of pass patterns
+        :param chunk_size: how many bytes per write (default: **1MB**)
+        :returns: an :py:class:`~fstree.backends.erase.EraseReport` with the throughput of each pass
+        """
+        eraser = Eraser(patterns, chunk_size=chunk_size, rounds=rounds)
+        report = eraser.erase_fd(fd)
+        self.invalidate_fd(fd)
+        return report
+
+    def allocate_fd(self, fd, size, chunk_size=DEFAULT_CHUNK_SIZE):
+        """grows the file to ``size`` null-bytes, through
+        ``posix_fallocate`` where supported, otherwise streaming
+        zeros in chunks so that memory usage does not depend on ``size``.
+
+        :param fd: a `~FileDescriptor` of an empty file open for writing
+        :param size: the new size in bytes
+        :param chunk_size: how many bytes per write in the fallback (default: **1MB**)
+        :returns: `int` - the new size
+        """
+        fd.flush()
+        try:
+            libc.posix_fallocate(fd.fileno(), 0, size)
+        except OSError as e:
+            if not libc.is_unsupported(e):
+                raise
+
+            zero_fill_fd(fd, size, chunk_size)
+
+        self.invalidate_fd(fd)
+        return size
+
+    def copy_fd(self, src, dst, chunk_size=DEFAULT_CHUNK_SIZE, methods=COPY_METHODS, sparse=True):
+        """copies the content of a file-descriptor into another one,
+        trying a reflink, ``copy_file_range`` and ``sendfile`` before
+        falling back to copying in chunks.
+
+        :param src: a `~FileDescriptor` open for reading
+        :param dst: a `~FileDescriptor` of an empty file open for writing
+        :param chunk_size: how many bytes per write in the fallback (default: **1MB**)
+        :param methods: which methods of :py:data:`~fstree.backends.copier.COPY_METHODS` to try, in order
+        :param sparse: when `True` (default) the holes of sparse files are preserved rather than copied as null-bytes
+        :returns: a :py:class:`~fstree.backends.copier.CopyReport`
+        """
+        report = copy_fd(src, dst, chunk_size=chunk_size, methods=methods, sparse=sparse)
+        self.invalidate_fd(dst)
+        return report
+
+    def copy_file(self, source, destination, preserve_metadata=False, durability=None, **kw):
+        """copies a file through :py:meth:`copy_fd`
+
+        :param source: the path to the file
+        :param destination: the path to the copy, which is replaced if it exists
+        :param preserve_metadata: when `True` also copies the permission bits and times of the file
+        :param durability: overrides the durability mode when syncing the parent folder
+        :raises ValueError: if the destination is the source itself, which would be truncated
+        :returns: a :py:class:`~fstree.backends.copier.CopyReport`
+        """
+        # closed through close_fd, so that pooled ones go back to the pool
+        src = self.open_fd(source, 'rb', access='sequential')
+        try:
+            if is_same_file(os.fstat(src.fileno()), destination):
+                raise ValueError('cannot copy {0} onto itself: {1}'.format(source, destination))
+
+            dst = self.open_fd(destination, 'wb')
+            try:
+                report = self.copy_fd(src, dst, **kw)
+            finally:
+                self.close_fd(dst)
+        finally:
+            self.close_fd(src)
+
+        if preserve_metadata:
+            shutil.copystat(source, destination)
+            self.invalidate_cache(destination)
+
+        self.sync_parent(destination, durability)
+        return report
+
+    def copy_folder(self, source, destination, preserve_metadata=False, **kw):
+        """copies a folder recursively, with :py:meth:`copy_file` for
+        each regular file. Symlinks are copied as symlinks and other
+        special files are skipped.
+
+        :param source: the path to the folder
+        :param destination: the path to the copy, which must not exist
+        :param preserve_metadata: when `True` also copies the permission bits and times of every file and folder
+        :returns: `int` - how many bytes were copied
+        """
+        source = expand_path(source)
+        destination = expand_path(destination)
+        self.create_folder(destination)
+
+        folders = [(source, destination)]
+        copied = 0
+        for entry in self.iter_entries(source):
+            target = join(destination, os.path.relpath(entry.path, source))
+            copied += self.copy_entry(entry, target, folders, preserve_metadata, **kw)
+
+        for path, target in reversed(folders):
+            self.finish_copied_folder(path, target, preserve_metadata)
+
+        self.invalidate_cache(destination, recursive=True)
+        return copied
 
+    def copy_entry(self, entry, target, folders, preserve_metadata, **kw):
+        """copies a single entry of :py:meth:`copy_folder`, appending
+        the folders to ``folders`` so that they are finished once their
+        content is copied.
+
+        :returns: `int` - how many bytes were copied
+        """
+        if entry.is_symlink():
+            os.symlink(os.readlink(entry.path), target)
+        elif entry.is_folder():
+            os.mkdir(target)
+            folders.append((entry.path, target))
+        elif entry.is_file():
+            # the folders are synced once at the end
+            return self.copy_file(entry.path, target, preserve_metadata, DURABILITY_NONE, **kw).copied
+
+        return 0
+
+    def finish_copied_folder(self, path, target, preserve_metadata):
+        if preserve_metadata:
+            # after the contents, which would change the times of the folders
+            shutil.copystat(path, target)
+
+        if self.durability.sync_folders:
+            self.sync_folder(target)
+
+    def truncate_fd(self, fd, size):
+        """changes the size of the file through ``ftruncate``, growing
+        it with a hole that takes no space on disk.
+
+        :param fd: a `~FileDescriptor` open for writing
+        :param size: the new size in bytes
+        :returns: `int` - the new size
         """
-        rounds = rounds or 1
-        for level in range(rounds):
-            self.scrub_fd(fd)
-            self.void_fd(fd)
+        fd.flush()
+        os.ftruncate(fd.fileno(), size)
+        self.invalidate_fd(fd)
+        return size
 
-        return True
+    def iter_data_extents_fd(self, fd, offset=0, length=None):
+        """
+        :param fd: a `~FileDescriptor`
+        :param offset: where to start looking (default: **0**)
+        :param length: how many bytes to look at (defaults to ``None``: until the end of the file)
+        :returns: an iterator of ``(start, end)`` ranges that hold data, skipping the holes of sparse files
+        """
+        if fd.writable():
+            fd.flush()
+
+        return iter(data_extents(fd.fileno(), offset, length))
 
     def void_fd(self, fd):
         """replace every byte of the file-destriptor with a null-byte ``\\0``
 
         :param fd: a `~FileDescriptor`
-        :returns: `True`
+        :returns: an :py:class:`~fstree.backends.erase.EraseReport`
         """
-        size = self.get_file_size(fd.name)
-        fd.seek(size)
-        fd.write('\0')
-        self.sync_fd(fd)
+        return self.erase_fd(fd, patterns='zeros')
 
     def scrub_fd(self, fd):
-        """replace every byte of the file-destriptor with a random byte from :py:func``os.urandom(1)``
+        """replace every byte of the file-destriptor with random bytes
 
         :param fd: a `~FileDescriptor`
-        :returns: `True`
+        :returns: an :py:class:`~fstree.backends.erase.EraseReport`
         """
-        for position in range(self.get_file_size(fd.name)):
-            fd.seek(position)
-            fd.write(os.urandom(1))
-
-        self.sync_fd(fd)
+        return self.erase_fd(fd, patterns='random')
 
     def close_fd(self, fd):
-        """closes the file-destriptor
+        """closes the file-destriptor, syncing it first if the durability
+        policy asks for it. File-descriptors leased from the
+        :py:class:`~fstree.backends.pool.FdPool` go back to it instead.
+
         :param fd: a `~FileDescriptor`
         :returns: `True`
         """
-        self.sync_fd(fd)
+        if self.fd_pool is not None and self.fd_pool.release(fd):
+            return True
+
+        self.durability.before_close(fd)
         fd.close()
+        self.invalidate_fd(fd)
         return True
 
     def write_to_file(self, path, data, mode='wb'):
@@ -302,6 +924,7 @@ class Posix(Backend):
             return False
 
         shutil.rmtree(path)
+        self.invalidate_cache(path, recursive=True)
         return True
 
     def delete(self, path, recursive=True):
@@ -323,7 +946,7 @@ class Posix(Backend):
         :raises IOError: if the given ``path`` is not accessible
         :returns: boolean
         """
-        return exists(path)
+        return self.lookup_stat(expand_path(path)) is not None
 
     def is_file(self, path):
         """checks if a path exists and is a file
@@ -331,7 +954,8 @@ class Posix(Backend):
         :raises IOError: if the given ``path`` is not accessible
         :returns: boolean
         """
-        return exists_and_is_file(path)
+        st = self.lookup_stat(expand_path(path))
+        return st is not None and stat.S_ISREG(st.st_mode)
 
     def is_folder(self, path):
         """checks if a path exists and is a folder
@@ -339,7 +963,8 @@ class Posix(Backend):
         :raises IOError: if the given ``path`` is not accessible
         :returns: boolean
         """
-        return exists_and_is_folder(path)
+        st = self.lookup_stat(expand_path(path))
+        return st is not None and stat.S_ISDIR(st.st_mode)
 
     def get_metadata(self, key):
         return os.getenv(key)
@@ -359,40 +984,81 @@ class Posix(Backend):
     def get_default_access_policy(self):
         default = os.umask(0)
         os.umask(default)
-        return AccessPolicy(**PosixAccessPolicy.from_mode(default ^ 0777))
-
-    def load_info(self, path):
-        return NodeInfo(
-            uid=self.get_uid(),
-            gid=self.get_gid(),
-            size=self.get_file_size(path),
-            created_at=self.get_current_time(),
-            last_changed=self.get_current_time(),
-            last_modified=self.get_current_time(),
-            last_accessed=self.get_current_time(),
-            access_policy=self.load_access_policy(path),
-            path=path,
-        )
+        return AccessPolicy(**PosixAccessPolicy.from_mode(default ^ 0o777))
+
+    def load_info(self, path, st=None, follow_symlinks=True):
+        """builds a :py:class:`~fstree.models.NodeInfo` out of a single
+        ``os.stat`` call
+
+        :param path: the path to the file or folder.
+        :param st: an existing :py:class:`posix.stat_result`, when given no syscall is made at all
+        :param follow_symlinks: when `False` uses ``os.lstat`` (ignored if ``st`` is given)
+        :returns: a :py:class:`~fstree.models.NodeInfo`
+        """
+        if st is None:
+            st = self.stat_path(path, follow_symlinks)
+        elif self.cache is not None and follow_symlinks:
+            self.cache.put(expand_path(path), st)
+
+        return PosixNodeInfo.from_stat(path, st)
+
+    def stat_many(self, paths, max_workers=DEFAULT_MAX_WORKERS, ordered=True):
+        """calls :py:meth:`stat` for each of the given paths in a bounded
+        pool of threads, so that the latency of many stat calls overlap.
+
+        :param paths: an iterable of paths
+        :param max_workers: how many threads (default: **16**)
+        :param ordered: when `False` results are streamed as soon as they complete
+        :raises OSError: as soon as the result of a path that could not be stat'ed is reached
+        :returns: an iterator of ``(path, dict)``
+        """
+        return parallel_map(self.stat, paths, max_workers, ordered)
+
+    def load_info_many(self, paths, max_workers=DEFAULT_MAX_WORKERS, ordered=True):
+        """calls :py:meth:`load_info` for each of the given paths in a bounded
+        pool of threads, so that the latency of many stat calls overlap.
+
+        :param paths: an iterable of paths
+        :param max_workers: how many threads (default: **16**)
+        :param ordered: when `False` results are streamed as soon as they complete
+        :raises OSError: as soon as the result of a path that could not be stat'ed is reached
+        :returns: an iterator of ``(path, NodeInfo)``
+        """
+        return parallel_map(self.load_info, paths, max_workers, ordered)
 
     def set_default_access_policy(self, access_policy):
         """newly created files and folders will receive those access_policy"""
         # in unix this sets os.umask
         pass
 
-    def load_access_policy(self, path):
+    def load_access_policy(self, path, st=None):
         """read the access_policy of an exising path.
 
         :param path: the path to the file or folder.
+        :param st: an existing :py:class:`posix.stat_result` (optional)
         :returns: a :py:class:`~fstree.models.AccessPolicy`.
         """
-        params = self.stat(path, 'permissions')
-        params['path'] = path
-        return AccessPolicy(**params)
+        params = self.stat(path, 'permissions', st=st)
+        return AccessPolicy(path=path, **params)
+
+    def iter_entries(self, path, max_workers=None, **kw):
+        """traverses a folder recursively with a single listing per
+        folder and without expanding the path of every entry.
+
+        :param path: the path to the folder
+        :param max_workers: when given, lists that many folders at once with :py:func:`~fstree.backends.walker.parallel_walk`, which also accepts ``ordered``, ``backlog`` and ``processes``
+        :param kw: passed to the walker, e.g.: ``onerror`` and ``descend``
+        :returns: an iterator of :py:class:`~fstree.backends.walker.Entry`
+        """
+        if max_workers:
+            return parallel_walk(self.expand_path(path), max_workers, **kw)
+
+        return walk(self.expand_path(path), **kw)
 
     def iter_files(self, path):
-        for root, dirs, files in os.walk(path):
-            for name in files:
-                yield self.expand_path(root, name)
+        for entry in self.iter_entries(path):
+            if not entry.is_folder():
+                yield entry.path
 
 
 def expand_path(*path):
@@ -0,0 +1,74 @@
+"""
+detection of the holes of sparse files through ``SEEK_DATA`` and
+``SEEK_HOLE``
+
+"""
+import os
+import errno
+
+from fstree.backends import libc
+
+
+__all__ = [
+    'SEEK_DATA',
+    'SEEK_HOLE',
+    'data_extents',
+]
+
+SEEK_DATA = getattr(os, 'SEEK_DATA', 3)
+SEEK_HOLE = getattr(os, 'SEEK_HOLE', 4)
+
+
+def data_extents(fileno, offset=0, length=None):
+    """finds the ranges of the file that hold data, skipping its holes.
+    Where ``SEEK_DATA`` is not supported the whole range is returned as
+    a single extent.
+
+    The position of the file-descriptor is restored before returning.
+
+    :param fileno: `int`
+    :param offset: where to start looking (default: **0**)
+    :param length: how many bytes to look at (defaults to ``None``: until the end of the file)
+    :returns: a `list` of ``(start, end)`` tuples, sorted by offset
+    """
+    size = os.fstat(fileno).st_size
+    end = size if length is None else min(size, offset + length)
+
+    saved = os.lseek(fileno, 0, os.SEEK_CUR)
+    try:
+        return list(seek_extents(fileno, offset, end))
+    finally:
+        os.lseek(fileno, saved, os.SEEK_SET)
+
+
+def seek_data(fileno, position, end):
+    """
+    :returns: the offset where the next data starts, ``end`` if there is
+              none or `None` if ``SEEK_DATA`` is not supported
+    """
+    try:
+        return os.lseek(fileno, position, SEEK_DATA)
+    except OSError as e:
+        if e.errno == errno.ENXIO:
+            # only holes left
+            return end
+
+        if e.errno == errno.EINVAL or libc.is_unsupported(e):
+            return None
+
+        raise
+
+
+def seek_extents(fileno, position, end):
+    while position < end:
+        start = seek_data(fileno, position, end)
+        if start is None:
+            yield position, end
+            return
+
+        if start >= end:
+            return
+
+        stop = min(os.lseek(fileno, start, SEEK_HOLE), end)
+        yield start, stop
+        position = stop
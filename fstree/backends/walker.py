@@ -0,0 +1,331 @@
+"""
+directory traversal engine for the posix-like backends.
+
+Uses ``os.scandir`` (or the `scandir <https://pypi.python.org/pypi/scandir>`_
+backport when running in older pythons) so that the file type of each
+entry comes straight from the directory listing, and the stat data is
+loaded at most once per entry and then reused when building nodes.
+"""
+import os
+import stat
+
+from Queue import Queue
+from collections import deque
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+from os.path import join
+
+from fstree.node import types
+from fstree.workers import DEFAULT_MAX_WORKERS
+
+try:
+    from os import scandir
+except ImportError:  # pragma: no cover
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+
+__all__ = [
+    'Entry',
+    'scan_folder',
+    'walk',
+    'parallel_walk',
+    'filetype_from_mode',
+]
+
+
+FILE_TYPES_BY_FORMAT = {
+    stat.S_IFREG: types.FileType,
+    stat.S_IFDIR: types.FolderType,
+    stat.S_IFLNK: types.SymlinkType,
+    stat.S_IFCHR: types.DeviceType,
+    stat.S_IFBLK: types.DeviceType,
+    stat.S_IFIFO: types.PipeType,
+    stat.S_IFSOCK: types.SocketType,
+}
+
+
+def filetype_from_mode(st_mode):
+    """
+    :param st_mode: the ``st_mode`` of a stat result
+    :returns: a subclass of :py:class:`~fstree.node.types.BaseFileType`
+    """
+    return FILE_TYPES_BY_FORMAT.get(stat.S_IFMT(st_mode), types.FileType)
+
+
+class Entry(object):
+    """a file or folder found while scanning a folder.
+
+    Wraps a ``DirEntry`` when available, otherwise relies on a single
+    ``os.lstat`` per entry. Either way the stat data is cached in the
+    entry itself.
+    """
+    __slots__ = ('path', 'name', '_dirent', '_lstat', '_stat')
+
+    def __init__(self, path, name, dirent=None, lstat=None):
+        self.path = path
+        self.name = name
+        self._dirent = dirent
+        self._lstat = lstat
+        self._stat = None
+
+    def __repr__(self):
+        return 'Entry(path={0})'.format(self.path)
+
+    def lstat(self):
+        """:returns: the cached result of ``os.lstat``"""
+        if self._lstat is None:
+            if self._dirent is not None:
+                self._lstat = self._dirent.stat(follow_symlinks=False)
+            else:
+                self._lstat = os.lstat(self.path)
+
+        return self._lstat
+
+    def stat(self, follow_symlinks=True):
+        """:returns: the cached result of ``os.stat`` (or ``os.lstat`` when ``follow_symlinks=False``)"""
+        if not follow_symlinks or not self.is_symlink():
+            return self.lstat()
+
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+
+        return self._stat
+
+    def is_symlink(self):
+        if self._dirent is not None:
+            return self._dirent.is_symlink()
+
+        return stat.S_ISLNK(self.lstat().st_mode)
+
+    def is_folder(self, follow_symlinks=True):
+        if self._dirent is not None:
+            return self._dirent.is_dir(follow_symlinks=follow_symlinks)
+
+        try:
+            return stat.S_ISDIR(self.stat(follow_symlinks).st_mode)
+        except OSError:
+            # dangling symlink
+            return False
+
+    def is_file(self, follow_symlinks=True):
+        if self._dirent is not None:
+            return self._dirent.is_file(follow_symlinks=follow_symlinks)
+
+        try:
+            return stat.S_ISREG(self.stat(follow_symlinks).st_mode)
+        except OSError:
+            return False
+
+    @property
+    def filetype(self):
+        """the :py:class:`~fstree.node.types.BaseFileType` of the entry itself (symlinks are not followed)"""
+        return filetype_from_mode(self.lstat().st_mode)
+
+
+def iter_scandir(path):
+    for dirent in scandir(path):
+        yield Entry(dirent.path, dirent.name, dirent=dirent)
+
+
+def iter_listdir(path):
+    for name in os.listdir(path):
+        child = join(path, name)
+        try:
+            yield Entry(child, name, lstat=os.lstat(child))
+        except OSError:
+            # removed between the listing and the lstat call
+            continue
+
+
+def scan_folder(path):
+    """lists the immediate children of a folder
+
+    :param path: the path to an existing folder
+    :raises OSError: if the folder cannot be listed
+    :returns: an iterator of :py:class:`Entry`
+    """
+    if scandir is not None:
+        return iter_scandir(path)
+
+    return iter_listdir(path)
+
+
+def walk(path, onerror=None, descend=None):
+    """traverses a folder recursively, in depth-first order, yielding
+    every file and folder found under it. Symlinks to folders are
+    yielded but not followed.
+
+    :param path: the path to an existing folder
+    :param onerror: an optional callable that receives the ``OSError`` of folders that cannot be listed, which are skipped otherwise.
+    :param descend: an optional callable that receives the :py:class:`Entry` of each folder right after it is yielded, and returns `False` to skip its content.
+    :returns: an iterator of :py:class:`Entry`
+    """
+    pending = [path]
+    while pending:
+        children = []
+        for entry in scan_folder_or_report(pending.pop(), onerror):
+            yield entry
+            if should_descend(entry, descend):
+                children.append(entry.path)
+
+        pending.extend(reversed(children))
+
+
+def scan_folder_or_report(folder, onerror):
+    """same as :py:func:`scan_folder`, but passes the ``OSError`` to
+    ``onerror``, if given, and lists nothing instead"""
+    try:
+        return list(scan_folder(folder))
+    except OSError as e:
+        if onerror is not None:
+            onerror(e)
+
+        return []
+
+
+def should_descend(entry, descend):
+    return entry.is_folder(follow_symlinks=False) and (descend is None or descend(entry))
+
+
+def prefetch_stat(entry):
+    entry.lstat()
+    if entry.is_symlink():
+        try:
+            entry.stat()
+        except OSError:
+            # dangling symlink
+            pass
+
+
+def scan_folder_in_thread(folder):
+    """lists a folder and loads the stat data of its entries, so that
+    the consumer of the walk does not block on them.
+
+    :returns: a ``(folder, entries, error)`` tuple
+    """
+    try:
+        entries = list(scan_folder(folder))
+        for entry in entries:
+            prefetch_stat(entry)
+    except Exception as e:
+        return folder, None, e
+
+    return folder, entries, None
+
+
+def scan_folder_in_process(folder):
+    """same as :py:func:`scan_folder_in_thread` but returns picklable
+    ``(path, name, lstat)`` tuples rather than entries
+    """
+    try:
+        # the stat results of the scandir backport cannot be pickled
+        entries = [(entry.path, entry.name, os.lstat(entry.path)) for entry in scan_folder(folder)]
+    except Exception as e:
+        return folder, None, e
+
+    return folder, entries, None
+
+
+def iter_scans_ordered(pool, scan, path, backlog):
+    pending = [path]
+    scans = {}
+    while pending:
+        # prefetch the folders that come next, from the top of the stack
+        for folder in reversed(pending[-backlog:]):
+            if len(scans) >= backlog:
+                break
+
+            if folder not in scans:
+                scans[folder] = pool.apply_async(scan, (folder, ))
+
+        folder = pending.pop()
+        result = scans.pop(folder).get()
+        children = yield result
+        pending.extend(reversed(children or []))
+
+
+def iter_scans_unordered(pool, scan, path, backlog):
+    done = Queue()
+    waiting = deque([path])
+    in_flight = 0
+    while waiting or in_flight:
+        while waiting and in_flight < backlog:
+            pool.apply_async(scan, (waiting.pop(), ), callback=done.put)
+            in_flight += 1
+
+        result = done.get()
+        in_flight -= 1
+        children = yield result
+        waiting.extend(children or [])
+
+
+def parallel_walk(path, max_workers=DEFAULT_MAX_WORKERS, ordered=False, onerror=None, backlog=None, processes=False, descend=None):
+    """traverses a folder recursively like :py:func:`walk`, listing
+    many folders at once in a pool of workers that also load the
+    stat data of every entry.
+
+    At most ``backlog`` folders are listed or waiting to be consumed at
+    any time, so that memory usage does not depend on the size of the tree.
+
+    :param path: the path to an existing folder
+    :param max_workers: how many folders are listed at once (default: **16**)
+    :param ordered: when `True` the entries come in the same order of :py:func:`walk`, otherwise as soon as their folder is listed.
+    :param onerror: an optional callable that receives the ``OSError`` of folders that cannot be listed, which are skipped otherwise.
+    :param backlog: how many folders can be in flight (defaults to twice the ``max_workers``)
+    :param processes: when `True` lists the folders in a pool of processes rather than threads
+    :param descend: same as in :py:func:`walk`
+    :returns: an iterator of :py:class:`Entry`
+    """
+    max_workers = max(int(max_workers or 1), 1)
+    backlog = max(int(backlog or max_workers * 2), 1)
+
+    pool, scan = start_pool(max_workers, processes)
+    iter_scans = ordered and iter_scans_ordered or iter_scans_unordered
+    scans = iter_scans(pool, scan, path, backlog)
+    try:
+        children = None
+        while True:
+            try:
+                folder, entries, error = scans.send(children)
+            except StopIteration:
+                break
+
+            children = []
+            for entry in scanned_entries(entries, error, onerror):
+                yield entry
+                if should_descend(entry, descend):
+                    children.append(entry.path)
+    finally:
+        pool.terminate()
+
+
+def start_pool(max_workers, processes):
+    """:returns: a ``(pool, scan)`` tuple, where ``scan`` lists a folder in a worker of the pool"""
+    if processes:
+        return Pool(max_workers), scan_folder_in_process
+
+    return ThreadPool(max_workers), scan_folder_in_thread
+
+
+def scanned_entries(entries, error, onerror):
+    """
+    :param entries: the entries listed by a worker, either :py:class:`Entry` or the ``(path, name, lstat)`` tuples of :py:func:`scan_folder_in_process`
+    :param error: the error that the worker ran into, if any, which is passed to ``onerror`` when it is an ``OSError`` and raised otherwise
+    :returns: `list` of :py:class:`Entry`
+    """
+    if error is not None:
+        if not isinstance(error, OSError):
+            raise error
+
+        if onerror is not None:
+            onerror(error)
+
+        return []
+
+    return [
+        isinstance(entry, tuple) and Entry(entry[0], entry[1], lstat=entry[2]) or entry
+        for entry in entries
+    ]
@@ -50,9 +50,12 @@ def set_default_logger(new=None):
 def get_default_backend(**kw):
     """retrieves an instance of the **default** backend.
 
+    :param kw: overrides the _kwargs_ given to :py:func:`set_default_backend`
     :returns: a instance of some any subclass of `~fstree.backends.base.Backend`
     """
-    return getattr(__self__, 'DEFAULT_BACKEND')(**kw)
+    params = dict(getattr(__self__, 'DEFAULT_BACKEND_KW'))
+    params.update(kw)
+    return getattr(__self__, 'DEFAULT_BACKEND')(**params)
 
 
 backend = get_default_backend()
@@ -1,4 +1,8 @@
+import posixpath
+
 from types import NoneType
+from operator import attrgetter
+from operator import methodcaller
 from collections import OrderedDict
 
 from fstree._meta import ModelMeta
@@ -28,6 +32,7 @@ def extract_serializable_value(value):
 
 class Model(object):
     __metaclass__ = ModelMeta
+    __slots__ = ('__data', )
 
     def __init__(self, **params):
         self.__data = OrderedDict([(k, v) for k, v in params.iteritems() if k in self.__fields__])
@@ -42,10 +47,10 @@ class Model(object):
 
     def __getattr__(self, name):
         if name == 'data' or name.startswith('_'):
-            return super(Model, self).__getattr__(name)
+            raise AttributeError(name)
 
-        if name in self.data:
-            return self.data.get(name)
+        if name in self.__data:
+            return self.__data[name]
 
         raise AttributeError('{0} does not have attribute {1}'.format(self, name))
 
@@ -83,10 +88,47 @@ class AccessPolicy(Model):
     ]
 
 
+def get_creation_time(st):
+    """returns the ``st_birthtime`` of a stat result where the platform
+    supports it (BSD and OSX), otherwise falls back to ``st_ctime``.
+
+    :param st: a :py:class:`posix.stat_result`
+    :returns: `float`
+    """
+    return getattr(st, 'st_birthtime', st.st_ctime)
+
+
+def stored_or_from_stat(slot, from_stat):
+    def fget(self):
+        value = slot.__get__(self, None)
+        if value is None and self._stat is not None:
+            return from_stat(self._stat)
+
+        return value
+
+    return property(fget)
+
+
+def stored_or_computed(slot, compute):
+    def fget(self):
+        value = slot.__get__(self, None)
+        if value is None:
+            value = compute(self)
+            slot.__set__(self, value)
+
+        return value
+
+    return property(fget)
+
+
 class NodeInfo(Model):
     """
     .. note:: all dates are represented as unix timestamp (`int`)
 
+    Keeps one slot per field plus the raw stat result given to
+    :py:meth:`from_stat`: the stat-based fields are read straight from
+    it while the ``access_policy`` and the fields derived from the
+    ``path`` are only computed when first accessed.
     """
     __fields__ = [
         'uid',
@@ -103,3 +145,87 @@ class NodeInfo(Model):
         'shortname',
         'extension',
     ]
+    __slots__ = ('_stat', ) + tuple('_{0}'.format(name) for name in __fields__)
+
+    def __init__(self, stat_result=None, **params):
+        self._stat = stat_result
+        for name in self.__fields__:
+            setattr(self, '_' + name, params.get(name))
+
+    @classmethod
+    def from_stat(cls, path, st, **params):
+        """
+        :param path: the path to the file or folder
+        :param st: a :py:class:`posix.stat_result`, or any object with the same attributes
+        :returns: a :py:class:`NodeInfo`
+        """
+        return cls(stat_result=st, path=path, **params)
+
+    @property
+    def stat_result(self):
+        """the raw stat result given to :py:meth:`from_stat`, if any"""
+        return self._stat
+
+    @property
+    def get_fieldnames(self):
+        return [name for name in self.__fields__ if getattr(self, name) is not None]
+
+    @property
+    def data(self):
+        return OrderedDict([(name, getattr(self, name)) for name in self.get_fieldnames])
+
+    def load_access_policy(self):
+        """builds the access policy out of the raw stat result. Each
+        backend that supports permissions overrides this method.
+
+        :returns: `None`
+        """
+
+    def load_filename(self):
+        return posixpath.basename(self.path or '')
+
+    def load_basepath(self):
+        return posixpath.dirname(self.path or '')
+
+    def load_shortname(self):
+        return posixpath.splitext(self.filename)[0]
+
+    def load_extension(self):
+        return posixpath.splitext(self.filename)[1]
+
+
+STAT_FIELDS = (
+    ('uid', attrgetter('st_uid')),
+    ('gid', attrgetter('st_gid')),
+    ('size', attrgetter('st_size')),
+    ('created_at', get_creation_time),
+    ('last_accessed', attrgetter('st_atime')),
+    ('last_changed', attrgetter('st_ctime')),
+    ('last_modified', attrgetter('st_mtime')),
+)
+
+LAZY_FIELDS = (
+    'access_policy',
+    'basepath',
+    'filename',
+    'shortname',
+    'extension',
+)
+
+
+def install_field_properties(cls):
+    """exposes each slot of the given `NodeInfo` class through a
+    read-only property named after its field"""
+    slots = dict([(name, cls.__dict__['_' + name]) for name in cls.__fields__])
+
+    for name, from_stat in STAT_FIELDS:
+        setattr(cls, name, stored_or_from_stat(slots[name], from_stat))
+
+    for name in LAZY_FIELDS:
+        compute = methodcaller('load_' + name)
+        setattr(cls, name, stored_or_computed(slots[name], compute))
+
+    cls.path = property(slots['path'].__get__)
+
+
+install_field_properties(NodeInfo)
@@ -50,7 +50,7 @@ class Node(object):
             backend = backend or parent.backend
 
         # final fallback to default backend
-        backend = backend or get_default_backend(**kw)
+        backend = backend or get_default_backend()
 
         logger = logger or DEFAULT_LOGGER
 
@@ -61,12 +61,11 @@ class Node(object):
 
         if latest:
             info = backend.load_info(path)
-            access_policy = info.access_policy
-        elif info:
-            access_policy = access_policy or info.access_policy
+            access_policy = None
 
         self._path = path
         self._info = info
+        self._stale = False
         self._access_policy = access_policy
         self._backend = backend
         self._parent = parent
@@ -109,6 +108,12 @@ class Node(object):
 
     @property
     def info(self):
+        """the :py:class:`~fstree.models.NodeInfo` of the node, which is
+        reloaded on access after :py:meth:`invalidate_info` is called"""
+        if self._stale:
+            self._info = self.load_info()
+            self._stale = False
+
         return self._info
 
     @property
@@ -117,6 +122,9 @@ class Node(object):
 
     @property
     def access_policy(self):
+        if self._access_policy is None and self.info is not None:
+            self._access_policy = self.info.access_policy
+
         return self._access_policy
 
     @property
@@ -155,6 +163,22 @@ class Node(object):
     def load_access_policy(self):
         return self.backend.load_access_policy(self.path)
 
+    def invalidate_info(self):
+        """discards the current info so that it is lazily reloaded
+        the next time it is accessed"""
+        self._info = None
+        self._access_policy = None
+        self._stale = True
+
+    def update_info(self, info):
+        """replaces the current info in place
+
+        :param info: a :py:class:`~fstree.models.NodeInfo`
+        """
+        self._info = info
+        self._access_policy = None
+        self._stale = False
+
     def clone_params(self):
         return {
         }
@@ -207,6 +231,32 @@ class Node(object):
     #     info = NodeInfo.from_dict(info)
     #     return cls(path, backend=backend, info=info, **kw)
 
+    @classmethod
+    def from_entry(cls, entry, backend=None, load_info=True, **kw):
+        """creates a node out of an entry yielded by
+        ``backend.iter_entries()``, reusing its stat data rather than
+        loading it again.
+
+        :param entry: a :py:class:`~fstree.backends.walker.Entry`
+        :param backend: the backend that yielded the entry
+        :param load_info: when `False` the info is only loaded when first accessed
+        :returns: an instance of ``cls`` with a pre-loaded `~fstree.models.NodeInfo`
+        """
+        backend = backend or get_default_backend()
+        if not load_info:
+            node = cls(entry.path, backend=backend, **kw)
+            node.invalidate_info()
+            return node
+
+        try:
+            st = entry.stat()
+        except OSError:
+            # dangling symlink
+            st = entry.lstat()
+
+        info = backend.load_info(entry.path, st=st)
+        return cls(entry.path, backend=backend, info=info, **kw)
+
     @classmethod
     def supports_path(cls, path, backend=None):
         backend = backend or get_default_backend()
@@ -1,9 +1,30 @@
 from fstree.meta import FileDescriptor
 from fstree.utils import objectid
 from fstree.node.base import Node
+from fstree.backends.atomic import AtomicBatch
+from fstree.backends.erase import DEFAULT_CHUNK_SIZE
+from fstree.backends.durability import DURABILITY_NONE
 from fstree.exceptions import FileAlreadyOpen
 from fstree.exceptions import InvalidFileDescriptor
 
+# what the methods that change a file return:
+# - latest: a new instance with freshly loaded info (default)
+# - fstat: the same instance, updated with the fstat of its open file-descriptor
+# - lazy: the same instance, whose info is reloaded only when next accessed
+REFRESH_LATEST = 'latest'
+REFRESH_FSTAT = 'fstat'
+REFRESH_LAZY = 'lazy'
+REFRESH_MODES = (REFRESH_LATEST, REFRESH_FSTAT, REFRESH_LAZY)
+
+
+def check_refresh(refresh):
+    """:raises ValueError: if the refresh mode is not one of :py:data:`REFRESH_MODES`"""
+    if refresh not in REFRESH_MODES:
+        raise ValueError('invalid refresh mode {0!r}, must be one of: {1}'.format(
+            refresh, ', '.join(sorted(REFRESH_MODES))))
+
+    return refresh
+
 
 class File(Node):
     """Node with extra methods that can manipulate file contents
@@ -11,16 +32,20 @@ class File(Node):
     .. glossary::
 
        - ***internal fd:*** a `~FileDescriptor` internally stored in a `~File` after a `~File.open` call.
+       - ***refresh:*** what :py:meth:`~File.write_bytes`, :py:meth:`~File.append_bytes`, :py:meth:`~File.erase_bytes`, :py:meth:`~File.close` and :py:meth:`~File.create` return: ``"latest"`` (default) a reloaded instance, ``"fstat"`` the same instance updated from the fstat of the file-descriptor, or ``"lazy"`` the same instance with its info reloaded on the next access.
     """
 
-    def initialize(self, fd=None, fileno=None):
+    def initialize(self, fd=None, fileno=None, refresh=REFRESH_LATEST):
         self._fd = fd
         self.__fileno = fileno
+        self._refresh = check_refresh(refresh)
+        self._mapping = None
 
     def clone_params(self):
         return {
             'fd': self._fd,
             'fileno': self.__fileno,
+            'refresh': self._refresh,
         }
 
     @property
@@ -48,13 +73,18 @@ class File(Node):
 
         return self.__fileno
 
-    def write_bytes(self, data, autoclose=None):
+    def write_bytes(self, data, autoclose=None, refresh=None, atomic=False):
         """write the given bytes to the file
 
         :param data: the bytes
         :param autoclose: when `True` closes the file at the end
+        :param refresh: overrides the _refresh_ mode of the node
+        :param atomic: when `True` replaces the file through :py:meth:`atomic_writer`, or an :py:class:`~fstree.backends.atomic.AtomicBatch` to replace it when the batch is committed
         :returns: a _reloaded_ version instance of :py:class:`~File`
         """
+        if atomic:
+            return self.replace(data, atomic, refresh)
+
         if autoclose is None:
             autoclose = len(data) > 0
 
@@ -67,15 +97,62 @@ class File(Node):
 
         self.backend.write_fd(fd, data)
 
-        if autoclose:
-            self.close(fd)
+        return self.finish_writing(fd, autoclose, refresh)
+
+    def atomic_writer(self, mode='wb', batch=None):
+        """a context manager that yields a `~FileDescriptor` whose
+        content replaces the file atomically when the block succeeds,
+        see :py:class:`~fstree.backends.atomic.AtomicWriter`.
+
+        .. note:: an open _internal fd_ keeps pointing to the replaced file
+
+        :param mode: (default: ``"wb"``)
+        :param batch: an optional :py:class:`~fstree.backends.atomic.AtomicBatch`
+        """
+        return self.backend.atomic_writer(self.path, mode, batch)
+
+    def replace(self, data=None, atomic=True, refresh=None, size=0, mode='wb', sparse=False):
+        """atomically replaces the content of the file
+
+        :param data: the new content
+        :param atomic: `True` or an :py:class:`~fstree.backends.atomic.AtomicBatch`
+        :param refresh: overrides the _refresh_ mode of the node, always ``"lazy"`` within a batch
+        :param size: when no ``data`` is given, preallocates this many null-bytes
+        :param sparse: when `True` the ``size`` is a hole rather than preallocated
+        :returns: a `~File`
+        """
+        batch = isinstance(atomic, AtomicBatch) and atomic or None
+
+        with self.atomic_writer(mode, batch) as fd:
+            if data is not None:
+                # synced once when the writer commits
+                self.backend.write_fd(fd, data, durability=DURABILITY_NONE)
+            elif size and sparse:
+                self.backend.truncate_fd(fd, size)
+            elif size:
+                self.backend.allocate_fd(fd, size)
+
+        if batch is not None:
+            # not renamed until the batch is committed
+            refresh = REFRESH_LAZY
+
+        refresh = check_refresh(refresh or self._refresh)
+        self.unmap()
+        if refresh == REFRESH_LATEST:
+            return self.latest
+
+        if refresh == REFRESH_FSTAT:
+            self.update_info(self.load_info())
+        else:
+            self.invalidate_info()
 
-        return self.latest
+        return self
 
-    def append_bytes(self, data, autoclose=None):
+    def append_bytes(self, data, autoclose=None, refresh=None):
         """append the given bytes to the file
         :param data: the bytes
         :param autoclose: when `True` closes the file at the end
+        :param refresh: overrides the _refresh_ mode of the node
         :returns: a _reloaded_ version instance of :py:class:`~File`
         """
         if autoclose is None:
@@ -89,10 +166,29 @@ class File(Node):
         fd = self.open(mode=mode, reuse_if_open=True)
         self.backend.write_fd(fd, data)
 
-        if autoclose:
-            self.close(fd)
+        return self.finish_writing(fd, autoclose, refresh)
 
-        return self.latest
+    def write_at(self, offset, data, autoclose=False, refresh=None):
+        """writes the given bytes at the given offset with ``pwrite``,
+        without truncating the file nor moving the position of the
+        _internal fd_, which is kept open by default so that threads
+        can write to different ranges at once.
+
+        :param offset: where to write to
+        :param data: the bytes, or a sequence of bytes-like objects written in order with a single ``pwritev``
+        :param autoclose: when `True` closes the file at the end
+        :param refresh: overrides the _refresh_ mode of the node
+        :returns: a `~File`
+        """
+        mode = self.does_exist() and 'rb+' or 'wb+'
+        fd = self.open(mode=mode, reuse_if_open=True)
+
+        if isinstance(data, (list, tuple)):
+            self.backend.writev_fd(fd, data, offset)
+        else:
+            self.backend.write_fd(fd, data, offset)
+
+        return self.finish_writing(fd, autoclose, refresh)
 
     def read_bytes(self, count=None, offset=None, mode='rb', autoclose=None, rewind=True):
         """read bytes from the file
@@ -109,10 +205,8 @@ class File(Node):
         if count is None and not offset and autoclose is None:
             autoclose = True
 
-        # apply offset
-        if offset != 0:
-            self.backend.seek_fd(fd, offset)
-
+        # positional when both count and offset are given, so that
+        # threads can share the same internal fd
         read = self.backend.read_fd(fd, count, offset)
         if autoclose:
             self.close(fd)
@@ -122,18 +216,191 @@ class File(Node):
 
         return read
 
-    def erase_bytes(self, rounds=1):
-        with self.open('wb', reuse_if_open=True) as fd:
-            for i in range(rounds):
-                self.backend.erase_fd(fd)
+    def readinto(self, buf, offset=0):
+        """fills the given buffer with the bytes at the given offset,
+        without allocating new bytes nor moving the position of the
+        _internal fd_.
+
+        :param buf: a ``bytearray``
+        :param offset: where to read from (default: **0**)
+        :returns: `int` - how many bytes were read, **0** at the end of the file
+        """
+        fd = self.fd
+        if fd is not None:
+            return self.backend.readinto_fd(fd, buf, offset)
+
+        fd = self.backend.open_fd(self.path, 'rb')
+        try:
+            return self.backend.readinto_fd(fd, buf, offset)
+        finally:
+            self.backend.close_fd(fd)
+
+    def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE, offset=0, length=None, buf=None, drop_cache=False):
+        """streams the content of the file, reusing the _internal fd_
+        if open, see :py:meth:`~fstree.backends.posix.Posix.iter_fd`
+
+        ::
+
+            >>> digest = hashlib.sha256()
+            >>> for chunk in nfile.iter_chunks(buf=bytearray(65536)):
+            ...     digest.update(chunk)
+
+        :param chunk_size: how many bytes per chunk (default: **1MB**)
+        :param offset: where to start reading (default: **0**)
+        :param length: how many bytes to read (defaults to ``None``: until the end of the file)
+        :param buf: an optional ``bytearray`` reused by every read, the chunks are then ``memoryview`` slices of it which are only valid until the next one is yielded
+        :param drop_cache: when `True` drops each chunk from the page cache once read, for files that are read only once such as in backups
+        :returns: an iterator of ``bytes``, or ``memoryview`` when ``buf`` is given
+        """
+        fd = self.fd
+        if fd is not None:
+            for chunk in self.backend.iter_fd(fd, chunk_size, offset, length, buf, drop_cache):
+                yield chunk
+
+            return
+
+        fd = self.backend.open_fd(self.path, 'rb', access='sequential')
+        try:
+            for chunk in self.backend.iter_fd(fd, chunk_size, offset, length, buf, drop_cache):
+                yield chunk
+        finally:
+            self.backend.close_fd(fd)
+
+    def iter_data_extents(self, offset=0, length=None):
+        """finds the ranges of the file that hold data, so that readers
+        of sparse files can skip their holes.
+
+        :param offset: where to start looking (default: **0**)
+        :param length: how many bytes to look at (defaults to ``None``: until the end of the file)
+        :returns: an iterator of ``(start, end)`` tuples
+        """
+        fd = self.fd
+        if fd is not None:
+            return self.backend.iter_data_extents_fd(fd, offset, length)
+
+        fd = self.backend.open_fd(self.path, 'rb')
+        try:
+            return self.backend.iter_data_extents_fd(fd, offset, length)
+        finally:
+            self.backend.close_fd(fd)
+
+    def mmap(self, access='read'):
+        """maps the whole file into memory, reusing the _internal fd_ if
+        open. The caller owns the mapping and should close it.
+
+        :param access: one of ``"read"`` (default), ``"write"`` or ``"copy"``
+        :raises ValueError: if the file is empty
+        :returns: an ``mmap.mmap``
+        """
+        fd = self.fd
+        if fd is not None:
+            return self.backend.mmap_fd(fd, access)
+
+        mode = access == 'write' and 'rb+' or 'rb'
+        fd = self.backend.open_fd(self.path, mode)
+        try:
+            return self.backend.mmap_fd(fd, access)
+        finally:
+            self.backend.close_fd(fd)
+
+    def read_view(self, offset=0, length=None):
+        """reads bytes without copying them, from a read-only mapping of
+        the file that is kept open and reused by the next calls until
+        the file is written through this instance or :py:meth:`unmap` is called.
+
+        :param offset: where to start reading
+        :param length: how many bytes to read (defaults to ``None``: until the end of the file)
+        :returns: a read-only ``buffer``
+        """
+        if self._mapping is None:
+            try:
+                self._mapping = self.mmap('read')
+            except ValueError:
+                # empty files cannot be mapped
+                return buffer(b'')
+
+        size = len(self._mapping)
+        offset = min(offset, size)
+        if length is None or offset + length > size:
+            length = size - offset
+
+        return buffer(self._mapping, offset, length)
+
+    def unmap(self):
+        """closes the mapping used by :py:meth:`read_view`, if any"""
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+
+    def erase_bytes(self, rounds=1, patterns='default', refresh=None):
+        """overwrites every byte of the file without changing its size
+
+        :param rounds: how many times to repeat the erase passes
+        :param patterns: the name of a preset in :py:data:`~fstree.backends.erase.ERASE_PRESETS` or a sequence of pass patterns
+        :param refresh: overrides the _refresh_ mode of the node
+        :returns: a `~File`
+        """
+        mode = self.does_exist() and 'rb+' or 'wb'
+
+        with self.open(mode, reuse_if_open=True) as fd:
+            report = self.backend.erase_fd(fd, rounds=rounds, patterns=patterns)
+            self.log.debug('erased %s: %r', self.path, report)
+
+            return self.finish_writing(fd, False, refresh)
+
+    def copy_to(self, destination, preserve_metadata=False, **kw):
+        """copies the file without reading its content into memory,
+        see :py:meth:`~fstree.backends.posix.Posix.copy_file`
 
-        return self.latest
+        :param destination: a path or `~Node`, when it is an existing folder the copy is placed inside of it with the same name
+        :param preserve_metadata: when `True` also copies the permission bits and times of the file
+        :returns: a `~File` of the copy
+        """
+        path = getattr(destination, 'path', destination)
+        if self.backend.is_folder(path):
+            path = self.backend.expand_path(path, self.name)
+
+        if self.fd is not None and self.fd.writable():
+            self.fd.flush()
+
+        report = self.backend.copy_file(self.path, path, preserve_metadata, **kw)
+        self.log.debug('copied %s to %s: %r', self.path, path, report)
+        return self.__class__(path, backend=self.backend, logger=self.log, latest=True)
+
+    def finish_writing(self, fd, autoclose, refresh=None):
+        """refreshes the node according to the _refresh_ mode, then
+        optionally closes the given file-descriptor.
+
+        :param fd: the `~FileDescriptor` that was written to, either the one of the node or one already checked with :py:meth:`validate_fd`
+        :param autoclose: when `True` closes the file-descriptor
+        :param refresh: overrides the _refresh_ mode of the node
+        :raises ValueError: if the refresh mode is not valid
+        :returns: a `~File`
+        """
+        refresh = check_refresh(refresh or self._refresh)
+        self.unmap()
+
+        if refresh == REFRESH_FSTAT and not fd.closed:
+            st = self.backend.stat_fd(fd)
+            self.update_info(self.backend.load_info(self.path, st=st))
+
+        elif refresh == REFRESH_LAZY:
+            self.invalidate_info()
+
+        if autoclose:
+            self.discard_fd(fd)
+
+        if refresh == REFRESH_LATEST:
+            return self.latest
+
+        return self
 
     def open(self, mode='wb', force=False, reuse_if_open=True, *args, **kw):
         """
         :param mode: (default: `"wb"`)
         :param force: `bool` - if `True` any existing file will be destroyed before writing data
         :param reuse_if_open: `bool`  if `True` tries to reuse an open file-descriptor before opening one.
+        :param access: an optional hint of how the file is going to be read: ``"sequential"``, ``"random"``, ``"willneed"``, ``"dontneed"`` or ``"noreuse"``
         :raises: `~NodeAlreadyOpen` if ``reuse_if_open=False``
         """
         if force:
@@ -151,11 +418,10 @@ class File(Node):
 
         return fd
 
-    def close(self, fd=None):
+    def close(self, fd=None, refresh=None):
         """
         :param fd: a `~fstree.backends.base.FileDescriptor`
-        :param force: `bool` - if `True` any existing file will be destroyed before writing data
-        :param reuse_if_open: `bool`  if `True` tries to reuse an open file-descriptor before opening one.
+        :param refresh: overrides the _refresh_ mode of the node
         :raises: `~NodeAlreadyOpen` if ``reuse_if_open=False``
         :returns: a reloaded version of self
         """
@@ -166,27 +432,50 @@ class File(Node):
                 'ignore close file-descriptor None for file %s', self.path)
             return self
 
+        self.validate_fd(fd, action='close')
+        return self.finish_writing(fd, True, refresh)
+
+    def validate_fd(self, fd, action):
+        """
+        :param fd: a `~fstree.backends.base.FileDescriptor`
+        :param action: the name of the action, used in the error message
+        :raises: `TypeError` if ``fd`` is not a file-descriptor
+        :raises: `~InvalidFileDescriptor` if the fd does not belong to this node
+        """
         if not FileDescriptor.ack_paternity(fd):
             raise TypeError(
                 'fd must be a FileDescriptor, not a: {}'.format(objectid(fd)))
 
         if fd.fileno() != self.fileno and self.fileno is not None:
             raise InvalidFileDescriptor(
-                self, target_path=fd.name, fileno=fd.fileno(), action='close')
+                self, target_path=fd.name, fileno=fd.fileno(), action=action)
+
+    def release(self, fd):
+        """closes the given file-descriptor without refreshing the node
 
+        :param fd: a `~fstree.backends.base.FileDescriptor`
+        """
+        self.validate_fd(fd, action='close')
+        self.discard_fd(fd)
+
+    def discard_fd(self, fd):
+        """same as :py:meth:`release` for file-descriptors already validated"""
         if fd and not fd.closed:
             self.backend.close_fd(fd)
 
         self._fd = None
 
-        return self.latest
-
-    def create(self, data=None, encoding=None, size=0, mode='wb', force=False, autoclose=None):
+    def create(self, data=None, encoding=None, size=0, mode='wb', force=False, autoclose=None, refresh=None, atomic=False, sparse=False):
         """creates a file
 
+        :param data: the initial content of the file
+        :param size: when no ``data`` is given, preallocates this many null-bytes without building them in memory
+        :param sparse: when `True` the ``size`` is a hole that takes no space on disk, rather than preallocated
+        :param atomic: when `True` (or an :py:class:`~fstree.backends.atomic.AtomicBatch`) the file only appears once complete, see :py:meth:`write_bytes`. An existing file is then replaced as a whole, even without ``force``, rather than destroyed beforehand.
         :returns: a `~File` instance
         """
-        fd = self.open(mode, force=force, reuse_if_open=False)
+        if not atomic:
+            fd = self.open(mode, force=force, reuse_if_open=False)
 
         if isinstance(data, basestring):
             if encoding is not None:
@@ -205,16 +494,22 @@ class File(Node):
                 autoclose = len(data) > 0
 
         else:
-            data = '\0' * size
+            data = None
             if autoclose is None:
                 autoclose = True
 
-        self.backend.write_fd(fd, data)
+        if atomic:
+            return self.replace(data, atomic, refresh, size, mode, sparse)
 
-        if autoclose is True:
-            self.close(fd)
+        if data is not None:
+            self.backend.write_fd(fd, data)
+        elif size and sparse:
+            self.backend.truncate_fd(fd, size)
+        elif size:
+            self.backend.allocate_fd(fd, size)
 
-        return self.latest
+        self.backend.sync_parent(self.path)
+        return self.finish_writing(fd, autoclose is True, refresh)
 
     def destroy(self, rounds=1):
         """erases the bytes of the file and deletes it
@@ -0,0 +1,18 @@
+from fstree.platforms.linux.watcher import Watcher
+from fstree.platforms.linux.watcher import Event
+from fstree.platforms.linux.watcher import Created
+from fstree.platforms.linux.watcher import Modified
+from fstree.platforms.linux.watcher import Deleted
+from fstree.platforms.linux.watcher import Moved
+from fstree.platforms.linux.watcher import Rescan
+
+
+__all__ = [
+    'Watcher',
+    'Event',
+    'Created',
+    'Modified',
+    'Deleted',
+    'Moved',
+    'Rescan',
+]
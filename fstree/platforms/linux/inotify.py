@@ -0,0 +1,139 @@
+"""
+thin :py:mod:`ctypes` wrapper around the `inotify(7)
+<http://man7.org/linux/man-pages/man7/inotify.7.html>`_ system calls
+
+"""
+import os
+import errno
+import struct
+import ctypes
+
+from fstree.backends.libc import libc_function
+from fstree.backends.libc import unsupported
+from fstree.backends.libc import raise_for_errno
+
+
+__all__ = [
+    'init',
+    'add_watch',
+    'rm_watch',
+    'read_events',
+    'parse_events',
+]
+
+IN_ACCESS = 0x00000001
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_CLOSE_NOWRITE = 0x00000010
+IN_OPEN = 0x00000020
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+
+# set by the kernel in the events it reads
+IN_UNMOUNT = 0x00002000
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# flags of inotify_add_watch
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_MASK_ADD = 0x20000000
+IN_ONESHOT = 0x80000000
+
+# flags of inotify_init1
+IN_CLOEXEC = os.O_CLOEXEC if hasattr(os, 'O_CLOEXEC') else 0o2000000
+IN_NONBLOCK = os.O_NONBLOCK
+
+# struct inotify_event {int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[];}
+EVENT_HEADER = struct.Struct('iIII')
+
+# enough for many events at once, the largest one takes 16 + NAME_MAX + 1 bytes
+READ_SIZE = 64 * 1024
+
+
+c_inotify_init1 = libc_function(
+    ('inotify_init1', ),
+    ctypes.c_int, ctypes.c_int)
+
+c_inotify_add_watch = libc_function(
+    ('inotify_add_watch', ),
+    ctypes.c_int, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+
+c_inotify_rm_watch = libc_function(
+    ('inotify_rm_watch', ),
+    ctypes.c_int, ctypes.c_int, ctypes.c_int)
+
+
+def init(flags=IN_CLOEXEC | IN_NONBLOCK):
+    """
+    :param flags: (default: ``IN_CLOEXEC | IN_NONBLOCK``)
+    :returns: `int` the file-descriptor of a new inotify instance
+    """
+    if c_inotify_init1 is None:
+        raise unsupported('inotify_init1')
+
+    return raise_for_errno(c_inotify_init1(flags), 'inotify_init1')
+
+
+def add_watch(fileno, path, mask):
+    """
+    :param fileno: the file-descriptor returned by :py:func:`init`
+    :param path: the path to watch
+    :param mask: the ``IN_*`` events and flags
+    :raises OSError: with ``errno.ENOSPC`` when the ``fs.inotify.max_user_watches`` limit is reached
+    :returns: `int` the watch descriptor
+    """
+    if c_inotify_add_watch is None:
+        raise unsupported('inotify_add_watch')
+
+    if isinstance(path, unicode):
+        path = path.encode('utf-8')
+
+    return raise_for_errno(c_inotify_add_watch(fileno, path, mask), 'inotify_add_watch')
+
+
+def rm_watch(fileno, wd):
+    if c_inotify_rm_watch is None:
+        raise unsupported('inotify_rm_watch')
+
+    return raise_for_errno(c_inotify_rm_watch(fileno, wd), 'inotify_rm_watch')
+
+
+def parse_events(data):
+    """
+    :param data: the ``bytes`` read from an inotify file-descriptor
+    :returns: `list` of ``(wd, mask, cookie, name)``
+    """
+    events = []
+    offset = 0
+    while offset + EVENT_HEADER.size <= len(data):
+        wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+        offset += EVENT_HEADER.size
+        # the name is padded with null-bytes
+        name = data[offset:offset + length].rstrip(b'\0')
+        offset += length
+        events.append((wd, mask, cookie, name))
+
+    return events
+
+
+def read_events(fileno):
+    """reads the events that are available without blocking
+
+    :returns: `list` of ``(wd, mask, cookie, name)``
+    """
+    try:
+        data = os.read(fileno, READ_SIZE)
+    except OSError as e:
+        if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+            return []
+        raise
+
+    return parse_events(data)
@@ -0,0 +1,441 @@
+"""
+recursive watcher of trees that turns inotify events into coalesced
+events of :py:class:`~fstree.node.File` and :py:class:`~fstree.node.Folder` nodes
+
+"""
+import os
+import time
+import errno
+import select
+
+from collections import OrderedDict
+
+from fstree.node import File
+from fstree.node import Folder
+from fstree.backends.walker import walk
+from fstree.platforms.linux import inotify
+
+
+__all__ = [
+    'Event',
+    'Created',
+    'Modified',
+    'Deleted',
+    'Moved',
+    'Rescan',
+    'Watcher',
+    'coalesce',
+]
+
+CREATED = 'created'
+MODIFIED = 'modified'
+DELETED = 'deleted'
+MOVED = 'moved'
+RESCAN = 'rescan'
+
+WATCH_MASK = (
+    inotify.IN_MODIFY |
+    inotify.IN_ATTRIB |
+    inotify.IN_CREATE |
+    inotify.IN_DELETE |
+    inotify.IN_MOVED_FROM |
+    inotify.IN_MOVED_TO |
+    inotify.IN_DELETE_SELF |
+    inotify.IN_MOVE_SELF
+)
+WATCH_FLAGS = inotify.IN_ONLYDIR | inotify.IN_DONT_FOLLOW | inotify.IN_EXCL_UNLINK
+
+# what two changes of the same path within a batch amount to, `None`
+# means that nothing changed at all
+COALESCED = {
+    (CREATED, MODIFIED): CREATED,
+    (CREATED, DELETED): None,
+    (MODIFIED, DELETED): DELETED,
+    (DELETED, CREATED): MODIFIED,
+}
+
+
+class Event(object):
+    """a change of a file or folder under the watched tree"""
+    kind = None
+
+    def __init__(self, node):
+        self.node = node
+
+    def __repr__(self):
+        return '{0}(path={1})'.format(self.__class__.__name__, self.node.path)
+
+    @property
+    def path(self):
+        return self.node.path
+
+    @property
+    def is_folder(self):
+        return isinstance(self.node, Folder)
+
+
+class Created(Event):
+    """a file or folder was created or moved into the tree"""
+    kind = CREATED
+
+
+class Modified(Event):
+    """the content or metadata of a file or folder changed, or it was replaced"""
+    kind = MODIFIED
+
+
+class Deleted(Event):
+    """a file or folder was deleted or moved out of the tree"""
+    kind = DELETED
+
+
+class Moved(Event):
+    """a file or folder was renamed within the tree: ``node`` is the
+    new one and ``source`` the old one"""
+    kind = MOVED
+
+    def __init__(self, node, source):
+        super(Moved, self).__init__(node)
+        self.source = source
+
+    def __repr__(self):
+        return 'Moved(source={0}, path={1})'.format(self.source.path, self.node.path)
+
+
+class Rescan(Event):
+    """changes under the folder were lost, either because the queue of
+    the kernel overflowed or because the limit of watches was reached,
+    so its whole subtree should be listed again"""
+    kind = RESCAN
+
+
+# the method of :py:class:`Watcher` that handles each kind of inotify
+# event, in order of precedence
+HANDLERS = (
+    (inotify.IN_DELETE_SELF | inotify.IN_MOVE_SELF, 'handle_removed_self'),
+    (inotify.IN_CREATE, 'handle_created'),
+    (inotify.IN_MOVED_FROM, 'handle_moved_from'),
+    (inotify.IN_MOVED_TO, 'handle_moved_to'),
+    (inotify.IN_DELETE, 'handle_deleted'),
+    (inotify.IN_MODIFY | inotify.IN_ATTRIB, 'handle_modified'),
+)
+
+EVENT_CLASSES = {
+    CREATED: Created,
+    MODIFIED: Modified,
+    DELETED: Deleted,
+    RESCAN: Rescan,
+}
+
+
+def coalesce(changes):
+    """merges the changes of the same path, keeping the order in which
+    each path first changed. A file or folder created and then renamed
+    within the same batch, e.g. written to a temporary file and renamed
+    once complete, is created under its new path.
+
+    :param changes: an iterable of ``(kind, path, is_folder, source)``
+    :returns: `list` of ``(kind, path, is_folder, source)``
+    """
+    merged = OrderedDict()
+    for kind, path, is_folder, source in changes:
+        if kind == MOVED and merged.get(source, (None, ))[0] == CREATED:
+            del merged[source]
+            kind = CREATED
+
+        if kind in (MOVED, RESCAN):
+            merged[(kind, path, source)] = (kind, path, is_folder, source)
+        else:
+            merge_change(merged, kind, path, is_folder)
+
+    return merged.values()
+
+
+def merge_change(merged, kind, path, is_folder):
+    previous = merged.get(path)
+    if previous is not None:
+        kind = COALESCED.get((previous[0], kind), previous[0] == CREATED and CREATED or kind)
+
+    if kind is None:
+        del merged[path]
+    else:
+        merged[path] = (kind, path, is_folder, None)
+
+
+class Watcher(object):
+    """watches a folder, and every folder under it, through inotify.
+
+    The events are read in batches: once the first event arrives the
+    watcher keeps reading for ``latency`` seconds and then merges the
+    changes of the same path, so that e.g. a file that is created and
+    written many times comes up as a single :py:class:`Created`.
+
+    New folders are watched as soon as they show up, and everything
+    already in them is reported as :py:class:`Created`. When the queue
+    of the kernel overflows, or the ``fs.inotify.max_user_watches``
+    limit is reached, a :py:class:`Rescan` tells which subtree must be
+    listed again.
+
+    ::
+
+        >>> with tree.watch() as watcher:
+        ...     for event in watcher:
+        ...         print event.kind, event.node
+
+    :param path: the path to an existing folder
+    :param backend: the backend of the nodes in the events
+    :param recursive: when `True` (default) also watches every folder under ``path``
+    :param latency: how many seconds to keep reading after the first event of a batch (default: **0.05**)
+    :param mask: the ``IN_*`` events to watch
+    :raises OSError: with ``errno.ENOSYS`` if inotify is not available
+    """
+
+    def __init__(self, path, backend=None, recursive=True, latency=0.05, mask=WATCH_MASK):
+        self.root = path.rstrip(os.sep) or os.sep
+        self.backend = backend
+        self.recursive = recursive
+        self.latency = latency
+        self.mask = mask
+        self.fileno = inotify.init()
+        self.paths = {}
+        self.watches = {}
+        self.unwatched = set()
+        self.changes = []
+        # the sources of renames whose destination has not come up yet
+        self.moves = OrderedDict()
+        self.watch_tree(self.root, report=False)
+
+    def __repr__(self):
+        return 'Watcher(path={0}, watches={1})'.format(self.root, len(self.watches))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        return self.iter_events()
+
+    @property
+    def closed(self):
+        return self.fileno is None
+
+    def close(self):
+        if self.fileno is not None:
+            os.close(self.fileno)
+            self.fileno = None
+
+    def watch_folder(self, path):
+        """
+        :returns: `False` if the folder could not be watched
+        """
+        try:
+            wd = inotify.add_watch(self.fileno, path, self.mask | WATCH_FLAGS)
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                self.unwatched.add(path)
+                self.changes.append((RESCAN, path, True, None))
+                return False
+
+            if e.errno in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                # removed in the meantime, or not readable
+                return False
+            raise
+
+        self.unwatched.discard(path)
+        # the same folder watched again keeps its watch descriptor
+        self.watches.pop(self.paths.get(wd), None)
+        self.paths[wd] = path
+        self.watches[path] = wd
+        return True
+
+    def watch_tree(self, path, report=True):
+        """watches a folder and, when recursive, every folder under it
+
+        :param report: when `True` the files and folders under it are reported as created, since they may have been created before it was watched
+        """
+        if not self.watch_folder(path) or not self.recursive:
+            return
+
+        def descend(entry):
+            return self.watch_folder(entry.path)
+
+        for entry in walk(path, descend=descend):
+            if report:
+                self.changes.append((CREATED, entry.path, entry.is_folder(follow_symlinks=False), None))
+
+    def iter_subtree(self, path):
+        prefix = path + os.sep
+        for watched in self.watches.keys():
+            if watched == path or watched.startswith(prefix):
+                yield watched
+
+    def forget_tree(self, path, remove=False):
+        """drops the watches of a folder and every folder under it
+
+        :param remove: when `True` also removes them from the kernel, for folders moved out of the tree
+        """
+        for watched in list(self.iter_subtree(path)):
+            wd = self.watches.pop(watched)
+            self.paths.pop(wd, None)
+            if remove:
+                try:
+                    inotify.rm_watch(self.fileno, wd)
+                except OSError:
+                    pass
+
+        prefix = path + os.sep
+        self.unwatched = set(p for p in self.unwatched if p != path and not p.startswith(prefix))
+
+    def move_tree(self, source, destination):
+        """the watches follow the folders when they are renamed, only their paths change"""
+        for watched in list(self.iter_subtree(source)):
+            wd = self.watches.pop(watched)
+            moved = destination + watched[len(source):]
+            self.paths[wd] = moved
+            self.watches[moved] = wd
+
+    def rescan(self):
+        """watches again the whole tree after events were lost"""
+        self.changes.append((RESCAN, self.root, True, None))
+        self.watch_tree(self.root, report=False)
+
+    def handle(self, events):
+        """turns raw inotify events into changes
+
+        :param events: `list` of ``(wd, mask, cookie, name)``
+        """
+        for wd, mask, cookie, name in events:
+            self.handle_event(wd, mask, cookie, name)
+
+    def handle_event(self, wd, mask, cookie, name):
+        if mask & inotify.IN_Q_OVERFLOW:
+            return self.rescan()
+
+        if mask & inotify.IN_IGNORED:
+            return self.handle_ignored(wd)
+
+        folder = self.paths.get(wd)
+        if folder is None:
+            return
+
+        path = name and os.path.join(folder, name) or folder
+        for flags, handler in HANDLERS:
+            if mask & flags:
+                return getattr(self, handler)(path, bool(mask & inotify.IN_ISDIR), cookie)
+
+    def handle_ignored(self, wd):
+        """the folder is gone or no longer watched"""
+        folder = self.paths.pop(wd, None)
+        if folder is not None and self.watches.get(folder) == wd:
+            del self.watches[folder]
+
+    def handle_removed_self(self, path, is_folder, cookie):
+        # the other folders are reported by their parents
+        if path == self.root:
+            self.changes.append((DELETED, path, True, None))
+
+    def handle_created(self, path, is_folder, cookie):
+        self.changes.append((CREATED, path, is_folder, None))
+        if is_folder and self.recursive:
+            self.watch_tree(path)
+
+    def handle_moved_from(self, path, is_folder, cookie):
+        self.moves[cookie] = (path, is_folder)
+
+    def handle_moved_to(self, path, is_folder, cookie):
+        source = self.moves.pop(cookie, None)
+        if source is None:
+            # moved into the tree
+            return self.handle_created(path, is_folder, cookie)
+
+        self.changes.append((MOVED, path, is_folder, source[0]))
+        if is_folder:
+            self.move_tree(source[0], path)
+
+    def handle_deleted(self, path, is_folder, cookie):
+        self.changes.append((DELETED, path, is_folder, None))
+        if is_folder:
+            self.forget_tree(path)
+
+    def handle_modified(self, path, is_folder, cookie):
+        self.changes.append((MODIFIED, path, is_folder, None))
+
+    def expire_moves(self):
+        """the renames whose destination did not come up within the batch were moved out of the tree"""
+        moves, self.moves = self.moves, OrderedDict()
+        for path, is_folder in moves.values():
+            self.changes.append((DELETED, path, is_folder, None))
+            if is_folder:
+                self.forget_tree(path, remove=True)
+
+    def wait(self, timeout=None):
+        """:returns: `True` if there are events to read within ``timeout`` seconds"""
+        readable, _, _ = select.select([self.fileno], [], [], timeout)
+        return bool(readable)
+
+    def read_batch(self):
+        """keeps reading events for ``latency`` seconds"""
+        deadline = time.time() + self.latency
+        while True:
+            self.handle(inotify.read_events(self.fileno))
+            remaining = deadline - time.time()
+            if remaining <= 0 or not self.wait(remaining):
+                break
+
+        self.expire_moves()
+
+    def read_changes(self, timeout=None):
+        """
+        :returns: `list` of the changes of the next batch, not coalesced yet, or `None` if no events arrived within ``timeout``
+        """
+        if self.changes:
+            timeout = 0
+
+        arrived = self.wait(timeout)
+        if arrived:
+            self.read_batch()
+        elif not self.changes:
+            return None
+
+        changes, self.changes = self.changes, []
+        return changes
+
+    def read(self, timeout=None):
+        """waits for the next batch of events
+
+        :param timeout: how many seconds to wait for the first event (default: `None`, forever)
+        :returns: `list` of :py:class:`Event`, empty if none arrived within ``timeout``
+        """
+        return self.make_events(self.read_changes(timeout) or [])
+
+    def iter_events(self, timeout=None):
+        """
+        :param timeout: stop once no events arrive within that many seconds (default: `None`, never stop)
+        :returns: an iterator of :py:class:`Event`
+        """
+        while not self.closed:
+            changes = self.read_changes(timeout)
+            if changes is None and timeout is not None:
+                return
+
+            for event in self.make_events(changes or []):
+                yield event
+
+    def make_events(self, changes):
+        return [self.make_event(*change) for change in coalesce(changes)]
+
+    def make_node(self, path, is_folder):
+        NodeClass = is_folder and Folder or File
+        node = NodeClass(path, backend=self.backend)
+        # loaded when first accessed, deleted nodes have no info
+        node.invalidate_info()
+        return node
+
+    def make_event(self, kind, path, is_folder, source):
+        node = self.make_node(path, is_folder)
+        if kind == MOVED:
+            return Moved(node, self.make_node(source, is_folder))
+
+        return EVENT_CLASSES[kind](node)
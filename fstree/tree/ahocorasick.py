@@ -0,0 +1,134 @@
+"""
+`Aho-Corasick <https://en.wikipedia.org/wiki/Aho%E2%80%93Corasick_algorithm>`_
+automaton that finds any amount of byte strings in a single pass
+
+"""
+import re
+
+from collections import deque
+
+
+__all__ = [
+    'Automaton',
+]
+
+# how many bytes are copied out of a mapping at a time while scanning
+BLOCK_SIZE = 1024 * 1024
+
+
+class Automaton(object):
+    """a trie of the needles with failure links, so that every byte of
+    the data is visited once no matter how many needles there are.
+
+    While no needle is partially matched, the scan jumps straight to
+    the next byte that starts any of them.
+
+    ::
+
+        >>> automaton = Automaton([b'he', b'she', b'hers'])
+        >>> list(automaton.iter_matches(b'ushers'))
+        [(1, 'she'), (2, 'he'), (2, 'hers')]
+
+    :param needles: an iterable of non-empty ``bytes``
+    """
+
+    def __init__(self, needles):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [()]
+        for needle in set(needles):
+            if not needle:
+                raise ValueError('cannot search for empty needles')
+
+            self.add(needle)
+
+        self.build()
+        self.longest = max([len(needle) for output in self.outputs for needle in output] or [0])
+        first = ''.join(re.escape(char) for char in sorted(self.goto[0]))
+        self.find_start = re.compile('[{0}]'.format(first)).search if first else None
+
+    def __repr__(self):
+        return 'Automaton(states={0})'.format(len(self.goto))
+
+    def __len__(self):
+        return len(self.goto)
+
+    def add(self, needle):
+        state = 0
+        for char in needle:
+            following = self.goto[state].get(char)
+            if following is None:
+                following = self.goto[state][char] = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append(())
+
+            state = following
+
+        self.outputs[state] += (needle, )
+
+    def build(self):
+        """links every state to the longest suffix of it that is also
+        in the trie, in breadth-first order"""
+        pending = deque(self.goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, child in self.goto[state].iteritems():
+                pending.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+
+                link = self.goto[fallback].get(char, 0)
+                if link == child:
+                    link = 0
+
+                self.fail[child] = link
+                self.outputs[child] += self.outputs[link]
+
+    def iter_matches(self, data, start=0, end=None):
+        """
+        :param data: ``bytes`` or an ``mmap.mmap``
+        :param start: where to start scanning
+        :param end: where to stop scanning (defaults to the end of the data)
+        :returns: an iterator of ``(offset, needle)``, in the order of the end of each match
+        """
+        end = len(data) if end is None else end
+        if self.find_start is None:
+            return
+
+        state = 0
+        for base in xrange(start, end, BLOCK_SIZE):
+            state, matches = self.scan_block(data[base:min(base + BLOCK_SIZE, end)], state)
+            for offset, needle in matches:
+                yield base + offset, needle
+
+    def scan_block(self, block, state):
+        """
+        :param block: ``bytes``
+        :param state: the state reached at the end of the previous block
+        :returns: a ``(state, matches)`` tuple, where ``matches`` is a `list` of ``(offset, needle)`` relative to the block
+        """
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        matches = []
+        index, size = 0, len(block)
+        while index < size:
+            if not state:
+                found = self.find_start(block, index)
+                if found is None:
+                    break
+                index = found.start()
+
+            char = block[index]
+            following = goto[state].get(char)
+            while following is None and state:
+                state = fail[state]
+                following = goto[state].get(char)
+
+            state = following or 0
+            for needle in outputs[state]:
+                matches.append((index - len(needle) + 1, needle))
+
+            index += 1
+
+        return state, matches
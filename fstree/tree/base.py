@@ -1,8 +1,16 @@
-from fnmatch import fnmatch
-from itertools import chain
+import re
+
 from fstree.node import File
 from fstree.node import Folder
 from fstree.models import NodeInfo
+from fstree.tree.globbing import Glob
+from fstree.tree.search import RegexSearch
+from fstree.tree.search import bytes_searcher
+from fstree.tree.search import search_file
+from fstree.tree.index import TreeIndex
+from fstree.workers import parallel_map
+from fstree.workers import DEFAULT_MAX_WORKERS
+from fstree.backends.erase import DEFAULT_CHUNK_SIZE
 
 
 def expand_from_definition(parent, definition, TreeClass):
@@ -25,19 +33,41 @@ class BaseTree(Folder):
     :py:class:`~fstree.node.Folder` with node-traversal features.
     """
 
-    def iter_files(self):
-        """traverse all files recursively"""
-        for path in self.backend.iter_files(self.path):
-            yield File(path, latest=True)
+    def iter_all(self, load_info=True, **kw):
+        """traverse all sub-folders and files recursively, in a single
+        pass that takes the type of each node from the folder listing.
+
+        :param load_info: when `False` the info of each node is only loaded when first accessed
+        :param kw: passed to the ``iter_entries`` of the backend, e.g.: ``max_workers=32, ordered=False`` to list many folders at once
+        :returns: an iterator of :py:class:`~fstree.node.Folder` and :py:class:`~fstree.node.File`
+        """
+        for entry in self.backend.iter_entries(self.path, **kw):
+            NodeClass = entry.is_folder() and Folder or File
+            yield NodeClass.from_entry(entry, backend=self.backend, load_info=load_info)
+
+    def iter_files(self, load_info=True, **kw):
+        """traverse all files recursively, see :py:meth:`iter_all`"""
+        for entry in self.backend.iter_entries(self.path, **kw):
+            if not entry.is_folder():
+                yield File.from_entry(entry, backend=self.backend, load_info=load_info)
 
-    def iter_folders(self):
-        """traverse all sub-folders recursively"""
-        for path in self.backend.iter_files(self.path):
-            yield Folder(path, latest=True)
+    def iter_folders(self, load_info=True, **kw):
+        """traverse all sub-folders recursively, see :py:meth:`iter_all`"""
+        for entry in self.backend.iter_entries(self.path, **kw):
+            if entry.is_folder():
+                yield Folder.from_entry(entry, backend=self.backend, load_info=load_info)
 
-    def iter_all(self):
-        """traverse all sub-folders and files recursively"""
-        return chain(self.iter_folders(), self.iter_files())
+    def copy_to(self, destination, preserve_metadata=False, **kw):
+        """copies the whole tree, with
+        :py:meth:`~fstree.node.File.copy_to` semantics for each file.
+
+        :param destination: a path or `~Node` that must not exist yet
+        :param preserve_metadata: when `True` also copies the permission bits and times of every file and folder
+        :returns: a `~Tree` of the copy
+        """
+        path = getattr(destination, 'path', destination)
+        self.backend.copy_folder(self.path, path, preserve_metadata, **kw)
+        return Tree(path, backend=self.backend, logger=self.log, latest=True)
 
 
 class Tree(BaseTree):
@@ -48,24 +78,206 @@ class Tree(BaseTree):
     - find files by regexp
     - find binary files by raw byte search
     - find text files by regexp search
+    - find files in a persistent index
+    - watch changes as they happen (linux only)
 
     """
+    index = None
 
-    def glob(self, pattern, sortby=NodeInfo.fields.created_at):
-        """
+    def glob(self, pattern, sortby=None, exclude=None, load_info=True, **kw):
+        """finds files and folders by glob patterns, listing only the
+        sub-folders that can contain a match.
+
+        Patterns without ``/`` match names at any depth, otherwise the
+        path relative to the tree, where ``**`` matches any amount of
+        folders. Brace sets like ``*.{gif,png}`` are expanded.
+
+        When the tree has an index, see :py:meth:`build_index`, the
+        patterns are matched against it rather than the filesystem.
 
         ::
 
-            >>> tree.glob('./[0-9].*')
+            >>> list(tree.glob('./[0-9].*'))
             [File(path='/home/user/giphy/1.gif'), File(path='/home/user/giphy/2.gif')]
-            >>> tree.glob('*.gif')
+            >>> list(tree.glob('*.gif'))
             [File(path='/home/user/giphy/card.gif'), File(path='/home/user/giphy/2.gif')]
-            >>> tree.glob('?.gif')
-            File(path='/home/user/giphy/1.gif')
+            >>> list(tree.glob('?.gif'))
+            [File(path='/home/user/giphy/1.gif')]
+            >>> list(tree.glob(['**/*.{gif,png}'], exclude=['thumbs'], sortby=NodeInfo.fields.size))
+            [File(path='/home/user/giphy/1.gif'), File(path='/home/user/giphy/card.png')]
+
+        :param pattern: a pattern or `list` of patterns
+        :param sortby: the name of a :py:class:`~fstree.models.NodeInfo` field, or one of ``NodeInfo.fields``. The results are only sorted, and therefore collected, when given.
+        :param exclude: a pattern or `list` of patterns to leave out, along with everything under the folders they match
+        :param load_info: when `False` the info of each node is only loaded when first accessed
+        :param kw: passed to the ``iter_entries`` of the backend, see :py:meth:`iter_all`
+        :returns: an iterator of :py:class:`~fstree.node.Folder` and :py:class:`~fstree.node.File`
+        """
+        if self.index is not None and not kw:
+            nodes = self.index.iter_nodes(self.backend, pattern=pattern, exclude=exclude)
+        else:
+            nodes = self.iter_glob(Glob(pattern, exclude), load_info, **kw)
+
+        if sortby is None:
+            return nodes
+
+        field = getattr(sortby, 'field', sortby)
+        if field not in NodeInfo.__fields__:
+            raise ValueError('cannot sort by {0!r}, must be one of: {1}'.format(
+                field, ', '.join(NodeInfo.__fields__)))
+
+        return iter(sorted(nodes, key=lambda node: getattr(node.info, field)))
+
+    def iter_glob(self, matcher, load_info=True, **kw):
+        for entry in matcher.select(self.backend.iter_entries, self.path, **kw):
+            NodeClass = entry.is_folder() and Folder or File
+            yield NodeClass.from_entry(entry, backend=self.backend, load_info=load_info)
+
+    def build_index(self, path, checksum=None, max_workers=None):
+        """stores the path, type, size, mtime, inode, mode and optionally
+        the checksum of every file and folder in a SQLite database, so
+        that :py:meth:`find` and :py:meth:`glob` no longer walk the tree.
+
+        ::
+
+            >>> tree.build_index('/var/cache/photos.db')
+            >>> tree.refresh_index()
+            RefreshReport(checked=1204, scanned=2, added=5, updated=0, removed=1)
+            >>> list(tree.find('*.jpg', newer_than=yesterday))
+
+        :param path: the path to the database, which is created if needed
+        :param checksum: the name of a ``hashlib`` algorithm to also store the checksum of every file, e.g.: ``"sha1"``
+        :param max_workers: when given, lists that many folders at once
+        :returns: the :py:class:`~fstree.tree.index.TreeIndex`
+        """
+        index = TreeIndex(path, self.path, checksum=checksum)
+        index.build(max_workers)
+        self.index = index
+        return index
+
+    def open_index(self, path):
+        """uses an index previously built with :py:meth:`build_index`
+
+        :param path: the path to the database
+        :returns: the :py:class:`~fstree.tree.index.TreeIndex`
+        """
+        self.index = TreeIndex.open(path, root=self.path)
+        return self.index
+
+    def get_index(self):
+        if self.index is None:
+            msg = 'Tree(path="{0}") has no index, see build_index()'.format(self.path)
+            raise RuntimeError(msg)
+
+        return self.index
+
+    def refresh_index(self):
+        """updates the index listing again only the folders whose mtime
+        changed, see :py:meth:`~fstree.tree.index.TreeIndex.refresh`
+
+        :returns: a :py:class:`~fstree.tree.index.RefreshReport`
+        """
+        return self.get_index().refresh()
+
+    def find(self, pattern=None, **kw):
+        """finds files and folders in the index of the tree
+
+        ::
+
+            >>> list(tree.find('*.log', type='FILE', min_size=100 * 1024 * 1024))
+            [File(path='/var/log/syslog.1')]
+
+        :param pattern: an optional glob pattern or `list` of them
+        :param kw: the filters of :py:meth:`~fstree.tree.index.TreeIndex.query`: ``exclude``, ``type``, ``min_size``, ``max_size``, ``newer_than`` and ``older_than``
+        :returns: an iterator of :py:class:`~fstree.node.Folder` and :py:class:`~fstree.node.File`, sorted by path
+        """
+        return self.get_index().iter_nodes(self.backend, pattern=pattern, **kw)
+
+    def grep(self, pattern, flags=re.MULTILINE, **kw):
+        """finds the lines of text files that match a regular
+        expression, skipping the files with null-bytes in the
+        beginning like GNU grep does.
+
+        ::
+
+            >>> for match in tree.grep(r'TODO|FIXME', include='*.py'):
+            ...     print match.node.path, match.offset, match.data
+
+        :param pattern: a regular expression, either compiled or not
+        :param flags: the flags of ``re.compile`` (default: ``re.MULTILINE``)
+        :param kw: see :py:meth:`search`
+        :returns: an iterator of :py:class:`~fstree.tree.search.Match` with the matching line as ``data``, once per line
+        """
+        return self.search(RegexSearch(pattern, flags), **kw)
+
+    def search_bytes(self, needles, **kw):
+        """finds every occurrence of any of the given byte strings in
+        all the files, binary or not. From 16 needles on they are
+        searched through an Aho-Corasick automaton, so that each file
+        is scanned once no matter how many needles there are.
+
+        ::
+
+            >>> for match in tree.search_bytes([b'\\x7fELF', b'MZ\\x90\\x00']):
+            ...     print match.node.path, match.offset, repr(match.data)
+
+        :param needles: a ``bytes`` needle or a `list` of them, e.g.: thousands of tokens read from a file
+        :param kw: see :py:meth:`search`
+        :returns: an iterator of :py:class:`~fstree.tree.search.Match` with the needle found as ``data``
+        """
+        return self.search(bytes_searcher(needles), **kw)
+
+    def search(self, searcher, include=None, exclude=None, max_workers=DEFAULT_MAX_WORKERS, ordered=False,
+               chunk_size=DEFAULT_CHUNK_SIZE, use_mmap=True, onerror=None):
+        """scans the content of every regular file once, many files
+        at once in a pool of threads. Symlinks are not followed.
+
+        :param searcher: a :py:class:`~fstree.tree.search.RegexSearch`, :py:class:`~fstree.tree.search.BytesSearch` or :py:class:`~fstree.tree.search.AhoCorasickSearch`, which can be reused across searches
+        :param include: an optional glob pattern or `list` of them, see :py:meth:`glob`
+        :param exclude: an optional glob pattern or `list` of them, see :py:meth:`glob`
+        :param max_workers: how many files are scanned at once (default: **16**)
+        :param ordered: when `True` the files come in the order of the traversal, otherwise as soon as they are scanned
+        :param chunk_size: how many bytes per read, when a file cannot be mapped into memory (default: **1MB**)
+        :param use_mmap: when `True` (default) maps each file into memory rather than reading it in chunks
+        :param onerror: an optional callable that receives the ``IOError`` or ``OSError`` of files that cannot be read, which are skipped otherwise.
+        :returns: an iterator of :py:class:`~fstree.tree.search.Match`, in the order of their offsets within each file
+        """
+        if include is None and exclude is None:
+            entries = self.backend.iter_entries(self.path, onerror=onerror)
+        else:
+            entries = Glob(include or '*', exclude).select(self.backend.iter_entries, self.path, onerror=onerror)
+
+        nodes = (
+            File.from_entry(entry, backend=self.backend, load_info=False)
+            for entry in entries if entry.is_file(follow_symlinks=False)
+        )
+
+        def scan(node):
+            return search_file(node, searcher, chunk_size, use_mmap, onerror)
+
+        for node, matches in parallel_map(scan, nodes, max_workers, ordered=ordered):
+            for match in matches:
+                yield match
+
+    def watch(self, recursive=True, latency=0.05):
+        """watches the changes of every file and folder in the tree
+        through inotify, see :py:class:`~fstree.platforms.linux.watcher.Watcher`
+
+        ::
+
+            >>> with tree.watch() as watcher:
+            ...     for event in watcher:
+            ...         if isinstance(event, Rescan):
+            ...             index.refresh()
+
+        :param recursive: when `True` (default) also watches every sub-folder
+        :param latency: how many seconds to keep reading after the first event of a batch, so that bursts of changes are coalesced (default: **0.05**)
+        :raises OSError: with ``errno.ENOSYS`` in platforms without inotify
+        :returns: a :py:class:`~fstree.platforms.linux.watcher.Watcher`, which should be closed when done
         """
-        for item in self.iter_all():
-            if fnmatch(item.name, pattern):
-                yield item
+        # inotify is only available on linux
+        from fstree.platforms.linux.watcher import Watcher
+        return Watcher(self.path, backend=self.backend, recursive=recursive, latency=latency)
 
     def destroy(self):
         """destroys a tree and optionally scrubs the data in every
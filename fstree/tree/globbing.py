@@ -0,0 +1,261 @@
+"""
+glob engine that matches paths one segment at a time, so that the
+folders which cannot contain any match are never listed
+
+"""
+import os
+import re
+
+from fnmatch import translate
+
+
+__all__ = [
+    'expand_braces',
+    'GlobPattern',
+    'Glob',
+]
+
+RECURSIVE = '**'
+MAGIC_CHARS = re.compile(r'[*?\[]')
+
+
+def expand_braces(pattern):
+    """expands the brace sets of a pattern, including nested ones.
+    Braces without commas are kept as they are.
+
+    ::
+
+        >>> expand_braces('src/{lib,bin}/*.{py,pyc}')
+        ['src/lib/*.py', 'src/lib/*.pyc', 'src/bin/*.py', 'src/bin/*.pyc']
+
+    :param pattern: a glob pattern
+    :returns: `list` of patterns without duplicates, in order
+    """
+    bounds = find_braces(pattern)
+    if bounds is None:
+        return [pattern]
+
+    prefix, suffix = pattern[:bounds[0]], pattern[bounds[-1] + 1:]
+    results = []
+    for left, right in zip(bounds, bounds[1:]):
+        for expanded in expand_braces(prefix + pattern[left + 1:right] + suffix):
+            if expanded not in results:
+                results.append(expanded)
+
+    return results
+
+
+def find_braces(pattern):
+    """
+    :returns: `list` with the offsets of the opening brace, the commas and the closing brace of the first brace set with commas, or `None`
+    """
+    depth = 0
+    bounds = []
+    for index, char in enumerate(pattern):
+        if char == '{':
+            bounds = depth and bounds or [index]
+            depth += 1
+
+        elif char == ',' and depth == 1:
+            bounds.append(index)
+
+        elif char == '}' and depth > 0:
+            depth -= 1
+            if not depth and len(bounds) > 1:
+                return bounds + [index]
+
+    return None
+
+
+def compile_segment(segment):
+    if segment == RECURSIVE:
+        return RECURSIVE
+
+    if not MAGIC_CHARS.search(segment):
+        return segment
+
+    return re.compile(translate(segment)).match
+
+
+class GlobPattern(object):
+    """a single pattern without braces, compiled into one matcher per
+    path segment.
+
+    Patterns without ``/`` match the name of files and folders at any
+    depth. The other ones, including those starting with ``./``, are
+    matched against the whole path relative to the root of the
+    traversal, where ``**`` stands for any amount of folders, including
+    none.
+
+    :param pattern: a glob pattern, e.g.: ``"*.py"``, ``"./docs/*.rst"`` or ``"src/**/test_*.py"``
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        parts = [part for part in pattern.split('/') if part and part != '.']
+        if '/' not in pattern.rstrip('/'):
+            parts.insert(0, RECURSIVE)
+
+        segments = []
+        for part in parts:
+            if part == RECURSIVE and segments and segments[-1] == RECURSIVE:
+                continue
+
+            segments.append(compile_segment(part))
+
+        self.segments = tuple(segments)
+
+    def __repr__(self):
+        return 'GlobPattern({0!r})'.format(self.pattern)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def matches_segment(self, index, name):
+        segment = self.segments[index]
+        if segment == RECURSIVE:
+            return True
+
+        if isinstance(segment, basestring):
+            return segment == name
+
+        return segment(name) is not None
+
+
+class Glob(object):
+    """matches relative paths against many include and exclude
+    patterns at once.
+
+    The state of a path is the set of ``(pattern, segment)`` positions
+    reached by its segments, so that the state of each entry is derived
+    from the state of its folder and the name of the entry alone.
+
+    :param include: a pattern or `list` of patterns, with brace sets
+    :param exclude: a pattern or `list` of patterns that discard the paths they match, along with everything under them
+    """
+
+    def __init__(self, include, exclude=None):
+        self.patterns = []
+        self.excluding = []
+        for excluding, patterns in ((False, include), (True, exclude)):
+            if isinstance(patterns, basestring):
+                patterns = [patterns]
+
+            for pattern in patterns or []:
+                for expanded in expand_braces(pattern):
+                    self.patterns.append(GlobPattern(expanded))
+                    self.excluding.append(excluding)
+
+        self.initial = self.closure((index, 0) for index in range(len(self.patterns)))
+
+    def __repr__(self):
+        return 'Glob({0!r})'.format([pattern.pattern for pattern in self.patterns])
+
+    def closure(self, states):
+        """adds the positions right after every ``**``, which also matches no folders at all"""
+        result = set()
+        pending = list(states)
+        while pending:
+            index, position = state = pending.pop()
+            if state in result:
+                continue
+
+            result.add(state)
+            segments = self.patterns[index].segments
+            if position < len(segments) and segments[position] == RECURSIVE:
+                pending.append((index, position + 1))
+
+        return frozenset(result)
+
+    def step(self, states, name):
+        """
+        :param states: the state of the folder
+        :param name: the name of an entry in the folder
+        :returns: the state of the entry
+        """
+        reached = []
+        for index, position in states:
+            pattern = self.patterns[index]
+            if position >= len(pattern):
+                continue
+
+            if pattern.segments[position] == RECURSIVE:
+                reached.append((index, position))
+            elif pattern.matches_segment(position, name):
+                reached.append((index, position + 1))
+
+        return self.closure(reached)
+
+    def is_complete(self, state):
+        index, position = state
+        return position == len(self.patterns[index])
+
+    def is_excluded(self, states):
+        return any(self.excluding[state[0]] and self.is_complete(state) for state in states)
+
+    def is_included(self, states):
+        return not self.is_excluded(states) and any(
+            self.is_complete(state) for state in states if not self.excluding[state[0]])
+
+    def can_descend(self, states):
+        """:returns: `True` if anything under a folder with the given state can still be included"""
+        return not self.is_excluded(states) and any(
+            not self.is_complete(state) for state in states if not self.excluding[state[0]])
+
+    def state_of(self, path):
+        """
+        :param path: a path relative to the root of the traversal
+        :returns: the state of the path, `None` if a folder in it is excluded
+        """
+        states = self.initial
+        for name in path.split('/'):
+            if not name or name == '.':
+                continue
+
+            if self.is_excluded(states):
+                return None
+
+            states = self.step(states, name)
+
+        return states
+
+    def match(self, path):
+        """
+        :param path: a path relative to the root of the traversal
+        :returns: `True` if the path is included and not excluded
+        """
+        states = self.state_of(path)
+        return states is not None and self.is_included(states)
+
+    def select(self, iter_entries, path, **kw):
+        """traverses a folder skipping the sub-folders that cannot
+        contain any match
+
+        :param iter_entries: the ``iter_entries`` of a backend, which must accept ``descend``
+        :param path: the path to the folder
+        :param kw: passed to ``iter_entries``
+        :returns: an iterator of the entries that match
+        """
+        # ``descend`` is called for a folder right after it comes up,
+        # so only the last one is remembered. The state of a folder is
+        # worked out again from its path once its entries come up,
+        # since every folder is listed at once.
+        descending = set()
+        current, parent_states = None, self.initial
+
+        def descend(entry):
+            return entry.path in descending
+
+        for entry in iter_entries(path, descend=descend, **kw):
+            parent = os.path.dirname(entry.path)
+            if parent != current:
+                current = parent
+                parent_states = self.state_of(os.path.relpath(parent, path))
+
+            states = self.step(parent_states, entry.name)
+            if self.is_included(states):
+                yield entry
+
+            descending.clear()
+            if self.can_descend(states):
+                descending.add(entry.path)
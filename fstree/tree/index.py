@@ -0,0 +1,401 @@
+"""
+persistent index of a tree in a SQLite database, refreshed by listing
+again only the folders that changed since the last time
+
+"""
+import os
+import stat
+import time
+import hashlib
+import sqlite3
+
+from datetime import datetime
+from collections import namedtuple
+
+from fstree.node import File
+from fstree.node import Folder
+from fstree.node import types
+from fstree.backends.erase import DEFAULT_CHUNK_SIZE
+from fstree.backends.walker import walk
+from fstree.backends.walker import parallel_walk
+from fstree.backends.walker import scan_folder
+from fstree.backends.walker import filetype_from_mode
+from fstree.tree.globbing import Glob
+
+
+__all__ = [
+    'IndexRecord',
+    'RefreshReport',
+    'TreeIndex',
+]
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    inode INTEGER NOT NULL,
+    mode INTEGER NOT NULL,
+    checksum TEXT
+);
+CREATE INDEX IF NOT EXISTS nodes_parent ON nodes (parent);
+CREATE INDEX IF NOT EXISTS nodes_size ON nodes (size);
+CREATE INDEX IF NOT EXISTS nodes_mtime ON nodes (mtime);
+'''
+
+FIELDS = ('path', 'type', 'size', 'mtime', 'inode', 'mode', 'checksum')
+
+# how many rows are inserted at once
+BATCH_SIZE = 1000
+
+# the root folder itself is stored with an empty path
+ROOT = ''
+
+FOLDER = types.FolderType.__symbol__
+SYMLINK = types.SymlinkType.__symbol__
+
+
+class IndexRecord(namedtuple('IndexRecord', FIELDS)):
+    """a file or folder as last seen by the index. The ``path`` is
+    relative to the root of the tree and the ``type`` is the
+    ``__symbol__`` of its :py:class:`~fstree.node.types.BaseFileType`,
+    e.g.: ``"FILE"`` or ``"FOLDER"``"""
+    __slots__ = ()
+
+    @property
+    def is_folder(self):
+        return self.type == FOLDER
+
+
+class RefreshReport(object):
+    """the result of :py:meth:`TreeIndex.refresh`"""
+
+    def __init__(self):
+        self.checked = 0
+        self.scanned = 0
+        self.added = 0
+        self.updated = 0
+        self.removed = 0
+
+    def __repr__(self):
+        return 'RefreshReport(checked={0}, scanned={1}, added={2}, updated={3}, removed={4})'.format(
+            self.checked, self.scanned, self.added, self.updated, self.removed)
+
+
+def to_timestamp(value):
+    if isinstance(value, datetime):
+        return time.mktime(value.timetuple()) + value.microsecond / 1e6
+
+    return value
+
+
+def file_checksum(path, algorithm, chunk_size=DEFAULT_CHUNK_SIZE):
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as fd:
+        for chunk in iter(lambda: fd.read(chunk_size), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class TreeIndex(object):
+    """stores the path, type, size, mtime, inode, mode and optionally a
+    checksum of every file and folder under ``root``.
+
+    :py:meth:`refresh` only lists again the folders whose mtime or
+    inode changed, which is when files were added, removed or renamed
+    in them. Files modified in place do not change the mtime of their
+    folder, so they are only noticed by :py:meth:`build`.
+
+    ::
+
+        >>> index = TreeIndex('/var/cache/photos.db', '/srv/photos')
+        >>> index.build()
+        >>> for record in index.query('*.jpg', min_size=1024 * 1024):
+        ...     print record.path, record.size
+
+    :param db_path: the path to the SQLite database, which is created if needed
+    :param root: the path to the root folder of the tree
+    :param checksum: the name of a ``hashlib`` algorithm to also store the checksum of every file, e.g.: ``"sha1"`` (default: `None`)
+    """
+
+    def __init__(self, db_path, root, checksum=None):
+        if checksum is not None:
+            hashlib.new(checksum)
+
+        self.db_path = db_path
+        self.root = root.rstrip(os.sep) or os.sep
+        self.checksum = checksum
+        self.connection = sqlite3.connect(db_path)
+        self.connection.text_factory = str
+        self.connection.executescript(SCHEMA)
+
+    def __repr__(self):
+        return 'TreeIndex(db_path={0!r}, root={1!r})'.format(self.db_path, self.root)
+
+    @classmethod
+    def open(cls, db_path, root=None):
+        """opens an existing index with the settings it was built with
+
+        :param db_path: the path to the SQLite database
+        :param root: overrides the root folder stored in the index
+        """
+        connection = sqlite3.connect(db_path)
+        connection.text_factory = str
+        try:
+            settings = dict(connection.execute('SELECT name, value FROM settings'))
+        except sqlite3.OperationalError:
+            settings = {}
+        finally:
+            connection.close()
+
+        if 'root' not in settings and root is None:
+            raise ValueError('{0} is not a tree index'.format(db_path))
+
+        return cls(db_path, root or settings['root'], settings.get('checksum') or None)
+
+    def close(self):
+        self.connection.close()
+
+    def absolute_path(self, path):
+        if not path:
+            return self.root
+
+        return os.path.join(self.root, path)
+
+    def relative_path(self, path):
+        return os.path.relpath(path, self.root)
+
+    def record(self, path, st):
+        """
+        :param path: the absolute path of the file or folder
+        :param st: its ``lstat`` result
+        :returns: the :py:class:`IndexRecord` of the path
+        """
+        checksum = None
+        if self.checksum is not None and stat.S_ISREG(st.st_mode):
+            checksum = file_checksum(path, self.checksum)
+
+        relative = path != self.root and self.relative_path(path) or ROOT
+        return IndexRecord(
+            relative,
+            filetype_from_mode(st.st_mode).__symbol__,
+            st.st_size,
+            st.st_mtime,
+            st.st_ino,
+            st.st_mode,
+            checksum,
+        )
+
+    def build(self, max_workers=None):
+        """replaces the content of the index with every file and folder under the root
+
+        :param max_workers: when given, lists that many folders at once
+        :returns: `int` how many files and folders were indexed
+        """
+        with self.connection:
+            self.connection.execute('DELETE FROM nodes')
+            self.connection.executemany('INSERT OR REPLACE INTO settings VALUES (?, ?)', [
+                ('root', self.root),
+                ('checksum', self.checksum or ''),
+            ])
+            self.insert([self.record(self.root, os.lstat(self.root))])
+            count = self.index_subtree(self.root, max_workers)
+
+        return count
+
+    def index_subtree(self, path, max_workers=None):
+        if max_workers:
+            entries = parallel_walk(path, max_workers)
+        else:
+            entries = walk(path)
+
+        count = 0
+        batch = []
+        for entry in entries:
+            try:
+                batch.append(self.record(entry.path, entry.lstat()))
+            except EnvironmentError:
+                # removed or unreadable in the meantime
+                continue
+
+            if len(batch) >= BATCH_SIZE:
+                count += self.insert(batch)
+                batch = []
+
+        return count + self.insert(batch)
+
+    def insert(self, records):
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO nodes (parent, path, type, size, mtime, inode, mode, checksum) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [(os.path.dirname(record.path), ) + tuple(record) for record in records])
+        return len(records)
+
+    def remove(self, path, recursive=True):
+        """:returns: `int` how many rows were removed"""
+        if path == ROOT and recursive:
+            return self.connection.execute('DELETE FROM nodes').rowcount
+
+        cursor = self.connection.execute('DELETE FROM nodes WHERE path = ?', (path, ))
+        count = cursor.rowcount
+        if recursive:
+            # every path under "a/" sorts between "a/" and "a0"
+            cursor = self.connection.execute(
+                'DELETE FROM nodes WHERE path > ? AND path < ?', (path + '/', path + '0'))
+            count += cursor.rowcount
+
+        return count
+
+    def get(self, path):
+        """
+        :param path: a path relative to the root
+        :returns: an :py:class:`IndexRecord` or `None`
+        """
+        row = self.connection.execute(
+            'SELECT {0} FROM nodes WHERE path = ?'.format(', '.join(FIELDS)), (path, )).fetchone()
+        return row and IndexRecord(*row)
+
+    def refresh(self):
+        """lists again the folders whose mtime or inode changed, adding
+        the new files and folders, updating the changed ones and
+        removing the ones that are gone.
+
+        :returns: a :py:class:`RefreshReport`
+        """
+        report = RefreshReport()
+        folders = self.connection.execute(
+            'SELECT path, mtime, inode FROM nodes WHERE type = ? ORDER BY path',
+            (FOLDER, )).fetchall()
+
+        with self.connection:
+            for path, mtime, inode in folders:
+                report.checked += 1
+                try:
+                    st = os.lstat(self.absolute_path(path))
+                except OSError:
+                    report.removed += self.remove(path)
+                    continue
+
+                if not stat.S_ISDIR(st.st_mode):
+                    # replaced by a file, which its parent takes care of
+                    continue
+
+                if st.st_mtime != mtime or st.st_ino != inode:
+                    self.rescan(path, st, report)
+
+        return report
+
+    def rescan(self, path, st, report):
+        report.scanned += 1
+        folder = self.absolute_path(path)
+        children = dict(
+            (row[0], IndexRecord(*row)) for row in self.connection.execute(
+                'SELECT {0} FROM nodes WHERE parent = ? AND path != ?'.format(', '.join(FIELDS)), (path, ROOT)))
+
+        try:
+            entries = list(scan_folder(folder))
+        except OSError:
+            report.removed += self.remove(path)
+            return
+
+        changed = list(self.iter_changes(entries, children, report))
+        for previous in children.values():
+            report.removed += self.remove(previous.path, recursive=previous.is_folder)
+
+        changed.append(self.record(folder, st))
+        self.insert(changed)
+
+    def iter_changes(self, entries, children, report):
+        """yields the records of the entries that are new or changed,
+        popping from ``children`` the ones that are still there"""
+        for entry in entries:
+            try:
+                record = self.record(entry.path, entry.lstat())
+            except EnvironmentError:
+                continue
+
+            previous = children.pop(record.path, None)
+            if previous is None:
+                yield self.added(record, report)
+            elif previous[1:] != record[1:] and not self.is_same_folder(previous, record):
+                yield self.updated(previous, record, report)
+
+    def is_same_folder(self, previous, record):
+        # the folder is checked on its own, updating its mtime here
+        # would hide its changes
+        return previous.is_folder and record.is_folder and previous.inode == record.inode
+
+    def added(self, record, report):
+        report.added += 1
+        if record.is_folder:
+            report.added += self.index_subtree(self.absolute_path(record.path))
+
+        return record
+
+    def updated(self, previous, record, report):
+        if previous.is_folder:
+            self.remove(previous.path)
+
+        report.updated += 1
+        if record.is_folder:
+            report.added += self.index_subtree(self.absolute_path(record.path))
+
+        return record
+
+    def query(self, pattern=None, exclude=None, type=None, min_size=None, max_size=None, newer_than=None, older_than=None):
+        """finds files and folders in the index rather than the filesystem
+
+        :param pattern: an optional glob pattern or `list` of them, with the semantics of :py:class:`~fstree.tree.globbing.Glob`
+        :param exclude: an optional glob pattern or `list` of them
+        :param type: an optional :py:class:`~fstree.node.types.BaseFileType` subclass or its ``__symbol__``, e.g.: ``"FILE"``
+        :param min_size: the minimum size in bytes, inclusive
+        :param max_size: the maximum size in bytes, inclusive
+        :param newer_than: a unix timestamp or ``datetime``, only the nodes modified after it are found
+        :param older_than: a unix timestamp or ``datetime``, only the nodes modified before it are found
+        :returns: an iterator of :py:class:`IndexRecord`, sorted by path
+        """
+        clauses = ['path != ?']
+        params = [ROOT]
+        for clause, value in (
+                ('type = ?', getattr(type, '__symbol__', type)),
+                ('size >= ?', min_size),
+                ('size <= ?', max_size),
+                ('mtime > ?', to_timestamp(newer_than)),
+                ('mtime < ?', to_timestamp(older_than))):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+
+        matcher = None
+        if pattern is not None or exclude is not None:
+            # matched here rather than through a function of the
+            # connection, which cannot be replaced while another
+            # query is still running
+            matcher = Glob(pattern or '*', exclude)
+
+        sql = 'SELECT {0} FROM nodes WHERE {1} ORDER BY path'.format(', '.join(FIELDS), ' AND '.join(clauses))
+        for row in self.connection.execute(sql, params):
+            record = IndexRecord(*row)
+            if matcher is None or matcher.match(record.path):
+                yield record
+
+    def iter_nodes(self, backend=None, **kw):
+        """same as :py:meth:`query`, but yields a :py:class:`~fstree.node.File` or
+        :py:class:`~fstree.node.Folder` per record, whose info is only
+        loaded from the filesystem when first accessed
+        """
+        for record in self.query(**kw):
+            path = self.absolute_path(record.path)
+            # like the filesystem glob, symlinks to folders are folders
+            is_folder = record.is_folder or (record.type == SYMLINK and os.path.isdir(path))
+            NodeClass = is_folder and Folder or File
+            node = NodeClass(path, backend=backend)
+            node.invalidate_info()
+            yield node
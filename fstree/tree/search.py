@@ -0,0 +1,281 @@
+"""
+content search engine that scans each file once, either through a
+read-only mapping or in large chunks
+
+"""
+import re
+
+from itertools import chain
+from collections import namedtuple
+
+from fstree.backends.erase import DEFAULT_CHUNK_SIZE
+from fstree.tree.ahocorasick import Automaton
+
+
+__all__ = [
+    'Match',
+    'RegexSearch',
+    'BytesSearch',
+    'AhoCorasickSearch',
+    'bytes_searcher',
+    'search_file',
+]
+
+# how many bytes from the beginning of a file are checked for null-bytes
+BINARY_CHECK_SIZE = 8192
+
+# from how many needles on an automaton is faster than a regular
+# expression, which tries every needle at every offset
+AUTOMATON_THRESHOLD = 16
+
+
+class Match(namedtuple('Match', 'node offset data')):
+    """a match found in a file: ``data`` is the matching line for
+    :py:class:`RegexSearch` and the needle found for :py:class:`BytesSearch`
+    """
+    __slots__ = ()
+
+
+def is_binary(data):
+    """:returns: `True` if there is a null-byte in the beginning of the data, like GNU grep does"""
+    return data.find(b'\0', 0, BINARY_CHECK_SIZE) != -1
+
+
+class RegexSearch(object):
+    """finds the lines that match a regular expression, once per line.
+
+    :param pattern: a regular expression, either compiled or not
+    :param flags: the flags of ``re.compile``, when the pattern is not compiled yet (default: ``re.MULTILINE``)
+    """
+    skip_binary = True
+
+    def __init__(self, pattern, flags=re.MULTILINE):
+        if isinstance(pattern, unicode):
+            pattern = pattern.encode('utf-8')
+
+        if isinstance(pattern, basestring):
+            pattern = re.compile(pattern, flags)
+
+        self.regex = pattern
+
+    def __repr__(self):
+        return 'RegexSearch({0!r})'.format(self.regex.pattern)
+
+    def search(self, data, final=True):
+        """
+        :param data: ``bytes`` or an ``mmap.mmap``
+        :param final: `False` when more data follows, in which case the last incomplete line is left for the next call
+        :returns: a ``(consumed, matches)`` tuple, where ``matches`` is a `list` of ``(offset, line)`` within the first ``consumed`` bytes
+        """
+        end = len(data) if final else data.rfind(b'\n') + 1
+        matches = []
+        position = 0
+        while position < end:
+            match = self.regex.search(data, position, end)
+            if match is None:
+                break
+
+            offset = match.start()
+            start = data.rfind(b'\n', 0, offset) + 1
+            stop = data.find(b'\n', offset, end)
+            if stop == -1:
+                stop = end
+
+            matches.append((offset, data[start:stop]))
+            position = stop + 1
+
+        return end, matches
+
+
+class BytesSearch(object):
+    """finds every occurrence of every needle, in binary and text
+    files alike.
+
+    :param needles: a ``bytes`` needle or a `list` of them
+    """
+    skip_binary = False
+
+    def __init__(self, needles):
+        if isinstance(needles, basestring):
+            needles = [needles]
+
+        self.needles = sorted(set(needles), key=len, reverse=True)
+        if not self.needles or not self.needles[-1]:
+            raise ValueError('cannot search for empty needles')
+
+        # the longest needles come first in the alternation, so that
+        # they win over their own prefixes, which then also match there
+        self.regex = re.compile(b'|'.join(re.escape(needle) for needle in self.needles))
+        self.prefixes = dict(
+            (needle, [other for other in self.needles if len(other) < len(needle) and needle.startswith(other)])
+            for needle in self.needles)
+        self.overlap = len(self.needles[0]) - 1
+
+    def __repr__(self):
+        return 'BytesSearch({0} needles)'.format(len(self.needles))
+
+    def search(self, data, final=True):
+        """
+        :param data: ``bytes`` or an ``mmap.mmap``
+        :param final: `False` when more data follows, in which case the last bytes that could be the beginning of a needle are left for the next call
+        :returns: a ``(consumed, matches)`` tuple, where ``matches`` is a `list` of ``(offset, needle)`` starting within the first ``consumed`` bytes
+        """
+        end = len(data) if final else max(len(data) - self.overlap, 0)
+        matches = []
+        position = 0
+        while position < end:
+            match = self.regex.search(data, position)
+            if match is None or match.start() >= end:
+                break
+
+            position = match.start()
+            matches.append((position, match.group()))
+            matches.extend((position, prefix) for prefix in self.prefixes[match.group()])
+            position += 1
+
+        return end, matches
+
+
+class AhoCorasickSearch(object):
+    """finds every occurrence of every needle, in binary and text files
+    alike, through an :py:class:`~fstree.tree.ahocorasick.Automaton`
+    that is built once and visits each byte of the data once.
+
+    :param needles: a ``bytes`` needle or a `list` of them
+    """
+    skip_binary = False
+
+    def __init__(self, needles):
+        if isinstance(needles, basestring):
+            needles = [needles]
+
+        self.automaton = Automaton(needles)
+        if not self.automaton.longest:
+            raise ValueError('cannot search for empty needles')
+
+        self.overlap = self.automaton.longest - 1
+
+    def __repr__(self):
+        return 'AhoCorasickSearch({0!r})'.format(self.automaton)
+
+    def search(self, data, final=True):
+        """same as :py:meth:`BytesSearch.search`"""
+        end = len(data) if final else max(len(data) - self.overlap, 0)
+        matches = [
+            (offset, needle) for offset, needle in self.automaton.iter_matches(data)
+            if offset < end
+        ]
+        matches.sort(key=lambda match: (match[0], -len(match[1])))
+        return end, matches
+
+
+def bytes_searcher(needles):
+    """
+    :param needles: a ``bytes`` needle or a `list` of them
+    :returns: an :py:class:`AhoCorasickSearch` for many needles, otherwise a :py:class:`BytesSearch`
+    """
+    if isinstance(needles, basestring):
+        needles = [needles]
+
+    needles = set(needles)
+    if len(needles) >= AUTOMATON_THRESHOLD:
+        return AhoCorasickSearch(needles)
+
+    return BytesSearch(needles)
+
+
+def search_chunks(searcher, chunks, max_carry=DEFAULT_CHUNK_SIZE):
+    """feeds the chunks to the searcher, carrying over what it leaves
+    for the next call so that matches across chunks are found.
+
+    Once the carry grows beyond ``max_carry``, e.g. a long line
+    without newlines, the rest of the chunks are searched at once
+    rather than searching the growing carry again with each chunk.
+
+    :returns: an iterator of ``(offset, data)``
+    """
+    chunks = iter(chunks)
+    carry = b''
+    base = 0
+    for chunk in chunks:
+        if len(carry) > max_carry:
+            carry = b''.join(chain([carry, bytes(chunk)], (bytes(rest) for rest in chunks)))
+            break
+
+        data = carry + bytes(chunk)
+        consumed, matches = searcher.search(data, final=False)
+        for offset, found in matches:
+            yield base + offset, found
+
+        carry = data[consumed:]
+        base += consumed
+
+    if carry:
+        consumed, matches = searcher.search(carry, final=True)
+        for offset, found in matches:
+            yield base + offset, found
+
+
+def search_fd(backend, fd, searcher, chunk_size=DEFAULT_CHUNK_SIZE, use_mmap=True):
+    """
+    :returns: `list` of ``(offset, data)``
+    """
+    if use_mmap:
+        matches = search_mapped_fd(backend, fd, searcher)
+        if matches is not None:
+            return matches
+
+    chunk_size = max(chunk_size, BINARY_CHECK_SIZE)
+    chunks = backend.iter_fd(fd, chunk_size)
+    first = next(chunks, b'')
+    if searcher.skip_binary and is_binary(first):
+        return []
+
+    return list(search_chunks(searcher, chain([first], chunks), chunk_size))
+
+
+def search_mapped_fd(backend, fd, searcher):
+    """
+    :returns: `list` of ``(offset, data)``, or `None` if the file cannot be mapped into memory
+    """
+    try:
+        mapping = backend.mmap_fd(fd, 'read')
+    except ValueError:
+        # empty files cannot be mapped
+        return []
+    except EnvironmentError:
+        # e.g.: files of pseudo-filesystems, read them in chunks instead
+        return None
+
+    try:
+        if searcher.skip_binary and is_binary(mapping):
+            return []
+
+        return searcher.search(mapping, final=True)[1]
+    finally:
+        mapping.close()
+
+
+def search_file(node, searcher, chunk_size=DEFAULT_CHUNK_SIZE, use_mmap=True, onerror=None):
+    """searches the whole content of a file
+
+    :param node: a :py:class:`~fstree.node.File`
+    :param searcher: a :py:class:`RegexSearch`, :py:class:`BytesSearch` or :py:class:`AhoCorasickSearch`
+    :param chunk_size: how many bytes per read, when the file is not mapped into memory (default: **1MB**)
+    :param use_mmap: when `True` (default) tries to map the file into memory before reading it in chunks
+    :param onerror: an optional callable that receives the ``IOError`` or ``OSError`` of files that cannot be read, which are skipped otherwise.
+    :returns: `list` of :py:class:`Match`
+    """
+    backend = node.backend
+    try:
+        fd = backend.open_fd(node.path, 'rb', access='sequential')
+        try:
+            matches = search_fd(backend, fd, searcher, chunk_size, use_mmap)
+        finally:
+            backend.close_fd(fd)
+    except EnvironmentError as e:
+        if onerror is not None:
+            onerror(e)
+        return []
+
+    return [Match(node, offset, found) for offset, found in matches]
@@ -5,13 +5,55 @@ utility components used across the fstree codebase
 import sys
 
 
+class FieldSorter(object):
+    """sorts items by the value of one of their attributes"""
+
+    def __init__(self, field):
+        self.field = field
+
+    def __repr__(self):
+        return 'FieldSorter({0!r})'.format(self.field)
+
+    def __call__(self, items):
+        return sorted(items, key=self.key)
+
+    def key(self, item):
+        return getattr(item, self.field, None)
+
+
 class Sorter(object):
     def __init__(self, fields):
         for name in fields:
-            setattr(self, name, lambda items: self._sorted(name, items))
+            setattr(self, name, FieldSorter(name))
+
+
+class frozendict(dict):
+    """a `dict` that cannot be changed after created, which makes it
+    safe to share the same instance among many objects"""
+    __slots__ = ()
+
+    def __readonly__(self, *args, **kw):
+        raise TypeError('{0} is immutable'.format(self.__class__.__name__))
+
+    __setitem__ = __readonly__
+    __delitem__ = __readonly__
+    clear = __readonly__
+    pop = __readonly__
+    popitem = __readonly__
+    setdefault = __readonly__
+    update = __readonly__
+
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
-    def _sorted(self, name, items):
-        return sorted(items, key=lambda i: getattr(i, name, None))
+    def __reduce__(self):
+        return (self.__class__, (dict(self), ))
 
 
 def objectid(item):
@@ -0,0 +1,97 @@
+"""
+bounded pools of threads used to overlap blocking filesystem calls
+
+"""
+import sys
+
+from Queue import Queue
+from collections import deque
+from multiprocessing.pool import ThreadPool
+
+
+__all__ = [
+    'DEFAULT_MAX_WORKERS',
+    'parallel_map',
+]
+
+DEFAULT_MAX_WORKERS = 16
+
+
+class Outcome(object):
+    __slots__ = ('item', 'result', 'exc_info')
+
+    def __init__(self, item, result=None, exc_info=None):
+        self.item = item
+        self.result = result
+        self.exc_info = exc_info
+
+    def unwrap(self):
+        if self.exc_info is not None:
+            exc_type, exc_value, traceback = self.exc_info
+            raise exc_type, exc_value, traceback
+
+        return self.item, self.result
+
+
+def call_safely(func, item):
+    try:
+        return Outcome(item, func(item))
+    except Exception:
+        return Outcome(item, exc_info=sys.exc_info())
+
+
+def iter_ordered(pool, func, items, backlog):
+    pending = deque()
+    for item in items:
+        pending.append(pool.apply_async(call_safely, (func, item)))
+        if len(pending) >= backlog:
+            yield pending.popleft().get().unwrap()
+
+    while pending:
+        yield pending.popleft().get().unwrap()
+
+
+def iter_unordered(pool, func, items, backlog):
+    done = Queue()
+    in_flight = 0
+    for item in items:
+        pool.apply_async(call_safely, (func, item), callback=done.put)
+        in_flight += 1
+        if in_flight >= backlog:
+            in_flight -= 1
+            yield done.get().unwrap()
+
+    while in_flight:
+        in_flight -= 1
+        yield done.get().unwrap()
+
+
+def parallel_map(func, items, max_workers=DEFAULT_MAX_WORKERS, ordered=True, backlog=None):
+    """calls ``func(item)`` for every item in a bounded pool of
+    threads, streaming the results back as ``(item, result)`` tuples.
+
+    At most ``backlog`` items are in flight at any time, so that
+    arbitrarily large iterables can be consumed with bounded memory.
+
+    :param func: a callable that takes a single item
+    :param items: an iterable
+    :param max_workers: how many threads (default: **16**)
+    :param ordered: when `True` the results come in the same order of ``items``, otherwise as soon as they complete.
+    :param backlog: how many items can be in flight (defaults to twice the ``max_workers``)
+    :raises: the exception raised by ``func``, as soon as its result is reached.
+    :returns: an iterator of ``(item, result)``
+    """
+    max_workers = max(int(max_workers or 1), 1)
+    backlog = max(int(backlog or max_workers * 2), 1)
+
+    pool = ThreadPool(max_workers)
+    if ordered:
+        results = iter_ordered(pool, func, items, backlog)
+    else:
+        results = iter_unordered(pool, func, items, backlog)
+
+    try:
+        for result in results:
+            yield result
+    finally:
+        pool.terminate()
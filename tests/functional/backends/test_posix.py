@@ -1,8 +1,15 @@
 "\033[0;33mBackends\n========\n\n\033[0;32mfstree.backends.Posix\033[0m"
 
 import os
+import errno
 import tempfile
 
+from mock import patch
+
+from fstree.backends.posix import Posix
+from fstree.backends.cache import MetadataCache
+from fstree.backends.pool import FdPool
+
 from fstree.default import backend
 
 from tests.functional.scenarios import posix
@@ -164,3 +171,280 @@ def test_collapse_path(context):
     open(target, 'wb').write('foobar')
 
     backend.collapse_path(target).should.match(r'^~')
+
+
+@posix
+def test_load_info(context):
+    ("can load the node info out of a single stat call")
+
+    # Given a file with 32 random bytes
+    target = '{0}/foo.bin'.format(context.path)
+    open(target, 'wb').write(os.urandom(32))
+    nstat = os.stat(target)
+
+    # When I load its info
+    info = backend.load_info(target)
+
+    # Then it should contain the real stat values
+    info.uid.should.equal(nstat.st_uid)
+    info.gid.should.equal(nstat.st_gid)
+    info.size.should.equal(32)
+    info.last_accessed.should.equal(nstat.st_atime)
+    info.last_changed.should.equal(nstat.st_ctime)
+    info.last_modified.should.equal(nstat.st_mtime)
+    info.access_policy.path.should.equal(target)
+
+
+@posix
+def test_load_info_from_existing_stat(context):
+    ("can load the node info from an existing stat result without any syscall")
+
+    # Given a file with 16 random bytes
+    target = '{0}/foo.bin'.format(context.path)
+    open(target, 'wb').write(os.urandom(16))
+    nstat = os.stat(target)
+
+    # When I load its info passing the existing stat result
+    with patch.object(backend, 'stat_path') as stat_path:
+        info = backend.load_info(target, st=nstat)
+
+    # Then the backend should not have stat'ed the path again
+    stat_path.called.should.be.false
+
+    # And the info should contain the given stat values
+    info.size.should.equal(16)
+    info.last_modified.should.equal(nstat.st_mtime)
+
+
+@posix
+def test_load_info_many(context):
+    ("can load the info of many paths in a pool of threads")
+
+    # When I load the info of all files in the sandbox
+    result = list(backend.load_info_many(context.files, max_workers=2))
+
+    # Then it should have returned the info of each path in order
+    [path for path, info in result].should.equal(context.files)
+    for path, info in result:
+        info.size.should.equal(os.stat(path).st_size)
+
+
+@posix
+def test_stat_many_unordered(context):
+    ("can stat many paths streaming the results as they complete")
+
+    result = dict(backend.stat_many(context.files, ordered=False))
+
+    sorted(result).should.equal(sorted(context.files))
+    for path, data in result.items():
+        data['size'].should.equal(os.stat(path).st_size)
+
+
+@posix
+def test_metadata_cache(context):
+    ("can share a metadata cache that is invalidated by its own writes")
+
+    # Given a backend with a metadata cache
+    cache = MetadataCache()
+    cached = Posix(cache=cache)
+    target = '{0}/foo.bin'.format(context.path)
+
+    # When I check that a path does not exist
+    cached.exists(target).should.be.false
+
+    # Then the next checks come from the cache
+    with patch('fstree.backends.posix.os.stat') as stat:
+        cached.is_file(target).should.be.false
+        cached.is_folder(target).should.be.false
+
+    stat.called.should.be.false
+
+    # And writing to it discards the cached metadata
+    cached.write_to_file(target, '\0' * 16)
+    cached.is_file(target).should.be.true
+    cached.load_info(target).size.should.equal(16)
+
+    # And other backends can share the same cache
+    Posix(cache=cache).get_file_size(target).should.equal(16)
+
+    # And deleting it also discards the cached metadata
+    cached.delete_file(target).should.be.true
+    cached.exists(target).should.be.false
+
+    # And the same path is cached once however it is written
+    other = '{0}/./bar.bin'.format(context.path)
+    cached.exists(other).should.be.false
+    cached.write_to_file('{0}/bar.bin'.format(context.path), 'bar')
+    cached.exists(other).should.be.true
+
+    # And creating nested folders discards the cached metadata of every one of them
+    nested = '{0}/a/b/c'.format(context.path)
+    cached.exists('{0}/a'.format(context.path)).should.be.false
+    cached.exists('{0}/a/b'.format(context.path)).should.be.false
+    cached.create_folder(nested).should.be.true
+    cached.is_folder('{0}/a'.format(context.path)).should.be.true
+    cached.is_folder('{0}/a/b'.format(context.path)).should.be.true
+    cached.is_folder(nested).should.be.true
+
+
+@posix
+def test_durability_policy(context):
+    ("can choose when written data is synced to disk")
+
+    # Given a backend that only syncs files when closing them
+    lazy = Posix(durability='close')
+    target = '{0}/foo.bin'.format(context.path)
+
+    # When I write a file through it
+    with patch('fstree.backends.durability.os.fsync') as fsync:
+        lazy.write_to_file(target, 'foobar')
+
+    # Then it was synced exactly once
+    fsync.call_count.should.equal(1)
+
+    # And a per-call override can skip the sync
+    with patch('fstree.backends.durability.os.fsync') as fsync:
+        fd = lazy.open_fd(target, 'wb')
+        lazy.write_fd(fd, 'foo', durability='none')
+        fsync.called.should.be.false
+        lazy.write_fd(fd, 'bar', sync=True)
+        lazy.close_fd(fd)
+
+    fsync.call_count.should.equal(1)
+    lazy.read_from_file(target).should.equal('bar')
+
+
+@posix
+def test_sync_parent(context):
+    ("syncs the parent folder of created files and folders")
+
+    target = '{0}/foo/bar'.format(context.path)
+    with patch('fstree.backends.posix.os.fsync') as fsync:
+        Posix().create_folder(target)
+        Posix(durability='none').sync_parent(target).should.be.false
+
+    # the new "foo" and the sandbox, which both have a new entry
+    fsync.call_count.should.equal(2)
+
+
+@posix
+def test_readv_and_writev(context):
+    ("can read and write many buffers at an offset")
+
+    target = '{0}/foo.bin'.format(context.path)
+    backend = Posix()
+
+    with backend.open_fd(target, 'wb+') as fd:
+        backend.writev_fd(fd, [b'foo', b'bar'], 2).should.equal(6)
+        backend.write_fd(fd, b'baz', 8).should.equal(3)
+
+        first, second = bytearray(5), bytearray(6)
+        backend.readv_fd(fd, [first, second], 0).should.equal(11)
+        first.should.equal(bytearray(b'\0\0foo'))
+        second.should.equal(bytearray(b'barbaz'))
+        backend.read_fd(fd, 3, 5).should.equal(b'bar')
+        fd.tell().should.equal(0)
+
+
+@posix
+def test_positional_reads_see_buffered_writes(context):
+    ("reading at an offset sees what was written through the buffer")
+
+    target = '{0}/foo.bin'.format(context.path)
+    backend = Posix(durability='close')
+
+    with backend.open_fd(target, 'wb+') as fd:
+        backend.write_fd(fd, b'0123456789')
+        backend.write_fd(fd, b'XYZ', offset=-3)
+        backend.read_fd(fd, 4, offset=6).should.equal(b'6XYZ')
+
+        backend.write_fd(fd, b'abc', offset=0)
+        buf = bytearray(3)
+        backend.readinto_fd(fd, buf, offset=1).should.equal(3)
+        buf.should.equal(bytearray(b'bc3'))
+
+        backend.write_fd(fd, b'def', offset=-3)
+        first, second = bytearray(2), bytearray(3)
+        backend.readv_fd(fd, [first, second], 5).should.equal(5)
+        second.should.equal(bytearray(b'def'))
+
+
+@posix
+def test_access_hints(context):
+    ("can hint how files are going to be accessed")
+
+    target = '{0}/foo.bin'.format(context.path)
+    backend = Posix()
+    backend.write_to_file(target, b'x' * 10000)
+
+    with patch('fstree.backends.libc.posix_fadvise') as fadvise:
+        fd = backend.open_fd(target, 'rb', access='sequential')
+        fadvise.assert_called_once_with(fd.fileno(), 0, 0, 2)
+
+        list(backend.iter_fd(fd, chunk_size=4096, drop_cache=True)).should.have.length_of(3)
+        [c[0][1:] for c in fadvise.call_args_list[1:]].should.equal([
+            (0, 4096, 4), (4096, 4096, 4), (8192, 1808, 4),
+        ])
+        backend.close_fd(fd)
+
+    with backend.open_fd(target, 'rb', access='random') as fd:
+        backend.advise_fd(fd, 'willneed').should.be.true
+        backend.readahead_fd(fd)
+
+    backend.advise_fd.when.called_with(fd, 'often').should.throw(
+        ValueError, "invalid access hint 'often', must be one of: dontneed, noreuse, normal, random, sequential, willneed")
+
+    with patch('fstree.backends.posix.io.open') as io_open:
+        backend.open_fd.when.called_with(target, 'rb', access='often').should.throw(ValueError, 'invalid access hint')
+
+    io_open.called.should.be.false
+
+    unsupported = OSError(errno.ENOSYS, 'not supported')
+    with patch('fstree.backends.libc.posix_fadvise', side_effect=unsupported):
+        with backend.open_fd(target, 'rb', access='noreuse') as fd:
+            backend.advise_fd(fd, 'dontneed').should.be.false
+
+
+@posix
+def test_fd_pool(context):
+    ("can reuse the file-descriptors of repeated reads")
+
+    pool = FdPool()
+    pooled = Posix(fd_pool=pool)
+    target = '{0}/foo.bin'.format(context.path)
+    pooled.write_to_file(target, b'foo')
+
+    # When I read the same file many times
+    for _ in range(3):
+        pooled.read_from_file(target).should.equal(b'foo')
+
+    # Then it was opened only once
+    (pool.hits, pool.misses).should.equal((2, 1))
+    len(pool).should.equal(1)
+
+    # And writing through the backend discards the idle file-descriptor
+    pooled.write_to_file(target, b'bar')
+    len(pool).should.equal(0)
+    pooled.read_from_file(target).should.equal(b'bar')
+
+    # And files replaced by others are opened again
+    replacement = target + '.new'
+    with open(replacement, 'wb') as fd:
+        fd.write(b'baz')
+    os.rename(replacement, target)
+    pooled.read_from_file(target).should.equal(b'baz')
+
+    # And other modes are not pooled
+    fd = pooled.open_fd(target, 'rb+')
+    pooled.close_fd(fd)
+    fd.closed.should.be.true
+    len(pool).should.equal(0)
+
+    # And copies hand the source back to the pool
+    hits = pool.hits
+    for name in ('copy-1.bin', 'copy-2.bin'):
+        pooled.copy_file(target, '{0}/{1}'.format(context.path, name))
+        len(pool).should.equal(1)
+
+    pool.hits.should.equal(hits + 1)
+    pooled.read_from_file('{0}/copy-2.bin'.format(context.path)).should.equal(b'baz')
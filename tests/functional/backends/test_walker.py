@@ -0,0 +1,113 @@
+"\033[0;33mBackends\n========\n\n\033[0;32mfstree.backends.walker\033[0m"
+
+import os
+
+from fstree.node import types
+from fstree.backends.walker import walk
+from fstree.backends.walker import parallel_walk
+from fstree.backends.walker import scan_folder
+
+from tests.functional.scenarios import posix
+
+
+@posix
+def test_scan_folder(context):
+    ("scan_folder() lists the immediate children of a folder")
+
+    entries = dict((e.name, e) for e in scan_folder(context.path))
+
+    entries.should.have.key('README.md')
+    entries['README.md'].is_file().should.be.true
+    entries['README.md'].is_folder().should.be.false
+    entries['README.md'].filetype.should.equal(types.FileType)
+
+    entries.should.have.key('sub-sub-folder-1')
+    entries['sub-sub-folder-1'].is_folder().should.be.true
+    entries['sub-sub-folder-1'].filetype.should.equal(types.FolderType)
+
+
+@posix
+def test_walk(context):
+    ("walk() yields every file and folder recursively")
+
+    entries = list(walk(context.path))
+
+    files = sorted(e.path for e in entries if e.is_file())
+    files.should.equal(sorted(context.files))
+
+    folders = [e.path for e in entries if e.is_folder()]
+    folders.should.have.length_of(3)
+
+
+@posix
+def test_walk_reuses_stat(context):
+    ("the entries cache their stat data")
+
+    for entry in walk(context.path):
+        entry.stat().should.be(entry.stat())
+        entry.stat().st_size.should.equal(os.lstat(entry.path).st_size)
+
+
+@posix
+def test_walk_does_not_follow_symlinks(context):
+    ("walk() yields symlinks to folders without descending into them")
+
+    os.symlink(context.path, os.path.join(context.path, 'loop'))
+
+    entries = dict((e.name, e) for e in walk(context.path))
+
+    entries.should.have.key('loop')
+    entries['loop'].is_symlink().should.be.true
+    entries['loop'].filetype.should.equal(types.SymlinkType)
+    sorted(e.path for e in entries.values() if e.is_file()).should.equal(
+        sorted(context.files))
+
+
+def create_wide_tree(root, width=4, depth=3):
+    for index in range(width):
+        folder = os.path.join(root, 'wide-{0}'.format(index))
+        os.mkdir(folder)
+        open(os.path.join(folder, 'file.txt'), 'wb').close()
+        if depth > 1:
+            create_wide_tree(folder, width, depth - 1)
+
+
+@posix
+def test_parallel_walk_ordered(context):
+    ("parallel_walk() yields the same entries of walk() in the same order when ordered")
+
+    create_wide_tree(context.path)
+    expected = [e.path for e in walk(context.path)]
+
+    entries = list(parallel_walk(context.path, max_workers=4, backlog=3, ordered=True))
+
+    [e.path for e in entries].should.equal(expected)
+    for entry in entries:
+        entry._lstat.should_not.be.none
+
+
+@posix
+def test_parallel_walk_unordered(context):
+    ("parallel_walk() yields the same entries of walk() in any order")
+
+    create_wide_tree(context.path)
+    expected = sorted(e.path for e in walk(context.path))
+
+    sorted(e.path for e in parallel_walk(context.path, max_workers=8)).should.equal(expected)
+
+    entries = list(parallel_walk(context.path, max_workers=2, processes=True))
+    sorted(e.path for e in entries).should.equal(expected)
+    files = [e for e in entries if e.is_file()]
+    files.should_not.be.empty
+    files[0].filetype.should.equal(types.FileType)
+
+
+@posix
+def test_parallel_walk_errors(context):
+    ("parallel_walk() reports the folders that cannot be listed")
+
+    errors = []
+    list(parallel_walk(os.path.join(context.path, 'missing'), onerror=errors.append)).should.be.empty
+
+    errors.should.have.length_of(1)
+    errors[0].should.be.an(OSError)
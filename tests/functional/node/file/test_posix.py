@@ -2,9 +2,12 @@
 
 "\033[0;33m@posix\n======\n\n\033[0;32mfstree.File\033[0m"
 import os
+import errno
+from mock import patch
 from fstree import File
 from fstree.meta import FileDescriptor
 from fstree.default import backend
+from fstree.workers import parallel_map
 from fstree.exceptions import FileAlreadyOpen
 from fstree.exceptions import InvalidFileDescriptor
 
@@ -169,3 +172,312 @@ def test_destroy(context):
     empty = File(path, parent=context.sandbox).create()
     empty.destroy().should.be.true
     empty.destroy().should.be.true
+
+
+@posix
+def test_refresh_fstat(context):
+    ("can be refreshed from the fstat of its file-descriptor")
+
+    bin1 = File('1.bin', parent=context.sandbox, refresh='fstat').create()
+
+    SubScenario('append bytes leaving open returns the same node updated in place')
+    with patch.object(bin1.backend, 'stat_path') as stat_path:
+        result = bin1.append_bytes('foo', autoclose=False)
+        result = result.append_bytes('bar', autoclose=False)
+
+    stat_path.called.should.be.false
+    result.should.be(bin1)
+    bin1.size.should.equal(6)
+
+    SubScenario('closing also updates the node before releasing the fd')
+    bin1.close().should.be(bin1)
+    bin1.fd.should.be.none
+    bin1.size.should.equal(6)
+
+
+@posix
+def test_refresh_lazy(context):
+    ("can defer reloading its info until next accessed")
+
+    bin1 = File('1.bin', parent=context.sandbox).create('foo', refresh='lazy')
+
+    with patch.object(bin1.backend, 'load_info', wraps=bin1.backend.load_info) as load_info:
+        result = bin1.append_bytes('bar', refresh='lazy')
+        result.should.be(bin1)
+        load_info.called.should.be.false
+
+        bin1.size.should.equal(6)
+        bin1.info.size.should.equal(6)
+
+    load_info.call_count.should.equal(1)
+
+
+@posix
+def test_refresh_invalid(context):
+    ("refuses unknown refresh modes")
+
+    File.when.called_with('1.bin', parent=context.sandbox, refresh='eager').should.throw(
+        ValueError, "invalid refresh mode 'eager', must be one of: fstat, latest, lazy")
+
+    bin1 = File('1.bin', parent=context.sandbox).create('foo')
+    bin1.append_bytes.when.called_with('bar', refresh='eager').should.throw(ValueError, 'invalid refresh mode')
+
+    SubScenario('closing checks the file-descriptor once')
+    bin1 = File('2.bin', parent=context.sandbox).create('foo', autoclose=False)
+    with patch.object(bin1, 'validate_fd', wraps=bin1.validate_fd) as validate_fd:
+        bin1.close()
+
+    validate_fd.call_count.should.equal(1)
+
+
+@posix
+def test_create_loads_info_once(context):
+    ("create() reloads its info only once")
+
+    nfile = File('1.bin', parent=context.sandbox)
+    with patch.object(nfile.backend, 'load_info', wraps=nfile.backend.load_info) as load_info:
+        nfile.create('foobar').size.should.equal(6)
+
+    load_info.call_count.should.equal(1)
+
+
+@posix
+def test_erase_bytes(context):
+    ("can erase its bytes without changing its size")
+
+    nfile = File('1.bin', parent=context.sandbox).create(os.urandom(4096))
+
+    SubScenario('with the default random and zeros passes')
+    nfile.erase_bytes().size.should.equal(4096)
+    nfile.read_bytes().should.equal(b'\0' * 4096)
+
+    SubScenario('with a custom pattern')
+    nfile.erase_bytes(patterns=['ones'])
+    nfile.read_bytes().should.equal(b'\xff' * 4096)
+
+
+@posix
+def test_create_with_size(context):
+    ("can preallocate files of a given size")
+
+    SubScenario('through posix_fallocate')
+    nfile = File('1.bin', parent=context.sandbox).create(size=8 * 1024 * 1024)
+    nfile.size.should.equal(8 * 1024 * 1024)
+    nfile.read_bytes(16, offset=-16).should.equal(b'\0' * 16)
+
+    SubScenario('streaming zeros when fallocate is not supported')
+    unsupported = OSError(errno.EOPNOTSUPP, 'not supported')
+    with patch('fstree.backends.libc.posix_fallocate', side_effect=unsupported):
+        nfile = File('2.bin', parent=context.sandbox).create(size=3 * 1024 * 1024 + 1)
+
+    nfile.size.should.equal(3 * 1024 * 1024 + 1)
+    nfile.read_bytes().should.equal(b'\0' * (3 * 1024 * 1024 + 1))
+
+
+@posix
+def test_copy_to(context):
+    ("can copy itself without reading its content into memory")
+
+    data = os.urandom(3 * 1024 * 1024 + 7)
+    nfile = File('1.bin', parent=context.sandbox).create(data)
+    os.chmod(nfile.path, 0o600)
+
+    SubScenario('into a new path')
+    copy = nfile.copy_to(context.sandbox.expand_path('2.bin'))
+    copy.should.be.a(File)
+    copy.size.should.equal(len(data))
+    (copy.read_bytes() == data).should.be.true
+
+    SubScenario('into an existing folder, preserving its metadata')
+    folder = context.sandbox.create_folder('copies')
+    copy = nfile.copy_to(folder, preserve_metadata=True)
+    copy.path.should.equal(folder.expand_path('1.bin'))
+    (os.stat(copy.path).st_mode & 0o777).should.equal(0o600)
+    int(os.stat(copy.path).st_mtime).should.equal(int(os.stat(nfile.path).st_mtime))
+
+    for method in ('copy_file_range', 'sendfile', 'chunks'):
+        SubScenario('through {0}'.format(method))
+        copy = nfile.copy_to(context.sandbox.expand_path(method), methods=[method], chunk_size=4096)
+        (copy.read_bytes() == data).should.be.true
+
+    SubScenario('onto itself, or into its own folder, leaves it untouched')
+    nfile.copy_to.when.called_with(nfile.path).should.throw(ValueError, 'onto itself')
+    nfile.copy_to.when.called_with(context.sandbox).should.throw(ValueError, 'onto itself')
+    link = context.sandbox.expand_path('link.bin')
+    os.symlink(nfile.path, link)
+    nfile.copy_to.when.called_with(link).should.throw(ValueError, 'onto itself')
+    (nfile.read_bytes() == data).should.be.true
+
+
+@posix
+def test_mmap_and_read_view(context):
+    ("can read bytes through memory mappings")
+
+    nfile = File('1.bin', parent=context.sandbox).create(b'0123456789')
+
+    SubScenario('mmap')
+    mapping = nfile.mmap()
+    mapping[2:5].should.equal(b'234')
+    mapping.close()
+
+    SubScenario('mmap for writing')
+    mapping = nfile.mmap(access='write')
+    mapping[0:1] = b'X'
+    mapping.close()
+    nfile.read_bytes().should.equal(b'X123456789')
+
+    SubScenario('read_view reuses the same mapping')
+    view = nfile.read_view(4, 3)
+    bytes(view).should.equal(b'456')
+    mapping = nfile._mapping
+    bytes(nfile.read_view(8)).should.equal(b'89')
+    bytes(nfile.read_view(8, 100)).should.equal(b'89')
+    nfile._mapping.should.be(mapping)
+
+    SubScenario('writing drops the mapping')
+    nfile = nfile.write_bytes(b'abc', refresh='fstat')
+    nfile._mapping.should.be.none
+    bytes(nfile.read_view()).should.equal(b'abc')
+    nfile.unmap()
+
+    SubScenario('empty files')
+    empty = File('2.bin', parent=context.sandbox).create()
+    bytes(empty.read_view()).should.equal(b'')
+
+
+@posix
+def test_write_at_and_positional_reads(context):
+    ("can read and write at offsets without moving the file position")
+
+    nfile = File('1.bin', parent=context.sandbox).create(b'0123456789')
+
+    SubScenario('write_at')
+    nfile = nfile.write_at(3, b'abc', refresh='fstat')
+    nfile.fd.tell().should.equal(0)
+    nfile.write_at(8, [b'XY', bytearray(b'Z')], refresh='fstat')
+    nfile.size.should.equal(11)
+    nfile.close()
+    nfile.read_bytes().should.equal(b'012abc67XYZ')
+
+    SubScenario('concurrent read_bytes with offsets')
+    fd = nfile.open('rb')
+    results = parallel_map(lambda offset: nfile.read_bytes(2, offset=offset, rewind=False), range(10))
+    dict(results).should.equal(dict((i, b'012abc67XYZ'[i:i + 2]) for i in range(10)))
+    fd.tell().should.equal(0)
+    nfile.close(fd)
+
+
+@posix
+def test_iter_chunks_and_readinto(context):
+    ("can stream its content in chunks")
+
+    data = os.urandom(10000)
+    nfile = File('1.bin', parent=context.sandbox).create(data)
+
+    SubScenario('iter_chunks')
+    chunks = list(nfile.iter_chunks(4096))
+    map(len, chunks).should.equal([4096, 4096, 1808])
+    (b''.join(chunks) == data).should.be.true
+
+    SubScenario('iter_chunks of a range')
+    (b''.join(nfile.iter_chunks(100, offset=50, length=250)) == data[50:300]).should.be.true
+
+    SubScenario('iter_chunks reusing a buffer')
+    buf = bytearray(3000)
+    received = []
+    for chunk in nfile.iter_chunks(buf=buf, offset=9000):
+        chunk.should.be.a(memoryview)
+        received.append(chunk.tobytes())
+
+    (b''.join(received) == data[9000:]).should.be.true
+
+    SubScenario('readinto')
+    buf = bytearray(10)
+    nfile.readinto(buf, offset=9995).should.equal(5)
+    (bytes(buf[:5]) == data[9995:]).should.be.true
+    nfile.readinto(buf, offset=20000).should.equal(0)
+
+
+@posix
+def test_atomic_writes(context):
+    ("can replace its content atomically")
+
+    nfile = File('1.bin', parent=context.sandbox).create(b'old')
+    os.chmod(nfile.path, 0o640)
+    inode = os.stat(nfile.path).st_ino
+
+    SubScenario('write_bytes(atomic=True)')
+    with patch('fstree.backends.durability.os.fsync') as fsync:
+        nfile = nfile.write_bytes(b'new', atomic=True)
+
+    # the temporary file once, then the folder
+    fsync.call_count.should.equal(2)
+    nfile.read_bytes().should.equal(b'new')
+    nfile.size.should.equal(3)
+    os.stat(nfile.path).st_ino.should_not.equal(inode)
+    (os.stat(nfile.path).st_mode & 0o777).should.equal(0o640)
+
+    SubScenario('a failed writer leaves the file untouched')
+    try:
+        with nfile.atomic_writer() as fd:
+            fd.write(b'torn')
+            raise RuntimeError('boom')
+    except RuntimeError:
+        pass
+
+    nfile.read_bytes().should.equal(b'new')
+    sorted(os.listdir(context.sandbox.path)).should.equal(['1.bin', 'README.md', 'sub-sub-folder-1'])
+
+    SubScenario('create(atomic=True)')
+    created = File('2.bin', parent=context.sandbox).create(b'created', atomic=True)
+    created.read_bytes().should.equal(b'created')
+
+    SubScenario('create(atomic=True, force=True) leaves the old file untouched until it is replaced')
+    with open(created.path, 'rb') as old:
+        File('2.bin', parent=context.sandbox).create(b'forced', atomic=True, force=True)
+        old.read().should.equal(b'created')
+
+    created.read_bytes().should.equal(b'forced')
+
+    SubScenario('a batch syncs each folder once')
+    names = ['a.bin', 'b.bin', 'c.bin']
+    with patch('fstree.backends.posix.os.fsync') as fsync:
+        with context.backend.atomic_batch() as batch:
+            for name in names:
+                File(name, parent=context.sandbox).write_bytes(name, atomic=batch)
+
+            os.path.exists(context.sandbox.expand_path('a.bin')).should.be.false
+
+    # the three temporary files, then the folder only once
+    fsync.call_count.should.equal(4)
+    for name in names:
+        File(name, parent=context.sandbox).read_bytes().should.equal(name)
+
+
+@posix
+def test_sparse_files(context):
+    ("can create, copy and erase sparse files without filling their holes")
+
+    size = 16 * 1024 * 1024
+    nfile = File('1.bin', parent=context.sandbox).create(size=size, sparse=True)
+    nfile.size.should.equal(size)
+    os.stat(nfile.path).st_blocks.should.equal(0)
+    list(nfile.iter_data_extents()).should.equal([])
+
+    SubScenario('with some data in the middle')
+    nfile = nfile.write_at(4 * 1024 * 1024, b'A' * 4096, autoclose=True)
+    extents = list(nfile.iter_data_extents())
+    extents.should.equal([(4 * 1024 * 1024, 4 * 1024 * 1024 + 4096)])
+
+    SubScenario('copying the data extents only')
+    for method in ('copy_file_range', 'chunks'):
+        copy = nfile.copy_to(context.sandbox.expand_path(method), methods=[method])
+        copy.size.should.equal(size)
+        list(copy.iter_data_extents()).should.equal(extents)
+        copy.read_bytes(4096, offset=4 * 1024 * 1024).should.equal(b'A' * 4096)
+
+    SubScenario('erasing the data extents only')
+    nfile = nfile.erase_bytes(patterns=['ones'])
+    list(nfile.iter_data_extents()).should.equal(extents)
+    nfile.read_bytes(4096, offset=4 * 1024 * 1024).should.equal(b'\xff' * 4096)
+    nfile.read_bytes(4096).should.equal(b'\0' * 4096)
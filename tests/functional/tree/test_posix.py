@@ -0,0 +1,442 @@
+"\033[0;33m@posix\n======\n\n\033[0;32mfstree.Tree\033[0m"
+
+import os
+import shutil
+
+from mock import patch
+
+from fstree import File
+from fstree.node import Folder
+from fstree.tree.search import AhoCorasickSearch
+
+from tests.functional.scenarios import posix
+
+
+@posix
+def test_iter_files(context):
+    ("can traverse all files recursively")
+
+    files = list(context.sandbox.iter_files())
+
+    sorted(f.path for f in files).should.equal(sorted(context.files))
+
+    for node in files:
+        node.should.be.a(File)
+        node.info.should.be.a('fstree.models.NodeInfo')
+        node.size.should.equal(os.stat(node.path).st_size)
+
+
+@posix
+def test_copy_to(context):
+    ("can copy the whole tree")
+
+    link = context.sandbox.expand_path('link.md')
+    os.symlink('README.md', link)
+    destination = context.path + '-copy'
+
+    try:
+        copy = context.sandbox.copy_to(destination, preserve_metadata=True)
+        copied = sorted(f.path for f in copy.iter_files())
+
+        copied.should.equal(sorted(
+            os.path.join(destination, os.path.relpath(path, context.path))
+            for path in context.files + [link]))
+
+        for path in context.files:
+            target = os.path.join(destination, os.path.relpath(path, context.path))
+            open(target, 'rb').read().should.equal(open(path, 'rb').read())
+
+        os.readlink(os.path.join(destination, 'link.md')).should.equal('README.md')
+    finally:
+        os.unlink(link)
+        shutil.rmtree(destination, ignore_errors=True)
+
+
+@posix
+def test_iter_files_in_parallel(context):
+    ("can traverse all files listing many folders at once")
+
+    files = list(context.sandbox.iter_files(max_workers=4, ordered=False))
+
+    sorted(f.path for f in files).should.equal(sorted(context.files))
+
+
+@posix
+def test_iter_folders_and_iter_all(context):
+    ("can traverse all folders, or everything, in a single pass")
+
+    folders = list(context.sandbox.iter_folders())
+    sorted(f.path for f in folders).should.equal(sorted(
+        os.path.dirname(path) for path in context.files[1:]))
+
+    for node in folders:
+        node.should.be.a(Folder)
+        node.info.should.be.a('fstree.models.NodeInfo')
+
+    nodes = list(context.sandbox.iter_all())
+    nodes.should.have.length_of(len(folders) + len(context.files))
+    sorted(n.path for n in nodes if isinstance(n, File)).should.equal(sorted(context.files))
+
+
+@posix
+def test_iter_all_without_loading_info(context):
+    ("can traverse everything loading the info of the nodes on demand")
+
+    with patch('fstree.backends.posix.Posix.load_info', autospec=True) as load_info:
+        nodes = list(context.sandbox.iter_all(load_info=False))
+
+    load_info.called.should.be.false
+    nodes.should.have.length_of(len(context.files) + 3)
+
+    readme = [n for n in nodes if n.name == 'README.md'][0]
+    readme.size.should.equal(os.stat(readme.path).st_size)
+
+
+@posix
+def test_glob(context):
+    ("can find files and folders by glob patterns")
+
+    def names(nodes):
+        return sorted(os.path.relpath(n.path, context.path) for n in nodes)
+
+    names(context.sandbox.glob('*.txt')).should.equal(sorted(
+        os.path.relpath(path, context.path) for path in context.files[1:]))
+
+    names(context.sandbox.glob('./*.md')).should.equal(['README.md'])
+    names(context.sandbox.glob('*/file?.txt')).should.equal(['sub-sub-folder-1/file1.txt'])
+    names(context.sandbox.glob('**/file{1,3}.txt')).should.equal([
+        'sub-sub-folder-1/file1.txt',
+        'sub-sub-folder-1/sub-sub-sub-folder-2/sub-sub-sub-sub-folder-3/file3.txt',
+    ])
+    names(context.sandbox.glob(['*.md', '*.txt'], exclude='sub-sub-sub-folder-*')).should.equal([
+        'README.md',
+        'sub-sub-folder-1/file1.txt',
+    ])
+
+    folders = list(context.sandbox.glob('sub-*'))
+    folders.should.have.length_of(3)
+    for node in folders:
+        node.should.be.a(Folder)
+
+
+@posix
+def test_glob_prunes_folders(context):
+    ("only lists the folders that can contain a match")
+
+    from fstree.backends import walker
+
+    with patch('fstree.backends.walker.scan_folder', wraps=walker.scan_folder) as scan_folder:
+        list(context.sandbox.glob('sub-sub-folder-1/*.txt'))
+
+    listed = [os.path.relpath(c[0][0], context.path) for c in scan_folder.call_args_list]
+    listed.should.equal(['.', 'sub-sub-folder-1'])
+
+
+@posix
+def test_glob_sortby(context):
+    ("sorts the matches by a NodeInfo field only when asked")
+
+    from fstree.models import NodeInfo
+
+    nodes = list(context.sandbox.glob('*.txt', sortby=NodeInfo.fields.size))
+    [n.size for n in nodes].should.equal(sorted(n.size for n in nodes))
+
+    nodes = list(context.sandbox.glob('*.txt', sortby='path'))
+    [n.path for n in nodes].should.equal(sorted(context.files[1:]))
+
+    context.sandbox.glob.when.called_with('*.txt', sortby='color').should.throw(
+        ValueError, "cannot sort by 'color'")
+
+
+@posix
+def test_grep(context):
+    ("can find the lines of text files that match a regular expression")
+
+    context.sandbox.create_file('binary.dat', b'\x00\x01 FSTree Sandbox')
+
+    matches = list(context.sandbox.grep(r'FSTree|feel free'))
+    [(m.node.path, m.offset, m.data) for m in matches].should.equal([
+        (context.files[0], 2, b'# FSTree Sandbox'),
+        (context.files[0], 47, b'**feel free to delete this folder and subdirectories*'),
+    ])
+
+    for use_mmap in (True, False):
+        matches = list(context.sandbox.grep(r'^3', include='*.txt', use_mmap=use_mmap, chunk_size=1))
+        set(m.node.name for m in matches).should.equal({'file3.txt'})
+
+
+@posix
+def test_search_bytes(context):
+    ("can find raw bytes in any file")
+
+    context.sandbox.create_file('binary.dat', b'\x00\x01 FSTree Sandbox')
+
+    needles = [b'\x01 FS', b'Sandbox', b'Sand']
+    for use_mmap in (True, False):
+        matches = sorted(
+            (m.node.name, m.offset, m.data)
+            for m in context.sandbox.search_bytes(needles, use_mmap=use_mmap))
+
+        matches.should.equal([
+            ('README.md', 9, b'Sand'),
+            ('README.md', 9, b'Sandbox'),
+            ('binary.dat', 1, b'\x01 FS'),
+            ('binary.dat', 10, b'Sand'),
+            ('binary.dat', 10, b'Sandbox'),
+        ])
+
+        # the same through the automaton
+        sorted(
+            (m.node.name, m.offset, m.data)
+            for m in context.sandbox.search(AhoCorasickSearch(needles), use_mmap=use_mmap)).should.equal(matches)
+
+    errors = []
+    os.chmod(context.files[0], 0)
+    try:
+        list(context.sandbox.search_bytes(b'Sandbox', onerror=errors.append))
+    finally:
+        os.chmod(context.files[0], 0o644)
+
+    if os.getuid() != 0:
+        errors.should.have.length_of(1)
+
+
+@posix
+def test_search_bytes_with_many_needles(context):
+    ("can find thousands of needles scanning each file once")
+
+    needles = ['token-{0:04d}'.format(i) for i in range(5000)]
+    context.sandbox.create_file('secrets.txt', b'token-0042\n\x00token-4999')
+
+    matches = sorted(
+        (m.node.name, m.offset, m.data)
+        for m in context.sandbox.search_bytes(needles + [b'Sandbox'], chunk_size=4, use_mmap=False))
+
+    matches.should.equal([
+        ('README.md', 9, b'Sandbox'),
+        ('secrets.txt', 0, b'token-0042'),
+        ('secrets.txt', 12, b'token-4999'),
+    ])
+
+
+@posix
+def test_index(context):
+    ("can find files and folders in a persistent index")
+
+    import tempfile
+    from fstree.tree import Tree
+
+    db_folder = tempfile.mkdtemp()
+    db_path = os.path.join(db_folder, 'index.db')
+    try:
+        index = context.sandbox.build_index(db_path, checksum='sha1')
+
+        record = index.get('README.md')
+        record.type.should.equal('FILE')
+        record.size.should.equal(os.stat(context.files[0]).st_size)
+        record.inode.should.equal(os.stat(context.files[0]).st_ino)
+        record.checksum.should.have.length_of(40)
+
+        found = [n.path for n in context.sandbox.find('*.txt')]
+        found.should.equal(sorted(context.files[1:]))
+
+        sizes = sorted(os.stat(path).st_size for path in context.files)
+        found = context.sandbox.find(type='FILE', min_size=sizes[1], max_size=sizes[2])
+        sorted(os.stat(n.path).st_size for n in found).should.equal(
+            [size for size in sizes if sizes[1] <= size <= sizes[2]])
+
+        newest = max(os.stat(path).st_mtime for path in context.files)
+        list(context.sandbox.find(newer_than=newest)).should.equal([])
+
+        folders = list(context.sandbox.glob('sub-*'))
+        folders.should.have.length_of(3)
+        for node in folders:
+            node.should.be.a(Folder)
+
+        reopened = Tree(context.path)
+        reopened.open_index(db_path)
+        [n.name for n in reopened.find('README.md')].should.equal(['README.md'])
+    finally:
+        context.sandbox.index.close()
+        shutil.rmtree(db_folder)
+
+
+@posix
+def test_refresh_index(context):
+    ("lists again only the folders that changed since the index was built")
+
+    import tempfile
+    from fstree.tree import Tree
+
+    db_folder = tempfile.mkdtemp()
+    try:
+        index = context.sandbox.build_index(os.path.join(db_folder, 'index.db'))
+
+        report = context.sandbox.refresh_index()
+        report.checked.should.equal(4)
+        report.scanned.should.equal(0)
+
+        context.sandbox.create_file('new.txt', b'new')
+        os.makedirs(context.sandbox.expand_path('added', 'nested'))
+        os.unlink(context.files[1])
+        shutil.rmtree(os.path.dirname(context.files[-1]))
+
+        report = context.sandbox.refresh_index()
+        report.scanned.should.equal(3)
+        report.added.should.equal(3)
+        report.removed.should.equal(3)
+
+        found = sorted(index.absolute_path(r.path) for r in index.query())
+        found.should.equal(sorted(
+            os.path.join(root, name)
+            for root, folders, files in os.walk(context.path)
+            for name in folders + files))
+    finally:
+        context.sandbox.index.close()
+        shutil.rmtree(db_folder)
+
+    Tree(context.path).refresh_index.when.called_with().should.throw(RuntimeError, 'has no index')
+
+
+@posix
+def test_index_agrees_with_the_filesystem(context):
+    ("finds through the index what glob finds in the filesystem")
+
+    import tempfile
+
+    os.symlink('sub-sub-folder-1', context.sandbox.expand_path('link-1'))
+    expected = sorted((n.path, type(n)) for n in context.sandbox.glob('*-1'))
+
+    db_folder = tempfile.mkdtemp()
+    try:
+        index = context.sandbox.build_index(os.path.join(db_folder, 'index.db'))
+        sorted((n.path, type(n)) for n in context.sandbox.glob('*-1')).should.equal(expected)
+
+        # queries within queries
+        pairs = [
+            (outer.path, inner.path)
+            for outer in index.query('*.txt')
+            for inner in index.query(outer.path)
+        ]
+        pairs.should.have.length_of(len(context.files) - 1)
+
+        shutil.rmtree(context.path)
+        context.sandbox.refresh_index()
+        list(index.query()).should.equal([])
+        index.get('').should.be.none
+        os.makedirs(context.path)
+    finally:
+        context.sandbox.index.close()
+        shutil.rmtree(db_folder)
+
+
+@posix
+def test_watch(context):
+    ("can watch the changes of files and folders as they happen")
+
+    from fstree.platforms.linux import Created, Deleted, Moved, Modified
+    from fstree.platforms.linux import inotify
+
+    def changes(watcher):
+        return [
+            (e.__class__, os.path.relpath(e.path, context.path), e.is_folder)
+            for e in watcher.read(timeout=2)
+        ]
+
+    with context.sandbox.watch(latency=0.2) as watcher:
+        nested = os.path.dirname(context.files[-1])
+        with open(context.files[-1], 'ab') as fd:
+            fd.write(b'more')
+            fd.flush()
+            fd.write(b'and more')
+
+        changes(watcher).should.equal([
+            (Modified, os.path.relpath(context.files[-1], context.path), False),
+        ])
+
+        # the content of new folders shows up even when created
+        # before they are watched
+        os.makedirs(context.sandbox.expand_path('new', 'deeper'))
+        context.sandbox.create_file('new/deeper/file.txt', b'new')
+        context.sandbox.create_file('gone.txt', b'gone').destroy()
+
+        events = changes(watcher)
+        events.should.contain((Created, 'new', True))
+        events.should.contain((Created, 'new/deeper', True))
+        events.should.contain((Created, 'new/deeper/file.txt', False))
+        [e for e in events if 'gone' in e[1]].should.be.empty
+
+        os.rename(context.sandbox.expand_path('new'), context.sandbox.expand_path('renamed'))
+        events = watcher.read(timeout=2)
+        events.should.have.length_of(1)
+        events[0].should.be.a(Moved)
+        events[0].source.path.should.equal(context.sandbox.expand_path('new'))
+
+        os.unlink(context.sandbox.expand_path('renamed', 'deeper', 'file.txt'))
+        changes(watcher).should.equal([(Deleted, 'renamed/deeper/file.txt', False)])
+
+        shutil.rmtree(nested)
+        events = changes(watcher)
+        events.should.contain((Deleted, os.path.relpath(nested, context.path), True))
+
+        # written to a temporary file and renamed once complete
+        context.sandbox.create_file('atomic.tmp', b'atomic')
+        os.rename(context.sandbox.expand_path('atomic.tmp'), context.sandbox.expand_path('atomic.txt'))
+        changes(watcher).should.equal([(Created, 'atomic.txt', False)])
+
+        # the two halves of a rename read apart are still paired
+        watcher.handle([(watcher.watches[context.path], inotify.IN_MOVED_FROM, 7, b'atomic.txt')])
+        watcher.handle([(watcher.watches[context.path], inotify.IN_MOVED_TO, 7, b'moved.txt')])
+        watcher.expire_moves()
+        [e.__class__ for e in watcher.read(timeout=0)].should.equal([Moved])
+
+    watcher.closed.should.be.true
+
+
+@posix
+def test_watch_iter_events(context):
+    ("keeps iterating when a batch amounts to no changes at all")
+
+    import threading
+    from fstree.platforms.linux import Created
+
+    with context.sandbox.watch(latency=0.05) as watcher:
+        # created and deleted within the same batch
+        watcher.changes.extend([
+            ('created', context.sandbox.expand_path('gone.txt'), False, None),
+            ('deleted', context.sandbox.expand_path('gone.txt'), False, None),
+        ])
+        timer = threading.Timer(0.2, context.sandbox.create_file, ('kept.txt', b'kept'))
+        timer.start()
+        try:
+            events = list(watcher.iter_events(timeout=2))
+        finally:
+            timer.join()
+
+    [(e.__class__, e.node.name) for e in events].should.equal([(Created, 'kept.txt')])
+
+
+@posix
+def test_watch_limit(context):
+    ("asks to rescan the folders that cannot be watched")
+
+    import errno
+    from fstree.platforms.linux import Rescan
+    from fstree.platforms.linux import inotify
+
+    add_watch = inotify.add_watch
+    deepest = os.path.dirname(context.files[-1])
+
+    def limited_add_watch(fileno, path, mask):
+        if path == deepest:
+            raise OSError(errno.ENOSPC, 'inotify_add_watch(): No space left on device')
+        return add_watch(fileno, path, mask)
+
+    with patch('fstree.platforms.linux.inotify.add_watch', limited_add_watch):
+        with context.sandbox.watch() as watcher:
+            watcher.unwatched.should.equal({deepest})
+            events = watcher.read(timeout=0)
+
+    events.should.have.length_of(1)
+    events[0].should.be.a(Rescan)
+    events[0].path.should.equal(deepest)
@@ -0,0 +1,96 @@
+import os
+
+from mock import Mock
+
+from fstree.backends.cache import MetadataCache
+from fstree.backends.cache import NOT_FOUND
+
+
+def fake_stat(mode=0o100644, mtime=1.0):
+    return Mock(name='stat_result', st_mode=mode, st_mtime=mtime)
+
+
+def test_cache_get_and_put():
+    ('MetadataCache keeps stat results by path')
+
+    cache = MetadataCache()
+    st = fake_stat()
+
+    cache.get('/foo').should.be.none
+    cache.put('/foo', st)
+    cache.put('/bar', NOT_FOUND)
+
+    cache.get('/foo').should.be(st)
+    cache.get('/bar').should.be(NOT_FOUND)
+    cache.hits.should.equal(2)
+    cache.misses.should.equal(1)
+
+
+def test_cache_evicts_least_recently_used():
+    ('MetadataCache discards the least recently used paths beyond its maxsize')
+
+    cache = MetadataCache(maxsize=2)
+    cache.put('/a', fake_stat())
+    cache.put('/b', fake_stat())
+    cache.get('/a')
+    cache.put('/c', fake_stat())
+
+    len(cache).should.equal(2)
+    cache.get('/b').should.be.none
+    cache.get('/a').should_not.be.none
+    cache.get('/c').should_not.be.none
+
+
+def test_cache_ttl():
+    ('MetadataCache discards entries older than the ttl')
+
+    clock = Mock(return_value=100.0)
+    cache = MetadataCache(ttl=5, clock=clock)
+    cache.put('/foo', fake_stat())
+
+    clock.return_value = 104.0
+    cache.get('/foo').should_not.be.none
+
+    clock.return_value = 106.0
+    cache.get('/foo').should.be.none
+
+
+def test_cache_invalidate():
+    ('MetadataCache.invalidate() discards the path and its parent folder')
+
+    cache = MetadataCache()
+    for path in ('/foo', '/foo/bar', '/foo/bar/baz', '/foo/other'):
+        cache.put(path, fake_stat())
+
+    cache.invalidate('/foo/bar')
+
+    cache.get('/foo').should.be.none
+    cache.get('/foo/bar').should.be.none
+    cache.get('/foo/bar/baz').should_not.be.none
+    cache.get('/foo/other').should_not.be.none
+
+
+def test_cache_invalidate_recursive():
+    ('MetadataCache.invalidate(recursive=True) discards every path under it')
+
+    cache = MetadataCache()
+    for path in ('/foo/bar', '/foo/bar/baz', '/foo/bar/baz/qux', '/foo/barbaz'):
+        cache.put(path, fake_stat())
+
+    cache.invalidate('/foo/bar', recursive=True)
+
+    cache.get('/foo/bar/baz').should.be.none
+    cache.get('/foo/bar/baz/qux').should.be.none
+    cache.get('/foo/barbaz').should_not.be.none
+
+
+def test_cache_folder_mtime_change():
+    ('MetadataCache discards the children of a folder whose mtime changed')
+
+    cache = MetadataCache()
+    cache.put('/foo', fake_stat(mode=0o40755, mtime=1.0))
+    cache.put(os.path.join('/foo', 'bar'), NOT_FOUND)
+
+    cache.put('/foo', fake_stat(mode=0o40755, mtime=2.0))
+
+    cache.get('/foo/bar').should.be.none
@@ -0,0 +1,80 @@
+import io
+import os
+import errno
+import tempfile
+
+from mock import patch
+
+from fstree.backends.copier import copy_fd
+
+
+def create_temp_file(data):
+    fd = tempfile.NamedTemporaryFile(delete=False)
+    fd.write(data)
+    fd.close()
+    return io.open(fd.name, 'rb')
+
+
+def copy_data(data, **kw):
+    src = create_temp_file(data)
+    dst = io.open(tempfile.mktemp(), 'wb+')
+    report = copy_fd(src, dst, **kw)
+    dst.flush()
+    dst.seek(0)
+    return report, dst.read()
+
+
+def test_copy_fd_methods():
+    ('copy_fd() copies the whole file with each method')
+
+    data = os.urandom(10000)
+    for method in ('copy_file_range', 'sendfile', 'chunks'):
+        report, copied = copy_data(data, methods=[method], chunk_size=1024)
+
+        report.method.should.equal(method)
+        report.copied.should.equal(10000)
+        (copied == data).should.be.true
+
+
+def test_copy_fd_falls_back():
+    ('copy_fd() falls back to the next method when one is not supported')
+
+    unsupported = OSError(errno.EXDEV, 'cross-device link')
+    with patch('fstree.backends.libc.copy_file_range', side_effect=unsupported):
+        with patch('fstree.backends.libc.sendfile', side_effect=unsupported):
+            report, copied = copy_data(b'foobar')
+
+    report.method.should.equal('chunks')
+    copied.should.equal(b'foobar')
+
+
+def test_copy_fd_raises_other_errors():
+    ('copy_fd() raises the errors that are not about unsupported methods')
+
+    failed = OSError(errno.EIO, 'input/output error')
+    with patch('fstree.backends.libc.copy_file_range', side_effect=failed):
+        copy_data.when.called_with(b'foobar', methods=['copy_file_range']).should.throw(OSError)
+
+    copy_data.when.called_with(b'foobar', methods=['foo']).should.throw(
+        ValueError, 'unknown copy methods: foo')
+
+
+def test_copy_fd_keeps_files_of_only_holes_sparse():
+    ('copy_fd() copies nothing from a file that is all holes')
+
+    src = create_temp_file(b'')
+    with io.open(src.name, 'rb+') as fd:
+        fd.truncate(64 * 1024 * 1024)
+
+    for method in ('copy_file_range', 'sendfile', 'chunks'):
+        dst = io.open(tempfile.mktemp(), 'wb+')
+        try:
+            report = copy_fd(src, dst, methods=[method])
+            dst.flush()
+
+            report.copied.should.equal(0)
+            os.fstat(dst.fileno()).st_size.should.equal(64 * 1024 * 1024)
+            os.fstat(dst.fileno()).st_blocks.should.be.lower_than(64)
+        finally:
+            dst.close()
+            os.unlink(dst.name)
@@ -0,0 +1,118 @@
+import io
+import tempfile
+
+from mock import patch
+
+from fstree.backends.durability import DurabilityPolicy
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def open_temp_file():
+    return io.open(tempfile.mktemp(), 'wb')
+
+
+@patch('fstree.backends.durability.os.fsync')
+def test_fsync_mode_syncs_every_write_once(fsync):
+    ('DurabilityPolicy("fsync") syncs after every write but not again on close')
+
+    policy = DurabilityPolicy('fsync')
+    fd = open_temp_file()
+
+    policy.after_write(fd, 3).should.be.true
+    policy.after_write(fd, 3).should.be.true
+    policy.before_close(fd).should.be.false
+
+    fsync.call_count.should.equal(2)
+
+
+@patch('fstree.backends.durability.os.fdatasync')
+@patch('fstree.backends.durability.os.fsync')
+def test_fdatasync_mode(fsync, fdatasync):
+    ('DurabilityPolicy("fdatasync") calls fdatasync rather than fsync')
+
+    policy = DurabilityPolicy('fdatasync')
+    fd = open_temp_file()
+
+    policy.after_write(fd, 3).should.be.true
+    fdatasync.call_count.should.equal(1)
+    fsync.called.should.be.false
+
+
+@patch('fstree.backends.durability.os.fsync')
+def test_none_mode_never_syncs(fsync):
+    ('DurabilityPolicy("none") leaves it to the operating system')
+
+    policy = DurabilityPolicy('none')
+    fd = open_temp_file()
+
+    policy.after_write(fd, 3).should.be.false
+    policy.before_close(fd).should.be.false
+    policy.sync_folders.should.be.false
+    fsync.called.should.be.false
+
+
+@patch('fstree.backends.durability.os.fsync')
+def test_close_mode_syncs_once_on_close(fsync):
+    ('DurabilityPolicy("close") syncs dirty files only once, when closing them')
+
+    policy = DurabilityPolicy('close')
+    fd = open_temp_file()
+
+    policy.after_write(fd, 3).should.be.false
+    policy.after_write(fd, 3).should.be.false
+    fsync.called.should.be.false
+
+    policy.before_close(fd).should.be.true
+    fsync.call_count.should.equal(1)
+
+
+@patch('fstree.backends.durability.os.fsync')
+def test_group_mode(fsync):
+    ('DurabilityPolicy("group") syncs after enough bytes or seconds')
+
+    clock = FakeClock()
+    policy = DurabilityPolicy('group', interval=5, max_bytes=100, clock=clock)
+    fd = open_temp_file()
+
+    policy.after_write(fd, 60).should.be.false
+    policy.after_write(fd, 60).should.be.true
+
+    clock.now = 4
+    policy.after_write(fd, 1).should.be.false
+    clock.now = 6
+    policy.after_write(fd, 1).should.be.true
+
+    policy.before_close(fd).should.be.false
+    fsync.call_count.should.equal(2)
+
+
+@patch('fstree.backends.durability.os.fsync')
+def test_per_call_mode_and_untracked_files(fsync):
+    ('DurabilityPolicy accepts a mode per write and syncs unknown files on close')
+
+    policy = DurabilityPolicy('close')
+    fd = open_temp_file()
+    policy.after_write(fd, 3, 'fsync').should.be.true
+    policy.before_close(fd).should.be.false
+
+    untracked = open_temp_file()
+    policy.before_close(untracked).should.be.true
+    fsync.call_count.should.equal(2)
+
+    readonly = io.open(untracked.name, 'rb')
+    policy.before_close(readonly).should.be.false
+
+
+def test_invalid_mode():
+    ('DurabilityPolicy rejects unknown modes')
+
+    DurabilityPolicy.when.called_with('sometimes').should.throw(
+        ValueError, "invalid durability mode 'sometimes', must be one of: none, fdatasync, fsync, close, group")
+    DurabilityPolicy.coerce(None).mode.should.equal('fsync')
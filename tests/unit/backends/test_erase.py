@@ -0,0 +1,70 @@
+import io
+import tempfile
+
+from fstree.backends.erase import Eraser
+
+
+def create_temp_file(data):
+    fd = tempfile.NamedTemporaryFile(delete=False)
+    fd.write(data)
+    fd.close()
+    return io.open(fd.name, 'rb+')
+
+
+def test_eraser_overwrites_in_chunks():
+    ('Eraser overwrites every byte once per pass, in chunks')
+
+    fd = create_temp_file(b'A' * 1000)
+    report = Eraser('default', chunk_size=64).erase_fd(fd)
+
+    fd.seek(0)
+    fd.read().should.equal(b'\0' * 1000)
+    report.size.should.equal(1000)
+    report.written.should.equal(2000)
+    [p[0] for p in report.passes].should.equal(['random', 'zeros'])
+    report.throughput.should.be.greater_than(0)
+
+
+def test_eraser_dod_preset():
+    ('Eraser supports the DoD multi-pass preset and rounds')
+
+    fd = create_temp_file(b'A' * 100)
+    report = Eraser('dod', rounds=2, sync=False).erase_fd(fd)
+
+    [p[0] for p in report.passes].should.equal(
+        ['zeros', 'ones', 'random', 'zeros', 'ones', 'random'])
+    fd.seek(0)
+    data = fd.read()
+    data.should.have.length_of(100)
+    (data != b'A' * 100).should.be.true
+
+
+def test_eraser_custom_patterns():
+    ('Eraser accepts a sequence of patterns')
+
+    fd = create_temp_file(b'A' * 10)
+    Eraser(['ones']).erase_fd(fd)
+    fd.seek(0)
+    fd.read().should.equal(b'\xff' * 10)
+
+    Eraser.when.called_with(['ones', 'foo']).should.throw(
+        ValueError, 'unknown erase patterns: foo')
+
+
+def test_eraser_skips_holes():
+    ('Eraser only overwrites the data extents of sparse files')
+
+    fd = create_temp_file(b'')
+    fd.truncate(1024 * 1024)
+    fd.seek(512 * 1024)
+    fd.write(b'A' * 4096)
+    fd.flush()
+
+    report = Eraser(['ones'], sync=False).erase_fd(fd)
+
+    report.size.should.equal(1024 * 1024)
+    report.written.should.be.lower_than(1024 * 1024)
+    fd.seek(512 * 1024)
+    fd.read(4096).should.equal(b'\xff' * 4096)
+    fd.seek(0)
+    fd.read(4096).should.equal(b'\0' * 4096)
@@ -0,0 +1,96 @@
+import os
+import errno
+import tempfile
+
+from fstree.backends import libc
+
+
+def test_is_unsupported():
+    ('libc.is_unsupported() detects the errors of unsupported calls')
+
+    libc.is_unsupported(OSError(errno.ENOSYS, 'nope')).should.be.true
+    libc.is_unsupported(OSError(errno.EOPNOTSUPP, 'nope')).should.be.true
+    libc.is_unsupported(OSError(errno.ENOENT, 'nope')).should.be.false
+
+
+def test_posix_fallocate():
+    ('libc.posix_fallocate() grows a file with zeros')
+
+    with tempfile.TemporaryFile() as fd:
+        libc.posix_fallocate(fd.fileno(), 0, 4096)
+
+        os.fstat(fd.fileno()).st_size.should.equal(4096)
+        fd.read().should.equal(b'\0' * 4096)
+
+
+def test_fallocate_zero_range():
+    ('libc.fallocate() zeroes a range without changing the size')
+
+    with tempfile.TemporaryFile() as fd:
+        fd.write(b'A' * 100)
+        fd.flush()
+
+        try:
+            libc.fallocate(fd.fileno(), libc.FALLOC_FL_ZERO_RANGE | libc.FALLOC_FL_KEEP_SIZE, 0, 50)
+        except OSError as e:
+            libc.is_unsupported(e).should.be.true
+            return
+
+        fd.seek(0)
+        fd.read().should.equal(b'\0' * 50 + b'A' * 50)
+
+
+def test_pread_and_pwrite():
+    ('libc.pread() and libc.pwrite() do not move the file position')
+
+    with tempfile.TemporaryFile() as fd:
+        fd.write(b'0123456789')
+        fd.flush()
+        fd.seek(2)
+
+        libc.pwrite(fd.fileno(), b'ab', 5).should.equal(2)
+        libc.pread(fd.fileno(), 4, 4).should.equal(b'4ab7')
+        libc.pread(fd.fileno(), 100, 8).should.equal(b'89')
+
+        buf = bytearray(6)
+        libc.pread_into(fd.fileno(), buf, 1, count=3).should.equal(3)
+        buf.should.equal(bytearray(b'123\0\0\0'))
+
+        os.lseek(fd.fileno(), 0, os.SEEK_CUR).should.equal(2)
+
+
+def test_preadv_and_pwritev():
+    ('libc.preadv() and libc.pwritev() use many buffers in a single call')
+
+    with tempfile.TemporaryFile() as fd:
+        libc.pwritev(fd.fileno(), [b'foo', bytearray(b'bar'), b'baz'], 1).should.equal(9)
+
+        first, second = bytearray(4), bytearray(10)
+        libc.preadv(fd.fileno(), [first, second], 0).should.equal(10)
+        first.should.equal(bytearray(b'\0foo'))
+        second.should.equal(bytearray(b'barbaz\0\0\0\0'))
+
+
+def test_pwrite_and_pwritev_memoryviews():
+    ('libc.pwrite() and libc.pwritev() write the bytes of memoryviews')
+
+    data = bytearray(b'xxhelloworldxx')
+    with tempfile.TemporaryFile() as fd:
+        libc.pwrite(fd.fileno(), memoryview(data)[2:7], 0).should.equal(5)
+        libc.pwritev(fd.fileno(), [memoryview(data)[7:12], memoryview(b'!?')[:1]], 5).should.equal(6)
+
+        libc.pread(fd.fileno(), 100, 0).should.equal(b'helloworld!')
+
+
+def test_posix_fadvise_and_readahead():
+    ('libc.posix_fadvise() and libc.readahead() accept valid hints')
+
+    with tempfile.TemporaryFile() as fd:
+        fd.write(b'A' * 8192)
+        fd.flush()
+
+        libc.posix_fadvise(fd.fileno(), 0, 0, libc.POSIX_FADV_SEQUENTIAL)
+        libc.posix_fadvise(fd.fileno(), 0, 4096, libc.POSIX_FADV_DONTNEED)
+        libc.readahead(fd.fileno(), 0, 8192)
+
+        libc.posix_fadvise.when.called_with(fd.fileno(), 0, 0, 1000).should.throw(OSError)
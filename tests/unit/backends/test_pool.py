@@ -0,0 +1,63 @@
+import io
+import tempfile
+
+from fstree.backends.pool import FdPool
+
+
+def open_temp_file():
+    fd = tempfile.NamedTemporaryFile(delete=False)
+    fd.close()
+    return io.open(fd.name, 'rb', buffering=0)
+
+
+def test_pool_reuses_released_fds():
+    ('FdPool hands released file-descriptors back for the same key and identity')
+
+    pool = FdPool()
+    fd = open_temp_file()
+    key = (fd.name, 'rb')
+
+    pool.checkout(key, (1, 2)).should.be.none
+    pool.lease(fd, key, (1, 2))
+    pool.release(fd).should.be.true
+    len(pool).should.equal(1)
+
+    pool.checkout(key, (1, 2)).should.be(fd)
+    pool.checkout(key, (1, 2)).should.be.none
+    (pool.hits, pool.misses).should.equal((1, 2))
+
+
+def test_pool_drops_replaced_files():
+    ('FdPool closes idle file-descriptors whose file was replaced')
+
+    pool = FdPool()
+    fd = open_temp_file()
+    key = (fd.name, 'rb')
+    pool.lease(fd, key, (1, 2))
+    pool.release(fd)
+
+    pool.checkout(key, (1, 3)).should.be.none
+    fd.closed.should.be.true
+    len(pool).should.equal(0)
+
+
+def test_pool_evicts_least_recently_used():
+    ('FdPool closes the least recently used file-descriptors beyond max_open')
+
+    pool = FdPool(max_open=2)
+    fds = [open_temp_file() for _ in range(3)]
+    for fd in fds:
+        pool.lease(fd, (fd.name, 'rb'), (1, 2))
+        pool.release(fd)
+
+    len(pool).should.equal(2)
+    [fd.closed for fd in fds].should.equal([True, False, False])
+
+    pool.release(open_temp_file()).should.be.false
+
+    pool.discard(fds[1].name)
+    fds[1].closed.should.be.true
+
+    pool.clear()
+    fds[2].closed.should.be.true
+    len(pool).should.equal(0)
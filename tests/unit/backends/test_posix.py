@@ -1,8 +1,52 @@
 # -*- coding: utf-8 -*-
 
 from fstree.backends.posix import Posix
+from fstree.backends.posix import PosixAccessPolicy
+from fstree.backends.posix import PERMISSION_TABLE
 
 
 def test_posix_supports_path():
     Posix.supports_path('/tmp').should.be.true
     Posix.supports_path('file:///tmp').should.be.true
+
+
+def test_permission_table_covers_every_mode():
+    ('PERMISSION_TABLE has one entry per combination of permission bits')
+
+    PERMISSION_TABLE.should.have.length_of(512)
+
+
+def test_access_policy_from_mode():
+    ('PosixAccessPolicy.from_mode() decodes the owner, group and everyone bits')
+
+    PosixAccessPolicy.from_mode(0o754).should.equal({
+        'owner': {'read': True, 'write': True, 'execute': True},
+        'group': {'read': True, 'write': False, 'execute': True},
+        'everyone': {'read': True, 'write': False, 'execute': False},
+    })
+
+
+def test_access_policy_from_mode_with_leading_zero_bits():
+    ('PosixAccessPolicy.from_mode() decodes modes without owner bits')
+
+    PosixAccessPolicy.from_mode(0o044).should.equal({
+        'owner': {'read': False, 'write': False, 'execute': False},
+        'group': {'read': True, 'write': False, 'execute': False},
+        'everyone': {'read': True, 'write': False, 'execute': False},
+    })
+
+
+def test_access_policy_from_st_mode_ignores_file_type_bits():
+    ('PosixAccessPolicy.from_st_mode() only considers the permission bits')
+
+    PosixAccessPolicy.from_st_mode(0o100644).should.be(
+        PosixAccessPolicy.from_mode(0o644))
+
+
+def test_access_policy_objects_are_shared_and_immutable():
+    ('PosixAccessPolicy.from_mode() returns shared immutable objects')
+
+    policy = PosixAccessPolicy.from_mode(0o640)
+    policy['owner'].should.be(PosixAccessPolicy.from_mode(0o600)['owner'])
+    policy.__setitem__.when.called_with('owner', None).should.throw(TypeError)
+    policy['group'].update.when.called_with(read=False).should.throw(TypeError)
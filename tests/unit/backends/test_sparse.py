@@ -0,0 +1,44 @@
+import os
+import errno
+import tempfile
+
+from mock import patch
+
+from fstree.backends.sparse import data_extents
+
+
+def create_sparse_file():
+    fd = tempfile.TemporaryFile()
+    fd.truncate(1024 * 1024 * 4)
+    fd.seek(1024 * 1024)
+    fd.write(b'A' * 4096)
+    fd.flush()
+    return fd
+
+
+def test_data_extents():
+    ('data_extents() skips the holes of sparse files')
+
+    fd = create_sparse_file()
+    fd.seek(10)
+    extents = data_extents(fd.fileno())
+
+    # filesystems without SEEK_DATA report the whole file
+    if extents != [(0, 1024 * 1024 * 4)]:
+        extents.should.have.length_of(1)
+        start, end = extents[0]
+        start.should.be.lower_than_or_equal_to(1024 * 1024)
+        end.should.be.greater_than_or_equal_to(1024 * 1024 + 4096)
+        end.should.be.lower_than(1024 * 1024 * 4)
+
+    os.lseek(fd.fileno(), 0, os.SEEK_CUR).should.equal(10)
+    data_extents(fd.fileno(), offset=0, length=100).should.be.within([[], [(0, 100)]])
+
+
+def test_data_extents_unsupported():
+    ('data_extents() falls back to a single extent without SEEK_DATA')
+
+    fd = create_sparse_file()
+    unsupported = OSError(errno.EINVAL, 'invalid argument')
+    with patch('fstree.backends.sparse.os.lseek', side_effect=[0, unsupported, 0]):
+        data_extents(fd.fileno(), offset=10).should.equal([(10, 1024 * 1024 * 4)])
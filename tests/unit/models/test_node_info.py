@@ -0,0 +1,83 @@
+import os
+
+from fstree.models import NodeInfo
+from fstree.backends.posix import PosixNodeInfo
+
+
+def test_node_info_from_params():
+    ('NodeInfo() keeps the given fields')
+
+    info = NodeInfo(size=42, path='/foo/bar.txt', unknown='ignored')
+
+    info.size.should.equal(42)
+    info.path.should.equal('/foo/bar.txt')
+    info.uid.should.be.none
+    info.get_fieldnames.should.equal(['size', 'path', 'basepath', 'filename', 'shortname', 'extension'])
+
+
+def test_node_info_from_stat():
+    ('NodeInfo.from_stat() reads the stat-based fields from the raw stat result')
+
+    st = os.stat(__file__)
+    info = NodeInfo.from_stat(__file__, st)
+
+    info.stat_result.should.be(st)
+    info.uid.should.equal(st.st_uid)
+    info.gid.should.equal(st.st_gid)
+    info.size.should.equal(st.st_size)
+    info.last_accessed.should.equal(st.st_atime)
+    info.last_changed.should.equal(st.st_ctime)
+    info.last_modified.should.equal(st.st_mtime)
+
+
+def test_node_info_derived_fields():
+    ('NodeInfo computes the fields derived from the path only once')
+
+    info = NodeInfo(path='/foo/bar.tar.gz')
+
+    info.filename.should.equal('bar.tar.gz')
+    info.basepath.should.equal('/foo')
+    info.shortname.should.equal('bar.tar')
+    info.extension.should.equal('.gz')
+    info.filename.should.be(info.filename)
+
+
+def test_node_info_is_compact():
+    ('NodeInfo does not keep a __dict__ per instance')
+
+    info = PosixNodeInfo.from_stat(__file__, os.stat(__file__))
+
+    hasattr(info, '__dict__').should.be.false
+
+
+def test_posix_node_info_access_policy():
+    ('PosixNodeInfo decodes the access policy from the st_mode only when accessed')
+
+    info = PosixNodeInfo.from_stat(__file__, os.stat(__file__))
+
+    info._access_policy.should.be.none
+    info.access_policy.should.be.a('fstree.models.AccessPolicy')
+    info.access_policy.path.should.equal(__file__)
+    info.access_policy.should.be(info.access_policy)
+
+
+def test_node_info_to_dict():
+    ('NodeInfo.to_dict() contains all the fields')
+
+    info = NodeInfo(size=7, path='/foo.txt')
+
+    info.to_dict().should.equal({
+        'uid': None,
+        'gid': None,
+        'size': 7,
+        'created_at': None,
+        'last_accessed': None,
+        'last_changed': None,
+        'last_modified': None,
+        'access_policy': None,
+        'path': '/foo.txt',
+        'basepath': '/',
+        'filename': 'foo.txt',
+        'shortname': 'foo',
+        'extension': '.txt',
+    })
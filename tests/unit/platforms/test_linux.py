@@ -0,0 +1,62 @@
+from fstree.platforms.linux import inotify
+from fstree.platforms.linux.watcher import coalesce
+
+
+def test_parse_events():
+    ('fstree.platforms.linux.inotify.parse_events() unpacks the events and strips the padding of their names')
+
+    data = b''.join([
+        inotify.EVENT_HEADER.pack(1, inotify.IN_CREATE, 0, 16) + b'file.txt'.ljust(16, b'\0'),
+        inotify.EVENT_HEADER.pack(2, inotify.IN_DELETE_SELF, 0, 0),
+        inotify.EVENT_HEADER.pack(1, inotify.IN_MOVED_TO | inotify.IN_ISDIR, 7, 8) + b'new\0\0\0\0\0',
+    ])
+
+    inotify.parse_events(data).should.equal([
+        (1, inotify.IN_CREATE, 0, b'file.txt'),
+        (2, inotify.IN_DELETE_SELF, 0, b''),
+        (1, inotify.IN_MOVED_TO | inotify.IN_ISDIR, 7, b'new'),
+    ])
+
+
+def test_coalesce():
+    ('fstree.platforms.linux.watcher.coalesce() merges the changes of the same path')
+
+    coalesce([
+        ('created', '/a', False, None),
+        ('modified', '/b', False, None),
+        ('modified', '/a', False, None),
+        ('modified', '/b', False, None),
+        ('created', '/c', False, None),
+        ('deleted', '/c', False, None),
+        ('deleted', '/d', False, None),
+        ('created', '/d', False, None),
+        ('moved', '/f', False, '/e'),
+        ('modified', '/b', False, None),
+        ('deleted', '/b', False, None),
+        ('rescan', '/', True, None),
+        ('rescan', '/', True, None),
+    ]).should.equal([
+        ('created', '/a', False, None),
+        ('deleted', '/b', False, None),
+        ('modified', '/d', False, None),
+        ('moved', '/f', False, '/e'),
+        ('rescan', '/', True, None),
+    ])
+
+
+def test_coalesce_renamed_after_created():
+    ('fstree.platforms.linux.watcher.coalesce() creates under the new path what is created and renamed')
+
+    coalesce([
+        ('created', '/a.tmp', False, None),
+        ('modified', '/a.tmp', False, None),
+        ('moved', '/a', False, '/a.tmp'),
+        ('deleted', '/b', False, None),
+        ('created', '/b.tmp', False, None),
+        ('moved', '/b', False, '/b.tmp'),
+        ('moved', '/d', False, '/c'),
+    ]).should.equal([
+        ('created', '/a', False, None),
+        ('modified', '/b', False, None),
+        ('moved', '/d', False, '/c'),
+    ])
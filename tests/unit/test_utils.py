@@ -30,3 +30,18 @@ def test_unpack_node_dict():
 
     result = unpack_node_dict(path='path', info='info', extra='discarded')
     result.should.equal(('path', 'info'))
+
+
+def test_sorter():
+    'fstree.utils.Sorter() sorts by each of the given fields'
+
+    from collections import namedtuple
+    from fstree.utils import Sorter
+
+    Item = namedtuple('Item', 'name size')
+    items = [Item('b', 1), Item('a', 2)]
+    sorter = Sorter(['name', 'size'])
+
+    sorter.name(items).should.equal([Item('a', 2), Item('b', 1)])
+    sorter.size(items).should.equal([Item('b', 1), Item('a', 2)])
+    sorter.size.field.should.equal('size')
@@ -0,0 +1,58 @@
+import time
+import threading
+
+from fstree.workers import parallel_map
+
+
+def test_parallel_map_ordered():
+    ('fstree.workers.parallel_map() streams the results in order by default')
+
+    def slow_square(number):
+        time.sleep((10 - number) / 1000.0)
+        return number * number
+
+    result = list(parallel_map(slow_square, range(10), max_workers=4))
+
+    result.should.equal([(n, n * n) for n in range(10)])
+
+
+def test_parallel_map_unordered():
+    ('fstree.workers.parallel_map(ordered=False) streams every result as they complete')
+
+    result = list(parallel_map(lambda n: n * 2, range(50), max_workers=4, ordered=False))
+
+    sorted(result).should.equal([(n, n * 2) for n in range(50)])
+
+
+def test_parallel_map_raises_errors():
+    ('fstree.workers.parallel_map() raises the exceptions of the given function')
+
+    def fail_on_three(number):
+        if number == 3:
+            raise OSError(2, 'No such file or directory')
+
+        return number
+
+    results = parallel_map(fail_on_three, range(5), max_workers=2)
+
+    next(results).should.equal((0, 0))
+    list.when.called_with(results).should.throw(OSError, 'No such file or directory')
+
+
+def test_parallel_map_is_bounded():
+    ('fstree.workers.parallel_map() never keeps more than the backlog in flight')
+
+    consumed = []
+    lock = threading.Lock()
+
+    def items():
+        for number in range(100):
+            with lock:
+                consumed.append(number)
+            yield number
+
+    results = parallel_map(lambda n: n, items(), max_workers=2, backlog=4)
+    next(results)
+
+    len(consumed).should.be.lower_than(6)
+    results.close()
@@ -0,0 +1,50 @@
+import random
+
+from fstree.tree.ahocorasick import Automaton
+
+
+def brute_force(needles, data):
+    return sorted(
+        (offset, needle)
+        for needle in set(needles)
+        for offset in range(len(data))
+        if data.startswith(needle, offset)
+    )
+
+
+def test_automaton_iter_matches():
+    ('fstree.tree.ahocorasick.Automaton() finds overlapping needles, including suffixes of each other')
+
+    automaton = Automaton([b'he', b'she', b'his', b'hers'])
+    list(automaton.iter_matches(b'ushers')).should.equal([
+        (1, b'she'),
+        (2, b'he'),
+        (2, b'hers'),
+    ])
+    list(automaton.iter_matches(b'ushers', start=2)).should.equal([
+        (2, b'he'),
+        (2, b'hers'),
+    ])
+    list(automaton.iter_matches(b'nothing')).should.equal([])
+
+
+def test_automaton_matches_brute_force():
+    ('fstree.tree.ahocorasick.Automaton() finds the same matches of a brute-force search')
+
+    rng = random.Random(42)
+    alphabet = b'ab\x00\xff'
+    for _ in range(50):
+        needles = [
+            b''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+            for _ in range(rng.randint(1, 20))
+        ]
+        data = b''.join(rng.choice(alphabet) for _ in range(200))
+
+        found = sorted(Automaton(needles).iter_matches(data))
+        (found == brute_force(needles, data)).should.be.true
+
+
+def test_automaton_rejects_empty_needles():
+    ('fstree.tree.ahocorasick.Automaton() cannot search for empty needles')
+
+    Automaton.when.called_with([b'a', b'']).should.throw(ValueError, 'cannot search for empty needles')
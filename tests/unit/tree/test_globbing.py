@@ -0,0 +1,116 @@
+from fstree.tree.globbing import expand_braces
+from fstree.tree.globbing import GlobPattern
+from fstree.tree.globbing import Glob
+
+
+def test_expand_braces():
+    ('fstree.tree.globbing.expand_braces() expands nested brace sets')
+
+    expand_braces('*.py').should.equal(['*.py'])
+    expand_braces('src/{lib,bin}/*.{py,pyc}').should.equal([
+        'src/lib/*.py',
+        'src/lib/*.pyc',
+        'src/bin/*.py',
+        'src/bin/*.pyc',
+    ])
+    expand_braces('{a,b{c,d}}').should.equal(['a', 'bc', 'bd'])
+    expand_braces('{a,a}').should.equal(['a'])
+    expand_braces('{a}.txt').should.equal(['{a}.txt'])
+
+
+def test_glob_pattern_segments():
+    ('fstree.tree.globbing.GlobPattern() compiles one matcher per segment')
+
+    GlobPattern('*.py').segments[0].should.equal('**')
+    GlobPattern('./docs/index.rst').segments.should.equal(('docs', 'index.rst'))
+    GlobPattern('a/**/**/b').segments.should.equal(('a', '**', 'b'))
+
+
+def test_glob_match_basenames():
+    ('fstree.tree.globbing.Glob() matches patterns without "/" at any depth')
+
+    glob = Glob('*.py')
+    glob.match('setup.py').should.be.true
+    glob.match('fstree/tree/base.py').should.be.true
+    glob.match('fstree/tree/base.pyc').should.be.false
+
+
+def test_glob_match_paths():
+    ('fstree.tree.globbing.Glob() matches patterns with "/" segment by segment')
+
+    glob = Glob('src/**/test_*.py')
+    glob.match('src/test_a.py').should.be.true
+    glob.match('src/a/b/test_a.py').should.be.true
+    glob.match('lib/src/test_a.py').should.be.false
+    glob.match('src/a/b/a_test.py').should.be.false
+
+    Glob('./[0-9].*').match('1.gif').should.be.true
+    Glob('./[0-9].*').match('giphy/1.gif').should.be.false
+
+
+def test_glob_exclude():
+    ('fstree.tree.globbing.Glob() excludes paths and everything under them')
+
+    glob = Glob(['*.py', '*.rst'], exclude=['build', 'docs/*.rst'])
+    glob.match('setup.py').should.be.true
+    glob.match('build/lib/setup.py').should.be.false
+    glob.match('docs/index.rst').should.be.false
+    glob.match('README.rst').should.be.true
+
+
+def test_glob_can_descend():
+    ('fstree.tree.globbing.Glob() knows which folders cannot contain a match')
+
+    glob = Glob('src/*/*.py', exclude='tests')
+
+    def state(path):
+        states = glob.initial
+        for name in path.split('/'):
+            states = glob.step(states, name)
+        return states
+
+    glob.can_descend(state('src')).should.be.true
+    glob.can_descend(state('src/fstree')).should.be.true
+    glob.can_descend(state('src/fstree/tree')).should.be.false
+    glob.can_descend(state('docs')).should.be.false
+    glob.can_descend(state('src/tests')).should.be.false
+
+
+def test_glob_select():
+    ('fstree.tree.globbing.Glob().select() lists only the folders that can contain a match')
+
+    tree = {
+        '/t': ['src', 'docs', 'empty', 'setup.py'],
+        '/t/src': ['fstree', 'tests', 'run.py'],
+        '/t/src/fstree': ['base.py', 'tree'],
+        '/t/src/fstree/tree': ['index.py'],
+        '/t/src/tests': ['test_base.py'],
+        '/t/docs': ['index.rst'],
+        '/t/empty': [],
+    }
+    listed = []
+
+    class FakeEntry(object):
+        def __init__(self, path):
+            self.path = path
+            self.name = path.rsplit('/', 1)[-1]
+
+        def is_folder(self, follow_symlinks=True):
+            return self.path in tree
+
+    def iter_entries(path, descend):
+        pending = [path]
+        while pending:
+            folder = pending.pop()
+            listed.append(folder)
+            for name in tree[folder]:
+                entry = FakeEntry(folder + '/' + name)
+                yield entry
+                if entry.is_folder() and descend(entry):
+                    pending.append(entry.path)
+
+    glob = Glob(['src/*/*.py', 'empty/*'], exclude='tests')
+    found = [entry.path for entry in glob.select(iter_entries, '/t')]
+
+    found.should.equal(['/t/src/fstree/base.py'])
+    sorted(listed).should.equal(['/t', '/t/empty', '/t/src', '/t/src/fstree'])
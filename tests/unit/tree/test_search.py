@@ -0,0 +1,105 @@
+from fstree.tree.search import RegexSearch
+from fstree.tree.search import BytesSearch
+from fstree.tree.search import AhoCorasickSearch
+from fstree.tree.search import bytes_searcher
+from fstree.tree.search import search_chunks
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_regex_search():
+    ('fstree.tree.search.RegexSearch() finds each matching line once')
+
+    searcher = RegexSearch(r'fo+')
+    data = b'foo\nbar\nfoo foo\nbaz'
+
+    searcher.search(data).should.equal((len(data), [
+        (0, b'foo'),
+        (8, b'foo foo'),
+    ]))
+
+
+def test_regex_search_leaves_incomplete_lines():
+    ('fstree.tree.search.RegexSearch() leaves the last incomplete line when more data follows')
+
+    searcher = RegexSearch(r'baz')
+    searcher.search(b'foo\nba', final=False).should.equal((4, []))
+    searcher.search(b'foo\nbaz', final=True).should.equal((7, [(4, b'baz')]))
+
+
+def test_bytes_search():
+    ('fstree.tree.search.BytesSearch() finds every needle, including overlapping ones')
+
+    searcher = BytesSearch([b'ab', b'b', b'abc'])
+    searcher.search(b'xabcab').should.equal((6, [
+        (1, b'abc'),
+        (1, b'ab'),
+        (2, b'b'),
+        (4, b'ab'),
+        (5, b'b'),
+    ]))
+
+    BytesSearch.when.called_with([b'']).should.throw(ValueError, 'cannot search for empty needles')
+
+
+def test_search_chunks_across_boundaries():
+    ('fstree.tree.search.search_chunks() finds the matches that cross chunk boundaries')
+
+    data = b'line one\nline two has a needle\n\x00needle\nend'
+    expected = [(24, b'needle'), (32, b'needle')]
+
+    for size in (1, 3, 7, 64):
+        list(search_chunks(BytesSearch(b'needle'), chunked(data, size))).should.equal(expected)
+        list(search_chunks(RegexSearch(r'needle|end'), chunked(data, size))).should.equal([
+            (24, b'line two has a needle'),
+            (32, b'\x00needle'),
+            (39, b'end'),
+        ])
+
+
+def test_search_chunks_long_lines():
+    ('fstree.tree.search.search_chunks() searches the rest at once when a line keeps growing')
+
+    data = b'x' * 100 + b'needle' + b'x' * 100 + b'\nend'
+    calls = []
+
+    class CountingSearch(RegexSearch):
+        def search(self, data, final=True):
+            calls.append(final)
+            return super(CountingSearch, self).search(data, final)
+
+    found = list(search_chunks(CountingSearch(r'needle|end'), chunked(data, 10), max_carry=30))
+    found.should.equal([(100, data[:206]), (207, b'end')])
+    calls.should.equal([False, False, False, False, True])
+
+
+def test_aho_corasick_search():
+    ('fstree.tree.search.AhoCorasickSearch() reports every needle, in the order of their offsets, like BytesSearch()')
+
+    data = b'xabcab\x00abc'
+    expected = [
+        (1, b'abc'),
+        (1, b'ab'),
+        (2, b'b'),
+        (4, b'ab'),
+        (5, b'b'),
+        (7, b'abc'),
+        (7, b'ab'),
+        (8, b'b'),
+    ]
+
+    for searcher in (AhoCorasickSearch([b'ab', b'b', b'abc']), BytesSearch([b'ab', b'b', b'abc'])):
+        searcher.search(data).should.equal((len(data), expected))
+
+        for size in (1, 2, 5):
+            list(search_chunks(searcher, chunked(data, size))).should.equal(expected)
+
+
+def test_bytes_searcher():
+    ('fstree.tree.search.bytes_searcher() uses an automaton for many needles')
+
+    bytes_searcher(b'a').should.be.a(BytesSearch)
+    bytes_searcher([b'a', b'b']).should.be.a(BytesSearch)
+    bytes_searcher([bytes(i) for i in range(100)]).should.be.a(AhoCorasickSearch)